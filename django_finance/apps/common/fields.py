@@ -0,0 +1,142 @@
+from decimal import ROUND_HALF_EVEN, Decimal, InvalidOperation
+
+from django import forms
+from django.core.exceptions import ValidationError
+from django.db import models
+
+# ISO 4217 currencies whose minor unit isn't a hundredth.
+CURRENCY_EXPONENTS = {
+    **dict.fromkeys(
+        [
+            "BIF",
+            "CLP",
+            "DJF",
+            "GNF",
+            "ISK",
+            "JPY",
+            "KMF",
+            "KRW",
+            "PYG",
+            "RWF",
+            "UGX",
+            "VND",
+            "VUV",
+            "XAF",
+            "XOF",
+            "XPF",
+        ],
+        0,
+    ),
+    **dict.fromkeys(["BHD", "IQD", "JOD", "KWD", "LYD", "OMR", "TND"], 3),
+}
+DEFAULT_CURRENCY_EXPONENT = 2
+# Unofficial currencies are mostly cryptocurrencies, stored down to a hundred-millionth.
+UNOFFICIAL_CURRENCY_EXPONENT = 8
+
+
+def get_currency_exponent(iso_currency_code: str = "", unofficial_currency_code: str = "") -> int:
+    """
+    Returns the number of decimal places of the minor unit of a currency.
+    """
+    if iso_currency_code:
+        return CURRENCY_EXPONENTS.get(iso_currency_code.upper(), DEFAULT_CURRENCY_EXPONENT)
+    if unofficial_currency_code:
+        return UNOFFICIAL_CURRENCY_EXPONENT
+    return DEFAULT_CURRENCY_EXPONENT
+
+
+def to_minor_units(amount, exponent: int) -> int:
+    """
+    Converts an amount to an integer number of minor units, rounding half to even.
+    """
+    amount = amount if isinstance(amount, Decimal) else Decimal(str(amount))
+    return int(amount.scaleb(exponent).to_integral_value(rounding=ROUND_HALF_EVEN))
+
+
+def from_minor_units(minor_units: int, exponent: int) -> Decimal:
+    return Decimal(int(minor_units)).scaleb(-exponent)
+
+
+class MinorUnits(int):
+    """
+    Integer number of minor units read from the database, as opposed to an amount assigned in major units.
+    """
+
+
+class MinorUnitsDescriptor:
+    """
+    Exposes a minor units column as a Decimal amount in its currency, and accepts amounts in major units.
+    """
+
+    def __init__(self, field: "MinorUnitsField"):
+        self.field = field
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+
+        if self.field.attname not in instance.__dict__:
+            instance.refresh_from_db(fields=[self.field.attname])
+
+        minor_units = self.field.get_minor_units(instance)
+        if minor_units is None:
+            return None
+        return from_minor_units(minor_units, self.field.get_exponent(instance))
+
+    def __set__(self, instance, value):
+        instance.__dict__[self.field.attname] = value
+
+
+class MinorUnitsField(models.BigIntegerField):
+    """
+    Money amount stored as a BigIntegerField of minor units (cents for USD, yen for JPY) of the currency held in the
+    `currency_fields` of the same row, the first non-empty one being used.
+    Instances read and assign amounts as Decimals in major units. Values used without an instance, in values(),
+    aggregates, lookups, update() and bulk_update(), are in minor units.
+    """
+
+    def __init__(self, *args, currency_fields=("iso_currency_code", "unofficial_currency_code"), **kwargs):
+        self.currency_fields = tuple(currency_fields)
+        super().__init__(*args, **kwargs)
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        kwargs["currency_fields"] = self.currency_fields
+        return name, path, args, kwargs
+
+    def contribute_to_class(self, cls, name, *args, **kwargs):
+        super().contribute_to_class(cls, name, *args, **kwargs)
+        setattr(cls, self.attname, MinorUnitsDescriptor(self))
+
+    def from_db_value(self, value, expression, connection):
+        return None if value is None else MinorUnits(value)
+
+    def to_python(self, value):
+        if value is None or isinstance(value, MinorUnits):
+            return value
+        try:
+            return value if isinstance(value, Decimal) else Decimal(str(value))
+        except InvalidOperation:
+            raise ValidationError(self.error_messages["invalid"], code="invalid", params={"value": value})
+
+    def get_exponent(self, instance) -> int:
+        return get_currency_exponent(*(getattr(instance, name) or "" for name in self.currency_fields))
+
+    def get_minor_units(self, instance) -> int | None:
+        """
+        Returns the amount of an instance in minor units, converting an assigned amount with the instance's currency.
+        """
+        value = instance.__dict__.get(self.attname)
+        if value is None or isinstance(value, MinorUnits):
+            return value
+        return to_minor_units(value, self.get_exponent(instance))
+
+    def pre_save(self, model_instance, add):
+        return self.get_minor_units(model_instance)
+
+    def value_from_object(self, obj):
+        return getattr(obj, self.attname)
+
+    def formfield(self, **kwargs):
+        # Skips the integer form field of BigIntegerField, forms edit the amount in major units
+        return models.Field.formfield(self, **{"form_class": forms.DecimalField, **kwargs})
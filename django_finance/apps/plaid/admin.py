@@ -1,6 +1,14 @@
 from django.contrib import admin
 
-from django_finance.apps.plaid.models import Account, Item, PlaidLinkEvent, Transaction
+from django_finance.apps.plaid.models import (
+    Account,
+    Item,
+    Merchant,
+    PersonalFinanceCategory,
+    PlaidLinkEvent,
+    Transaction,
+    WebhookEvent,
+)
 
 admin.site.register(PlaidLinkEvent)
 
@@ -8,6 +16,7 @@ admin.site.register(PlaidLinkEvent)
 class PlaidTransactionInline(admin.TabularInline):
     model = Transaction
     extra = 1
+    raw_id_fields = ("merchant", "category")
 
 
 class AccountInline(admin.TabularInline):
@@ -30,5 +39,25 @@ class AccountAdmin(admin.ModelAdmin):
 @admin.register(Transaction)
 class PlaidTransactionAdmin(admin.ModelAdmin):
     list_display = ("transaction_id", "amount", "date", "account")
-    search_fields = ("transaction_id", "name", "merchant_name")
+    search_fields = ("transaction_id", "name", "merchant__name")
     list_filter = ("date", "pending", "confidence_level")
+    raw_id_fields = ("merchant", "category")
+
+
+@admin.register(Merchant)
+class MerchantAdmin(admin.ModelAdmin):
+    list_display = ("name", "entity_id", "website")
+    search_fields = ("name", "entity_id")
+
+
+@admin.register(PersonalFinanceCategory)
+class PersonalFinanceCategoryAdmin(admin.ModelAdmin):
+    list_display = ("primary", "detailed")
+    search_fields = ("primary", "detailed")
+
+
+@admin.register(WebhookEvent)
+class WebhookEventAdmin(admin.ModelAdmin):
+    list_display = ("id", "webhook_type", "webhook_code", "plaid_item_id", "status", "attempts", "created_at")
+    search_fields = ("plaid_item_id",)
+    list_filter = ("status", "webhook_type", "webhook_code")
@@ -0,0 +1,65 @@
+import logging
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.db.transaction import atomic
+from django.utils import timezone
+
+from django_finance.apps.plaid.models import ArchivedTransaction, Transaction
+from django_finance.apps.plaid.partitions import ensure_partitions
+
+logger = logging.getLogger(__name__)
+
+# Transaction fields kept in the archive
+ARCHIVED_FIELDS = (
+    "user_id",
+    "account_id",
+    "transaction_id",
+    "date",
+    "amount",
+    "iso_currency_code",
+    "unofficial_currency_code",
+    "name",
+    "merchant_id",
+    "category_id",
+)
+
+
+def get_archive_horizon() -> date:
+    """
+    Returns the date before which transactions are archived.
+    """
+    return timezone.localdate() - timedelta(days=settings.PLAID_ARCHIVE_AFTER_DAYS)
+
+
+def archive_transactions(before: date | None = None, batch_size: int | None = None) -> int:
+    """
+    Moves transactions dated before `before` to the archive table, in batches each copied and deleted in one
+    database transaction. Archived transactions stay counted in finance summaries and daily rollups.
+    Returns the number of archived transactions.
+    """
+    before = before or get_archive_horizon()
+    batch_size = batch_size or settings.PLAID_ARCHIVE_BATCH_SIZE
+    archived = 0
+
+    while True:
+        with atomic():
+            rows = list(
+                Transaction.objects.select_for_update(skip_locked=True)
+                .filter(date__lt=before)
+                .order_by("id")
+                .values("id", *ARCHIVED_FIELDS)[:batch_size]
+            )
+            if not rows:
+                break
+
+            ensure_partitions(ArchivedTransaction, {row["date"] for row in rows})
+            ArchivedTransaction.objects.bulk_create(
+                [ArchivedTransaction(**{field: row[field] for field in ARCHIVED_FIELDS}) for row in rows]
+            )
+            Transaction.objects.filter(id__in=[row["id"] for row in rows]).delete()
+
+        archived += len(rows)
+        logger.info(f"{archived} transactions dated before {before} archived so far.")
+
+    return archived
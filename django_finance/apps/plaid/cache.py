@@ -0,0 +1,128 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+
+from django.core.cache import caches
+
+logger = logging.getLogger(__name__)
+
+# Returned on a cache miss, since None is a cached value meaning "known to be missing".
+MISSING = object()
+
+# Number of locks that misses of a tiered cache are spread over, so keys from untrusted input can't grow memory.
+LOCK_STRIPES = 64
+
+
+class LocalTTLCache:
+    """
+    Thread-safe, process-local LRU cache whose entries expire after their own TTL.
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str):
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry is None:
+                return MISSING
+
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return MISSING
+
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value, ttl: float) -> None:
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + ttl)
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+class TieredCache:
+    """
+    Process-local LRU in front of a Django cache, so hot values are served from memory while every worker and
+    restart shares what was already fetched. Local entries live at most `local_ttl` seconds, which bounds how long
+    a process can miss a change made by another one.
+    A failing shared cache is logged and skipped rather than failing the caller.
+    """
+
+    def __init__(self, prefix: str, maxsize: int, local_ttl: float = 60, alias: str = "default"):
+        self.prefix = prefix
+        self.local_ttl = local_ttl
+        self.alias = alias
+        self.local = LocalTTLCache(maxsize)
+        self._locks = [threading.Lock() for _ in range(LOCK_STRIPES)]
+
+    def _key(self, key: str) -> str:
+        return f"{self.prefix}:{key}"
+
+    def get(self, key: str):
+        value = self.local.get(key)
+        if value is not MISSING:
+            return value
+
+        try:
+            value = caches[self.alias].get(self._key(key), MISSING)
+        except Exception as e:
+            logger.warning(f"Shared cache unavailable for {self._key(key)}: {str(e)}")
+            return MISSING
+
+        if value is not MISSING:
+            self.local.set(key, value, ttl=self.local_ttl)
+        return value
+
+    def set(self, key: str, value, ttl: float) -> None:
+        self.local.set(key, value, ttl=min(ttl, self.local_ttl))
+
+        try:
+            caches[self.alias].set(self._key(key), value, timeout=ttl)
+        except Exception as e:
+            logger.warning(f"Shared cache unavailable for {self._key(key)}: {str(e)}")
+
+    def delete(self, key: str) -> None:
+        self.local.delete(key)
+
+        try:
+            caches[self.alias].delete(self._key(key))
+        except Exception as e:
+            logger.warning(f"Shared cache unavailable for {self._key(key)}: {str(e)}")
+
+    def get_or_set(self, key: str, fetch: Callable, ttl: float, negative_ttl: float):
+        """
+        Returns the cached value of `key`, calling `fetch` on a miss.
+        A None result is cached for `negative_ttl` seconds. Concurrent misses for the same key in this process
+        wait for a single `fetch` instead of all calling it. Keys share a fixed set of locks, so a miss may also
+        wait for the fetch of an unrelated key.
+        """
+        value = self.get(key)
+        if value is not MISSING:
+            return value
+
+        with self._locks[hash(key) % LOCK_STRIPES]:
+            # Another thread may have fetched it while we waited
+            value = self.get(key)
+            if value is not MISSING:
+                return value
+
+            value = fetch()
+            self.set(key, value, ttl=ttl if value is not None else negative_ttl)
+            return value
@@ -0,0 +1,139 @@
+import json
+import logging
+import time
+from dataclasses import dataclass
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.transaction import on_commit
+
+from django_finance.apps.plaid.models import Item, Transaction
+from django_finance.apps.plaid.summaries import get_user_finance_summary
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class DashboardSummary:
+    """
+    Totals shown on the dashboard, shared by the dashboard view and any API exposing the same numbers.
+    Income and expense are None when the user has no such transactions.
+    """
+
+    items: list[Item]
+    net_worth: Decimal | None
+    total_income: Decimal | None
+    total_expense: Decimal | None
+    category_spending: list[dict]
+
+    @property
+    def no_of_banks(self) -> int:
+        return len(self.items)
+
+    @property
+    def name_of_banks_connected(self) -> list[str]:
+        return [item.institution_name for item in self.items]
+
+    @property
+    def category_spending_json(self) -> str:
+        return json.dumps(self.category_spending, cls=DjangoJSONEncoder)
+
+
+def get_dashboard_summary(user_id: int) -> DashboardSummary:
+    """
+    Reads the dashboard from the user's precomputed finance summary, with one more query for items.
+    """
+    items = list(Item.objects.filter(user_id=user_id))
+    summary = get_user_finance_summary(user_id)
+
+    return DashboardSummary(
+        items=items,
+        net_worth=summary.net_worth,
+        # Zero only when there are no such transactions
+        total_income=summary.total_income or None,
+        total_expense=summary.total_expense or None,
+        category_spending=[
+            {"primary_personal_finance_category": category, "total_spending": Decimal(totals["total"])}
+            for category, totals in summary.category_totals.items()
+        ],
+    )
+
+
+def get_dashboard_version_key(user_id: int) -> str:
+    return f"plaid:dashboard-version:{user_id}"
+
+
+def get_dashboard_version(user_id: int) -> int:
+    """
+    Returns the version of a user's dashboard data, which is part of the key of their cached dashboard.
+    """
+    key = get_dashboard_version_key(user_id)
+    version = cache.get(key)
+
+    if version is None:
+        # Start from the current time, so a lost version key can't bring back a dashboard cached before it was lost
+        cache.add(key, time.time_ns(), timeout=None)
+        version = cache.get(key)
+
+    return version
+
+
+def invalidate_dashboard(user_id: int) -> None:
+    """
+    Bumps the version of a user's dashboard, so the next request recomputes it. Stale entries expire on their own.
+    """
+    try:
+        cache.incr(get_dashboard_version_key(user_id))
+    except ValueError:
+        cache.set(get_dashboard_version_key(user_id), time.time_ns(), timeout=None)
+    except Exception as e:
+        logger.warning(f"Could not invalidate the dashboard of user {user_id}: {str(e)}")
+
+
+def invalidate_dashboard_on_commit(user_id: int) -> None:
+    """
+    Invalidates a user's dashboard once the current transaction commits, so it isn't recached with the old data
+    in between.
+    """
+    on_commit(lambda: invalidate_dashboard(user_id))
+
+
+def get_dashboard_context(user_id: int) -> dict:
+    """
+    Returns the dashboard template context of a user, cached until their data changes.
+    """
+    try:
+        key = f"plaid:dashboard:{user_id}:{get_dashboard_version(user_id)}"
+        context = cache.get(key)
+    except Exception as e:
+        logger.warning(f"Dashboard cache unavailable for user {user_id}: {str(e)}")
+        key, context = None, None
+
+    if context is not None:
+        return context
+
+    summary = get_dashboard_summary(user_id)
+    context = {
+        "items": summary.items,
+        "no_of_banks": summary.no_of_banks,
+        "name_of_banks_connected": summary.name_of_banks_connected,
+        "net_worth": summary.net_worth,
+        "total_income": summary.total_income,
+        "total_expense": summary.total_expense,
+        # 5 Recent transactions, without their location, which the dashboard doesn't show
+        "transactions": list(
+            Transaction.objects.filter(user_id=user_id).select_related("merchant", "category").defer("location")[:5]
+        ),
+        "category_spending": summary.category_spending,
+        "category_spending_json": summary.category_spending_json,  # For chart.js
+    }
+
+    if key is not None:
+        try:
+            cache.set(key, context, timeout=settings.PLAID_DASHBOARD_CACHE_TTL)
+        except Exception as e:
+            logger.warning(f"Dashboard cache unavailable for user {user_id}: {str(e)}")
+
+    return context
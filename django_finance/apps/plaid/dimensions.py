@@ -0,0 +1,98 @@
+from django.conf import settings
+from django.db.transaction import on_commit
+from django.utils import timezone
+
+from django_finance.apps.plaid.cache import MISSING, LocalTTLCache
+from django_finance.apps.plaid.models import Merchant, PersonalFinanceCategory
+
+
+class DimensionTable:
+    """
+    Interns the rows of a dimension table, resolving their natural keys to ids in bulk.
+    Resolved ids are remembered in a process-local cache once the transaction that read or inserted them commits,
+    so the ids of an aborted insert are never cached. Known rows are only written when their attributes changed,
+    which keeps concurrent syncs from locking popular merchants.
+    """
+
+    def __init__(self, model, key_fields: tuple[str, ...], attribute_fields: tuple[str, ...]):
+        self.model = model
+        self.key_fields = key_fields
+        self.attribute_fields = attribute_fields
+        self.cache = LocalTTLCache(settings.PLAID_DIMENSION_CACHE_SIZE)
+
+    def _fetch(self, keys) -> dict[tuple, tuple[int, dict]]:
+        """
+        Returns the id and attributes of the stored rows of `keys`, filtering on each key field then matching the
+        exact keys here, so the query stays flat however many keys there are. Soft-deleted rows are included, as
+        they still hold their key.
+        """
+        lookup = {f"{name}__in": {key[i] for key in keys} for i, name in enumerate(self.key_fields)}
+        rows = {}
+
+        for row in self.model._base_manager.filter(**lookup).values("id", *self.key_fields, *self.attribute_fields):
+            key = tuple(row[name] for name in self.key_fields)
+            if key in keys:
+                rows[key] = (row["id"], {name: row[name] for name in self.attribute_fields})
+
+        return rows
+
+    def resolve(self, rows: dict[tuple, dict]) -> dict[tuple, int]:
+        """
+        Returns the id of each row of `rows`, which maps natural keys to attribute values, inserting the rows that
+        don't exist yet and updating those whose attributes changed.
+        """
+        ids = {}
+        missing = {}
+        for key, attributes in rows.items():
+            cached = self.cache.get(key)
+            if cached is not MISSING and cached[1] == attributes:
+                ids[key] = cached[0]
+            else:
+                missing[key] = attributes
+
+        if not missing:
+            return ids
+
+        stored = self._fetch(missing.keys())
+        new = [key for key in missing if key not in stored]
+        if new:
+            # Sorted, so concurrent inserts of the same keys wait on each other instead of deadlocking
+            self.model.objects.bulk_create(
+                [self.model(**dict(zip(self.key_fields, key)), **missing[key]) for key in sorted(new)],
+                ignore_conflicts=True,
+            )
+            stored.update(self._fetch(set(new)))
+
+        now = timezone.now()
+        changed = []
+        for key, attributes in missing.items():
+            pk, stored_attributes = stored[key]
+            if stored_attributes != attributes:
+                changed.append(self.model(id=pk, updated_at=now, **attributes))
+        if changed:
+            self.model._base_manager.bulk_update(changed, [*self.attribute_fields, "updated_at"])
+
+        resolved = {key: (stored[key][0], attributes) for key, attributes in missing.items()}
+        on_commit(lambda: self._remember(resolved))
+
+        ids.update({key: pk for key, (pk, _) in resolved.items()})
+        return ids
+
+    def _remember(self, resolved: dict[tuple, tuple[int, dict]]) -> None:
+        for key, value in resolved.items():
+            self.cache.set(key, value, ttl=settings.PLAID_DIMENSION_CACHE_TTL)
+
+    def clear(self) -> None:
+        self.cache.clear()
+
+
+merchants = DimensionTable(Merchant, ("entity_id", "name"), ("logo_url", "website"))
+categories = DimensionTable(PersonalFinanceCategory, ("primary", "detailed"), ("icon_url",))
+
+
+def get_primary_categories(category_ids) -> dict[int | None, str]:
+    """
+    Maps personal finance category ids to their primary category, None to the empty category.
+    """
+    primaries = dict(PersonalFinanceCategory._base_manager.filter(id__in=category_ids).values_list("id", "primary"))
+    return {None: "", **primaries}
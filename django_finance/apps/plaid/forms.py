@@ -0,0 +1,82 @@
+from django import forms
+from django.core.exceptions import ValidationError
+
+from django_finance.apps.plaid.models import Account, PersonalFinanceCategory
+from django_finance.apps.plaid.rollups import SERIES_PERIODS
+from django_finance.apps.plaid.transactions import decode_cursor
+
+
+class TransactionFilterForm(forms.Form):
+    """
+    Filters and position of the transaction list, limited to the accounts of the given user.
+    """
+
+    account = forms.ModelChoiceField(queryset=Account.objects.none(), required=False, empty_label="All accounts")
+    category = forms.ModelChoiceField(
+        queryset=PersonalFinanceCategory.objects.order_by("primary", "detailed"),
+        required=False,
+        empty_label="All categories",
+    )
+    pending = forms.NullBooleanField(
+        required=False,
+        widget=forms.Select(choices=[("", "All"), ("true", "Pending"), ("false", "Posted")]),
+    )
+    date_from = forms.DateField(required=False, widget=forms.DateInput(attrs={"type": "date"}))
+    date_to = forms.DateField(required=False, widget=forms.DateInput(attrs={"type": "date"}))
+    cursor = forms.CharField(required=False, widget=forms.HiddenInput)
+
+    def __init__(self, *args, user, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields["account"].queryset = Account.objects.filter(user=user)
+
+    def clean_cursor(self):
+        cursor = self.cleaned_data["cursor"]
+        if not cursor:
+            return None
+
+        try:
+            return decode_cursor(cursor)
+        except ValueError:
+            raise ValidationError("Invalid cursor.", code="invalid")
+
+    def clean(self):
+        cleaned_data = super().clean()
+        date_from, date_to = cleaned_data.get("date_from"), cleaned_data.get("date_to")
+
+        if date_from and date_to and date_from > date_to:
+            raise ValidationError("The start date must be before the end date.", code="invalid")
+
+        return cleaned_data
+
+    def get_filters(self) -> dict:
+        """
+        Returns the cleaned filters, as taken by `filter_transactions`.
+        """
+        return {name: value for name, value in self.cleaned_data.items() if name != "cursor"}
+
+
+class RollupSeriesForm(forms.Form):
+    """
+    Period and filters of a series of transaction totals, limited to the accounts of the given user.
+    """
+
+    period = forms.ChoiceField(choices=[(period, period) for period in SERIES_PERIODS], required=False)
+    account = forms.ModelChoiceField(queryset=Account.objects.none(), required=False)
+    date_from = forms.DateField(required=False)
+    date_to = forms.DateField(required=False)
+
+    def __init__(self, *args, user, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields["account"].queryset = Account.objects.filter(user=user)
+
+    def clean_period(self):
+        return self.cleaned_data["period"] or "day"
+
+    def clean(self):
+        cleaned_data = super().clean()
+        date_from, date_to = cleaned_data.get("date_from"), cleaned_data.get("date_to")
+
+        if date_from and date_to and date_from > date_to:
+            raise ValidationError("The start date must be before the end date.", code="invalid")
+
+        return cleaned_data
@@ -0,0 +1,157 @@
+import asyncio
+import logging
+import threading
+import time
+import uuid
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import connection
+
+logger = logging.getLogger(__name__)
+
+# First key of the two-key form of Postgres advisory locks, so item ids don't collide with other advisory locks.
+ADVISORY_LOCK_NAMESPACE = 0x504C4944
+
+# Deletes the lock only if it is still held with our token, so an expired lease taken over by another worker isn't
+# released by mistake.
+RELEASE_SCRIPT = """
+if redis.call("GET", KEYS[1]) == ARGV[1] then
+    return redis.call("DEL", KEYS[1])
+end
+return 0
+"""
+
+# Extends the lease only if it is still held with our token.
+RENEW_SCRIPT = """
+if redis.call("GET", KEYS[1]) == ARGV[1] then
+    return redis.call("PEXPIRE", KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+_redis = None
+_local_locks = {}
+_local_locks_lock = threading.Lock()
+
+
+def get_redis():
+    """
+    Returns the Redis client used for locks, or None when Redis isn't configured or installed.
+    """
+    global _redis
+
+    if _redis is None and settings.PLAID_LOCK_REDIS_URL:
+        try:
+            import redis
+
+            _redis = redis.Redis.from_url(settings.PLAID_LOCK_REDIS_URL)
+        except ImportError:
+            logger.warning("redis is not installed, falling back to database locks")
+
+    return _redis
+
+
+class ItemLock:
+    """
+    Lease lock making sure only one sync of an item runs at a time.
+    Uses Redis when available, since its leases expire on their own if a worker dies. Falls back to a Postgres
+    advisory lock held by the current database connection, then to an in-process lock.
+    """
+
+    def __init__(self, item_id: int, ttl: int | None = None):
+        self.item_id = item_id
+        self.ttl = ttl or settings.PLAID_SYNC_LOCK_TTL
+        self.key = f"plaid:lock:item:{item_id}"
+        self.token = uuid.uuid4().hex
+        self.backend = None
+
+    def try_acquire(self) -> bool:
+        """
+        Tries to take the lock once, without waiting.
+        """
+        client = get_redis()
+
+        if client is not None:
+            try:
+                acquired = bool(client.set(self.key, self.token, nx=True, px=self.ttl * 1000))
+                self.backend = "redis" if acquired else None
+                return acquired
+            except Exception as e:
+                logger.warning(f"Redis lock unavailable, falling back to a database or local lock: {str(e)}")
+
+        if connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT pg_try_advisory_lock(%s, %s)", [ADVISORY_LOCK_NAMESPACE, self.item_id])
+                acquired = cursor.fetchone()[0]
+            self.backend = "postgresql" if acquired else None
+            return acquired
+
+        with _local_locks_lock:
+            lock = _local_locks.setdefault(self.item_id, threading.Lock())
+        acquired = lock.acquire(blocking=False)
+        self.backend = "local" if acquired else None
+        return acquired
+
+    def acquire(self, timeout: float | None = None) -> bool:
+        """
+        Waits up to `timeout` seconds for the lock.
+        """
+        deadline = time.monotonic() + (settings.PLAID_SYNC_LOCK_TIMEOUT if timeout is None else timeout)
+
+        while not self.try_acquire():
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(settings.PLAID_SYNC_LOCK_POLL_INTERVAL)
+
+        return True
+
+    def renew(self) -> bool:
+        """
+        Extends the lease to a full `ttl` from now, returning False when it already expired and was lost.
+        Database and local locks are held until released, so there is nothing to renew.
+        """
+        if self.backend != "redis":
+            return self.backend is not None
+
+        try:
+            return bool(get_redis().eval(RENEW_SCRIPT, 1, self.key, self.token, self.ttl * 1000))
+        except Exception as e:
+            logger.warning(f"Could not renew lock {self.key}: {str(e)}")
+            return True
+
+    def release(self) -> None:
+        if self.backend == "redis":
+            try:
+                get_redis().eval(RELEASE_SCRIPT, 1, self.key, self.token)
+            except Exception as e:
+                logger.warning(f"Could not release lock {self.key}, it expires in {self.ttl}s: {str(e)}")
+
+        elif self.backend == "postgresql":
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT pg_advisory_unlock(%s, %s)", [ADVISORY_LOCK_NAMESPACE, self.item_id])
+
+        elif self.backend == "local":
+            _local_locks[self.item_id].release()
+
+        self.backend = None
+
+    async def aacquire(self, timeout: float | None = None) -> bool:
+        """
+        Asyncio variant of `acquire`, waiting on the event loop instead of blocking a thread.
+        Runs on the same thread as the database writes, which a Postgres advisory lock is tied to.
+        """
+        deadline = time.monotonic() + (settings.PLAID_SYNC_LOCK_TIMEOUT if timeout is None else timeout)
+
+        while not await sync_to_async(self.try_acquire)():
+            if time.monotonic() >= deadline:
+                return False
+            await asyncio.sleep(settings.PLAID_SYNC_LOCK_POLL_INTERVAL)
+
+        return True
+
+    async def arenew(self) -> bool:
+        return await sync_to_async(self.renew)()
+
+    async def arelease(self) -> None:
+        await sync_to_async(self.release)()
@@ -0,0 +1,28 @@
+from datetime import date
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from django_finance.apps.plaid.archive import archive_transactions, get_archive_horizon
+
+
+class Command(BaseCommand):
+    help = "Moves transactions older than the archive horizon to the archive table, in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--before",
+            type=date.fromisoformat,
+            help="Archive transactions dated before this day (YYYY-MM-DD). Defaults to the archive horizon.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=settings.PLAID_ARCHIVE_BATCH_SIZE,
+            help="Number of transactions moved per batch.",
+        )
+
+    def handle(self, *args, **options):
+        before = options["before"] or get_archive_horizon()
+        archived = archive_transactions(before, options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Archived {archived} transactions dated before {before}."))
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from django_finance.apps.plaid.archive import get_archive_horizon
+from django_finance.apps.plaid.models import ArchivedTransaction
+from django_finance.apps.plaid.partitions import ensure_partitions, is_partitioned, month_start, next_month
+
+
+class Command(BaseCommand):
+    help = "Creates the monthly partitions of the transaction archive for the months about to be archived."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--months",
+            type=int,
+            default=3,
+            help="Number of months past the current archive horizon to create partitions for.",
+        )
+
+    def handle(self, *args, **options):
+        if not is_partitioned(ArchivedTransaction):
+            self.stdout.write("The transaction archive isn't partitioned on this database.")
+            return
+
+        months = [month_start(get_archive_horizon())]
+        for _ in range(options["months"]):
+            months.append(next_month(months[-1]))
+
+        created = ensure_partitions(ArchivedTransaction, months)
+        self.stdout.write(self.style.SUCCESS(f"Created {len(created)} archive partitions."))
@@ -0,0 +1,22 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from django_finance.apps.plaid.models import WebhookEvent
+from django_finance.apps.plaid.webhooks import drain_webhook_inbox
+
+
+class Command(BaseCommand):
+    help = "Processes pending Plaid webhook events stored in the webhook inbox, in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=settings.PLAID_WEBHOOK_BATCH_SIZE,
+            help="Number of events processed per batch.",
+        )
+
+    def handle(self, *args, **options):
+        processed = drain_webhook_inbox(options["batch_size"])
+        pending = WebhookEvent.objects.filter(status=WebhookEvent.StatusChoices.PENDING).count()
+        self.stdout.write(self.style.SUCCESS(f"Processed {processed} webhook events, {pending} still pending."))
@@ -0,0 +1,24 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+from django_finance.apps.plaid.rollups import rebuild_daily_rollups
+
+
+class Command(BaseCommand):
+    help = "Recomputes the daily transaction rollups of users from their transactions."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--user", type=int, help="Only rebuild the rollups of the user with this id.")
+
+    def handle(self, *args, **options):
+        users = get_user_model().objects.all()
+
+        if options["user"] is not None:
+            users = users.filter(id=options["user"])
+
+        count = rows = 0
+        for user_id in users.values_list("id", flat=True).iterator():
+            rows += rebuild_daily_rollups(user_id)
+            count += 1
+
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {rows} daily rollups of {count} users."))
@@ -0,0 +1,24 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+from django_finance.apps.plaid.summaries import rebuild_user_finance_summary
+
+
+class Command(BaseCommand):
+    help = "Recomputes the precomputed dashboard totals of users from their accounts and transactions."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--user", type=int, help="Only rebuild the summary of the user with this id.")
+
+    def handle(self, *args, **options):
+        users = get_user_model().objects.all()
+
+        if options["user"] is not None:
+            users = users.filter(id=options["user"])
+
+        count = 0
+        for user_id in users.values_list("id", flat=True).iterator():
+            rebuild_user_finance_summary(user_id)
+            count += 1
+
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt the finance summaries of {count} users."))
@@ -0,0 +1,71 @@
+import asyncio
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from django_finance.apps.plaid.models import Item
+from django_finance.apps.plaid.sync import (
+    async_sync_items,
+    summarize_sync_results,
+    sync_items,
+)
+
+
+class Command(BaseCommand):
+    help = "Syncs accounts and transactions of Plaid items using a bounded pool of worker threads."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--user", type=int, help="Only sync the items of the user with this id.")
+        parser.add_argument(
+            "--item",
+            type=int,
+            action="append",
+            dest="items",
+            help="Only sync the item with this id. Can be given multiple times.",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=settings.PLAID_SYNC_MAX_WORKERS,
+            help="Number of items synced concurrently.",
+        )
+        parser.add_argument(
+            "--async",
+            action="store_true",
+            dest="use_asyncio",
+            help="Await the Plaid requests of all items on a single event loop instead of a thread per item.",
+        )
+
+    def handle(self, *args, **options):
+        items = Item.objects.all()
+
+        if options["user"] is not None:
+            items = items.filter(user_id=options["user"])
+
+        if options["items"]:
+            items = items.filter(id__in=options["items"])
+
+        item_ids = items.values_list("id", flat=True)
+
+        if options["use_asyncio"]:
+            results = asyncio.run(async_sync_items(list(item_ids), concurrency=options["workers"]))
+        else:
+            results = sync_items(item_ids.iterator(), max_workers=options["workers"])
+
+        for result in results:
+            line = (
+                f"Item {result.item_id}: {result.duration:.2f}s, {result.pages} pages, {result.inserted} created, "
+                f"{result.updated} updated, {result.unchanged} unchanged, {result.removed} removed"
+            )
+            if result.success:
+                self.stdout.write(line)
+            else:
+                self.stderr.write(f"{line}, failed: {result.error}")
+
+        summary = summarize_sync_results(results)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Synced {summary['items']} items ({summary['failed']} failed) in {summary['duration']:.2f}s "
+                "of total sync time."
+            )
+        )
@@ -0,0 +1,31 @@
+# Generated by Django 5.1.15 on 2026-10-18 09:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("plaid", "0003_account_transaction"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="account",
+            name="fingerprint",
+            field=models.CharField(
+                blank=True,
+                help_text="SHA-256 hash of the stored Plaid values, used to skip writes when nothing changed.",
+                max_length=64,
+            ),
+        ),
+        migrations.AddField(
+            model_name="transaction",
+            name="fingerprint",
+            field=models.CharField(
+                blank=True,
+                help_text="SHA-256 hash of the stored Plaid values, used to skip writes when nothing changed.",
+                max_length=64,
+            ),
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.1.15 on 2026-10-18 09:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("plaid", "0004_account_fingerprint_transaction_fingerprint"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="item",
+            name="sync_requested",
+            field=models.BooleanField(
+                default=False,
+                help_text="Set to `True` when updates arrive while a sync is queued or running, so one more sync follows.",
+            ),
+        ),
+        migrations.AddField(
+            model_name="item",
+            name="sync_status",
+            field=models.CharField(
+                choices=[
+                    ("IDLE", "Idle"),
+                    ("QUEUED", "Queued"),
+                    ("RUNNING", "Running"),
+                ],
+                default="IDLE",
+                help_text="Whether a transactions sync of the item is queued or running.",
+                max_length=7,
+            ),
+        ),
+        migrations.AddField(
+            model_name="item",
+            name="sync_status_updated_at",
+            field=models.DateTimeField(
+                blank=True,
+                help_text="When `sync_status` last changed. Used to recover items whose sync worker died.",
+                null=True,
+            ),
+        ),
+    ]
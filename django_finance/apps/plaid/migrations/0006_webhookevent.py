@@ -0,0 +1,102 @@
+# Generated by Django 5.1.15 on 2026-10-18 09:12
+
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("plaid", "0005_item_sync_status"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="WebhookEvent",
+            fields=[
+                ("id", models.AutoField(primary_key=True, serialize=False)),
+                (
+                    "uuid",
+                    models.UUIDField(default=uuid.uuid4, editable=False, unique=True),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "is_active",
+                    models.BooleanField(
+                        db_index=True,
+                        default=True,
+                        help_text="Used for soft deleting records.",
+                    ),
+                ),
+                (
+                    "webhook_type",
+                    models.CharField(
+                        blank=True,
+                        help_text="The `webhook_type` of the payload.",
+                        max_length=100,
+                    ),
+                ),
+                (
+                    "webhook_code",
+                    models.CharField(
+                        blank=True,
+                        help_text="The `webhook_code` of the payload.",
+                        max_length=100,
+                    ),
+                ),
+                (
+                    "plaid_item_id",
+                    models.CharField(
+                        blank=True,
+                        help_text="The Plaid item_id the webhook is about, if any.",
+                        max_length=255,
+                    ),
+                ),
+                (
+                    "payload",
+                    models.JSONField(help_text="The webhook body as sent by Plaid."),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("PENDING", "Pending"),
+                            ("PROCESSED", "Processed"),
+                            ("FAILED", "Failed"),
+                        ],
+                        default="PENDING",
+                        help_text="Whether the event is waiting to be processed, was processed, or failed too many times.",
+                        max_length=9,
+                    ),
+                ),
+                (
+                    "attempts",
+                    models.PositiveSmallIntegerField(
+                        default=0, help_text="Number of failed processing attempts."
+                    ),
+                ),
+                (
+                    "error",
+                    models.TextField(
+                        blank=True,
+                        help_text="The error of the last failed processing attempt.",
+                    ),
+                ),
+                (
+                    "processed_at",
+                    models.DateTimeField(
+                        blank=True, help_text="When the event was processed.", null=True
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ("id",),
+                "indexes": [
+                    models.Index(
+                        fields=["status", "id"], name="plaid_webhook_status_idx"
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,84 @@
+# Generated by Django 5.1.15 on 2026-10-18 09:14
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("plaid", "0006_webhookevent"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="UserFinanceSummary",
+            fields=[
+                ("id", models.AutoField(primary_key=True, serialize=False)),
+                (
+                    "uuid",
+                    models.UUIDField(default=uuid.uuid4, editable=False, unique=True),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "is_active",
+                    models.BooleanField(
+                        db_index=True,
+                        default=True,
+                        help_text="Used for soft deleting records.",
+                    ),
+                ),
+                (
+                    "net_worth",
+                    models.DecimalField(
+                        blank=True,
+                        decimal_places=30,
+                        help_text="Sum of the current balances of all the user's accounts.",
+                        max_digits=65,
+                        null=True,
+                    ),
+                ),
+                (
+                    "total_income",
+                    models.DecimalField(
+                        decimal_places=30,
+                        default=0,
+                        help_text="Sum of the positive transaction amounts.",
+                        max_digits=65,
+                    ),
+                ),
+                (
+                    "total_expense",
+                    models.DecimalField(
+                        decimal_places=30,
+                        default=0,
+                        help_text="Sum of the negative transaction amounts.",
+                        max_digits=65,
+                    ),
+                ),
+                (
+                    "category_totals",
+                    models.JSONField(
+                        blank=True,
+                        default=dict,
+                        help_text='Total amount and number of transactions per primary personal finance category, as {"CATEGORY": {"total": "<decimal>", "count": <int>}}.',
+                    ),
+                ),
+                (
+                    "user",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="finance_summary",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "abstract": False,
+            },
+        ),
+    ]
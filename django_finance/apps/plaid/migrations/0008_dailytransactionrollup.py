@@ -0,0 +1,117 @@
+# Generated by Django 5.1.15 on 2026-10-18 09:21
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("plaid", "0007_userfinancesummary"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DailyTransactionRollup",
+            fields=[
+                ("id", models.AutoField(primary_key=True, serialize=False)),
+                (
+                    "uuid",
+                    models.UUIDField(default=uuid.uuid4, editable=False, unique=True),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "is_active",
+                    models.BooleanField(
+                        db_index=True,
+                        default=True,
+                        help_text="Used for soft deleting records.",
+                    ),
+                ),
+                (
+                    "date",
+                    models.DateField(help_text="The day the transactions are dated."),
+                ),
+                (
+                    "primary_personal_finance_category",
+                    models.CharField(
+                        blank=True,
+                        help_text="The primary personal finance category of the transactions.",
+                        max_length=200,
+                    ),
+                ),
+                (
+                    "total",
+                    models.DecimalField(
+                        decimal_places=30,
+                        default=0,
+                        help_text="Sum of the transaction amounts.",
+                        max_digits=65,
+                    ),
+                ),
+                (
+                    "income",
+                    models.DecimalField(
+                        decimal_places=30,
+                        default=0,
+                        help_text="Sum of the positive transaction amounts.",
+                        max_digits=65,
+                    ),
+                ),
+                (
+                    "expense",
+                    models.DecimalField(
+                        decimal_places=30,
+                        default=0,
+                        help_text="Sum of the negative transaction amounts.",
+                        max_digits=65,
+                    ),
+                ),
+                (
+                    "transaction_count",
+                    models.PositiveIntegerField(
+                        default=0, help_text="Number of transactions."
+                    ),
+                ),
+                (
+                    "account",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="daily_rollups",
+                        to="plaid.account",
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="daily_rollups",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ("date",),
+                "indexes": [
+                    models.Index(
+                        fields=["user", "date"], name="plaid_daily_rollup_user_idx"
+                    )
+                ],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=(
+                            "user",
+                            "account",
+                            "date",
+                            "primary_personal_finance_category",
+                        ),
+                        name="plaid_daily_rollup_unique",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.1.15 on 2026-10-18 09:23
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("plaid", "0008_dailytransactionrollup"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="transaction",
+            name="account",
+            field=models.ForeignKey(
+                db_index=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="transactions",
+                to="plaid.account",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="transaction",
+            index=models.Index(
+                fields=["account", "is_active", "-date"],
+                name="plaid_txn_account_date_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="transaction",
+            index=models.Index(
+                fields=["account", "primary_personal_finance_category"],
+                name="plaid_txn_account_cat_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 5.1.15 on 2026-10-18 09:24
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("plaid", "0009_transaction_indexes"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="transaction",
+            name="plaid_txn_account_cat_idx",
+        ),
+        migrations.AddField(
+            model_name="account",
+            name="user",
+            field=models.ForeignKey(
+                help_text="The owner of the item, stored here so user-scoped queries don't join through the item.",
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="accounts",
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        migrations.AddField(
+            model_name="transaction",
+            name="user",
+            field=models.ForeignKey(
+                db_index=False,
+                help_text="The owner of the account, stored here so user-scoped queries don't join through the item.",
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="transactions",
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="transaction",
+            index=models.Index(
+                fields=["user", "is_active", "-date"], name="plaid_txn_user_date_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="transaction",
+            index=models.Index(
+                fields=["user", "primary_personal_finance_category"],
+                name="plaid_txn_user_cat_idx",
+            ),
+        ),
+    ]
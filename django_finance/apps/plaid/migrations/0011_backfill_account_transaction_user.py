@@ -0,0 +1,33 @@
+from django.db import migrations
+from django.db.models import Max, OuterRef, Subquery
+
+BATCH_SIZE = 10000
+
+
+def backfill_user(apps, schema_editor):
+    Item = apps.get_model("plaid", "Item")
+    Account = apps.get_model("plaid", "Account")
+    Transaction = apps.get_model("plaid", "Transaction")
+
+    Account.objects.filter(user__isnull=True).update(
+        user_id=Subquery(Item.objects.filter(id=OuterRef("item_id")).values("user_id")[:1])
+    )
+
+    # Transactions are updated in id ranges, each committed on its own, so large tables aren't locked at once
+    last_id = Transaction.objects.aggregate(Max("id"))["id__max"] or 0
+    for start in range(0, last_id, BATCH_SIZE):
+        Transaction.objects.filter(id__gt=start, id__lte=start + BATCH_SIZE, user__isnull=True).update(
+            user_id=Subquery(Account.objects.filter(id=OuterRef("account_id")).values("user_id")[:1])
+        )
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ("plaid", "0010_account_transaction_user"),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_user, migrations.RunPython.noop),
+    ]
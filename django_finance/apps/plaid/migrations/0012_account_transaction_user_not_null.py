@@ -0,0 +1,37 @@
+# Generated by Django 5.1.15 on 2026-10-18 09:30
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("plaid", "0011_backfill_account_transaction_user"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="account",
+            name="user",
+            field=models.ForeignKey(
+                help_text="The owner of the item, stored here so user-scoped queries don't join through the item.",
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="accounts",
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        migrations.AlterField(
+            model_name="transaction",
+            name="user",
+            field=models.ForeignKey(
+                db_index=False,
+                help_text="The owner of the account, stored here so user-scoped queries don't join through the item.",
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="transactions",
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+    ]
@@ -0,0 +1,118 @@
+# Generated by Django 5.1.15 on 2026-10-18 09:29
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+from django_finance.apps.plaid.partitions import create_partitioned_model
+
+
+def create_archive_table(apps, schema_editor):
+    create_partitioned_model(schema_editor, apps.get_model("plaid", "ArchivedTransaction"), "date")
+
+
+def delete_archive_table(apps, schema_editor):
+    schema_editor.delete_model(apps.get_model("plaid", "ArchivedTransaction"))
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("plaid", "0012_account_transaction_user_not_null"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        # The table is created by create_archive_table, partitioned on Postgres
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.CreateModel(
+                    name="ArchivedTransaction",
+                    fields=[
+                        (
+                            "id",
+                            models.BigAutoField(
+                                auto_created=True,
+                                primary_key=True,
+                                serialize=False,
+                                verbose_name="ID",
+                            ),
+                        ),
+                        (
+                            "transaction_id",
+                            models.CharField(help_text="The ID of the transaction.", max_length=255),
+                        ),
+                        (
+                            "date",
+                            models.DateField(help_text="The date that the transaction posted."),
+                        ),
+                        (
+                            "amount",
+                            models.DecimalField(
+                                blank=True,
+                                decimal_places=30,
+                                help_text="The settled value of the transaction.",
+                                max_digits=65,
+                                null=True,
+                            ),
+                        ),
+                        (
+                            "iso_currency_code",
+                            models.CharField(
+                                blank=True,
+                                help_text="The ISO-4217 currency code.",
+                                max_length=100,
+                            ),
+                        ),
+                        (
+                            "name",
+                            models.TextField(
+                                blank=True,
+                                help_text="The merchant name or transaction description.",
+                            ),
+                        ),
+                        (
+                            "merchant_name",
+                            models.TextField(blank=True, help_text="The merchant name, as enriched by Plaid."),
+                        ),
+                        (
+                            "primary_personal_finance_category",
+                            models.TextField(
+                                blank=True,
+                                help_text="A high level category that communicates the broad category of the transaction.",
+                            ),
+                        ),
+                        ("archived_at", models.DateTimeField(auto_now_add=True)),
+                        (
+                            "account",
+                            models.ForeignKey(
+                                db_index=False,
+                                on_delete=django.db.models.deletion.CASCADE,
+                                related_name="archived_transactions",
+                                to="plaid.account",
+                            ),
+                        ),
+                        (
+                            "user",
+                            models.ForeignKey(
+                                db_index=False,
+                                on_delete=django.db.models.deletion.CASCADE,
+                                related_name="archived_transactions",
+                                to=settings.AUTH_USER_MODEL,
+                            ),
+                        ),
+                    ],
+                    options={
+                        "ordering": ("-date",),
+                        "indexes": [
+                            models.Index(fields=["user", "-date"], name="plaid_archive_user_date_idx"),
+                            models.Index(
+                                fields=["account", "-date"],
+                                name="plaid_archive_account_date_idx",
+                            ),
+                        ],
+                    },
+                ),
+            ],
+        ),
+        migrations.RunPython(create_archive_table, delete_archive_table),
+    ]
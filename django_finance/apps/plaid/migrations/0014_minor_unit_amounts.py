@@ -0,0 +1,142 @@
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models import F, Value
+
+import django_finance.apps.common.fields
+from django_finance.apps.common.fields import get_currency_exponent
+
+AMOUNT_FIELDS = [
+    ("account", "available_balance"),
+    ("account", "current_balance"),
+    ("account", "limit"),
+    ("transaction", "amount"),
+    ("archivedtransaction", "amount"),
+]
+
+BATCH_SIZE = 10000
+
+
+def currency_exponents(model):
+    """
+    Yields the filter and minor unit exponent of each currency found in the table of `model`.
+    """
+    for iso_currency_code, unofficial_currency_code in (
+        model.objects.values_list("iso_currency_code", "unofficial_currency_code").order_by().distinct()
+    ):
+        currency = {"iso_currency_code": iso_currency_code, "unofficial_currency_code": unofficial_currency_code}
+        yield currency, get_currency_exponent(iso_currency_code, unofficial_currency_code)
+
+
+def to_minor_units(apps, schema_editor):
+    for model_name, field in AMOUNT_FIELDS:
+        model = apps.get_model("plaid", model_name)
+        rows = (
+            model.objects.exclude(**{f"{field}__isnull": True})
+            .order_by("id")
+            .values_list("id", field, "iso_currency_code", "unofficial_currency_code")
+        )
+        last_id = 0
+
+        # Converted in Python rather than with SQL ROUND, which rounds half away from zero, so existing amounts are
+        # rounded half to even like the ones stored by MinorUnitsField from now on
+        while batch := list(rows.filter(id__gt=last_id)[:BATCH_SIZE]):
+            model.objects.bulk_update(
+                [
+                    model(
+                        id=pk,
+                        **{
+                            f"{field}_minor": django_finance.apps.common.fields.to_minor_units(
+                                amount, get_currency_exponent(iso_currency_code, unofficial_currency_code)
+                            )
+                        },
+                    )
+                    for pk, amount, iso_currency_code, unofficial_currency_code in batch
+                ],
+                [f"{field}_minor"],
+                batch_size=1000,
+            )
+            last_id = batch[-1][0]
+
+
+def from_minor_units(apps, schema_editor):
+    for model_name, field in AMOUNT_FIELDS:
+        model = apps.get_model("plaid", model_name)
+
+        for currency, exponent in currency_exponents(model):
+            scale = Value(Decimal(1).scaleb(-exponent), output_field=models.DecimalField(max_digits=65, decimal_places=30))
+            model.objects.filter(**currency).update(**{field: F(f"{field}_minor") * scale})
+
+
+def minor_units_field(help_text):
+    return django_finance.apps.common.fields.MinorUnitsField(
+        blank=True,
+        null=True,
+        currency_fields=("iso_currency_code", "unofficial_currency_code"),
+        help_text=help_text,
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("plaid", "0013_archivedtransaction"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="archivedtransaction",
+            name="unofficial_currency_code",
+            field=models.CharField(
+                blank=True,
+                default="",
+                help_text="The unofficial currency code, for currencies without an ISO code.",
+                max_length=100,
+            ),
+            preserve_default=False,
+        ),
+        *[
+            migrations.AddField(
+                model_name=model_name,
+                name=f"{field}_minor",
+                field=models.BigIntegerField(blank=True, null=True),
+            )
+            for model_name, field in AMOUNT_FIELDS
+        ],
+        migrations.RunPython(to_minor_units, from_minor_units),
+        *[migrations.RemoveField(model_name=model_name, name=field) for model_name, field in AMOUNT_FIELDS],
+        *[
+            migrations.RenameField(model_name=model_name, old_name=f"{field}_minor", new_name=field)
+            for model_name, field in AMOUNT_FIELDS
+        ],
+        migrations.AlterField(
+            model_name="account",
+            name="available_balance",
+            field=minor_units_field(
+                "The amount of funds available to be withdrawn from the account, as determined by the financial "
+                "institution."
+            ),
+        ),
+        migrations.AlterField(
+            model_name="account",
+            name="current_balance",
+            field=minor_units_field("The total amount of funds in or owed by the account."),
+        ),
+        migrations.AlterField(
+            model_name="account",
+            name="limit",
+            field=minor_units_field("For credit-type accounts, this represents the credit limit."),
+        ),
+        migrations.AlterField(
+            model_name="transaction",
+            name="amount",
+            field=minor_units_field(
+                "The settled value of the transaction, denominated in the transactions's currency, as stated in "
+                "iso_currency_code or unofficial_currency_code."
+            ),
+        ),
+        migrations.AlterField(
+            model_name="archivedtransaction",
+            name="amount",
+            field=minor_units_field("The settled value of the transaction."),
+        ),
+    ]
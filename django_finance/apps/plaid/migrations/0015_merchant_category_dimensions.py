@@ -0,0 +1,170 @@
+# Generated by Django 5.1.15 on 2026-10-18 09:38
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("plaid", "0014_minor_unit_amounts"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Merchant",
+            fields=[
+                ("id", models.AutoField(primary_key=True, serialize=False)),
+                (
+                    "uuid",
+                    models.UUIDField(default=uuid.uuid4, editable=False, unique=True),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "is_active",
+                    models.BooleanField(
+                        db_index=True,
+                        default=True,
+                        help_text="Used for soft deleting records.",
+                    ),
+                ),
+                (
+                    "entity_id",
+                    models.TextField(
+                        blank=True,
+                        help_text="A unique, stable, Plaid-generated ID that maps to the merchant.",
+                    ),
+                ),
+                ("name", models.TextField(blank=True, help_text="The merchant name.")),
+                (
+                    "logo_url",
+                    models.URLField(
+                        blank=True,
+                        help_text="The URL of a logo associated with the merchant. The logo will always be 100×100 pixel PNG file.",
+                        max_length=2000,
+                        null=True,
+                    ),
+                ),
+                (
+                    "website",
+                    models.TextField(
+                        blank=True,
+                        help_text="The website associated with the merchant, if available.",
+                    ),
+                ),
+            ],
+        ),
+        migrations.CreateModel(
+            name="PersonalFinanceCategory",
+            fields=[
+                ("id", models.AutoField(primary_key=True, serialize=False)),
+                (
+                    "uuid",
+                    models.UUIDField(default=uuid.uuid4, editable=False, unique=True),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "is_active",
+                    models.BooleanField(
+                        db_index=True,
+                        default=True,
+                        help_text="Used for soft deleting records.",
+                    ),
+                ),
+                (
+                    "primary",
+                    models.CharField(
+                        help_text="A high level category that communicates the broad category of the transaction.",
+                        max_length=200,
+                    ),
+                ),
+                (
+                    "detailed",
+                    models.CharField(
+                        blank=True,
+                        help_text="A granular category conveying the transaction's intent.",
+                        max_length=200,
+                    ),
+                ),
+                (
+                    "icon_url",
+                    models.URLField(
+                        blank=True,
+                        help_text="The URL of an icon associated with the primary personal finance category. The icon will always be 100×100 pixel PNG file.",
+                        max_length=2000,
+                        null=True,
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name_plural": "personal finance categories",
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="merchant",
+            constraint=models.UniqueConstraint(
+                fields=("entity_id", "name"), name="plaid_merchant_unique"
+            ),
+        ),
+        migrations.AddField(
+            model_name="archivedtransaction",
+            name="merchant",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="archived_transactions",
+                to="plaid.merchant",
+            ),
+        ),
+        migrations.AddField(
+            model_name="transaction",
+            name="merchant",
+            field=models.ForeignKey(
+                blank=True,
+                help_text="The merchant, as enriched by Plaid from the name field.",
+                null=True,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="transactions",
+                to="plaid.merchant",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="personalfinancecategory",
+            constraint=models.UniqueConstraint(
+                fields=("primary", "detailed"), name="plaid_category_unique"
+            ),
+        ),
+        migrations.AddField(
+            model_name="archivedtransaction",
+            name="category",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="archived_transactions",
+                to="plaid.personalfinancecategory",
+            ),
+        ),
+        migrations.AddField(
+            model_name="transaction",
+            name="category",
+            field=models.ForeignKey(
+                blank=True,
+                help_text="The personal finance category of the transaction.",
+                null=True,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="transactions",
+                to="plaid.personalfinancecategory",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="transaction",
+            index=models.Index(
+                fields=["user", "category", "-date"], name="plaid_txn_user_category_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,154 @@
+from django.db import migrations
+from django.db.models import Max, OuterRef, Q, Subquery
+
+BATCH_SIZE = 10000
+
+
+def batches(model):
+    """
+    Yields the id ranges of `model`, each updated and committed on its own, so large tables aren't locked at once.
+    """
+    last_id = model.objects.aggregate(Max("id"))["id__max"] or 0
+    for start in range(0, last_id, BATCH_SIZE):
+        yield {"id__gt": start, "id__lte": start + BATCH_SIZE}
+
+
+def populate_dimensions(apps, schema_editor):
+    Merchant = apps.get_model("plaid", "Merchant")
+    PersonalFinanceCategory = apps.get_model("plaid", "PersonalFinanceCategory")
+    Transaction = apps.get_model("plaid", "Transaction")
+    ArchivedTransaction = apps.get_model("plaid", "ArchivedTransaction")
+
+    has_merchant = ~Q(merchant_entity_id="", merchant_name="")
+    has_category = ~Q(primary_personal_finance_category="", detailed_personal_finance_category="")
+
+    Merchant.objects.bulk_create(
+        [
+            Merchant(
+                entity_id=row["merchant_entity_id"],
+                name=row["merchant_name"],
+                logo_url=row["logo"],
+                website=row["site"],
+            )
+            for row in Transaction.objects.filter(has_merchant)
+            .values("merchant_entity_id", "merchant_name")
+            .order_by()
+            .annotate(logo=Max("logo_url"), site=Max("website"))
+        ],
+        batch_size=1000,
+        ignore_conflicts=True,
+    )
+    PersonalFinanceCategory.objects.bulk_create(
+        [
+            PersonalFinanceCategory(
+                primary=row["primary_personal_finance_category"],
+                detailed=row["detailed_personal_finance_category"],
+                icon_url=row["icon"],
+            )
+            for row in Transaction.objects.filter(has_category)
+            .values("primary_personal_finance_category", "detailed_personal_finance_category")
+            .order_by()
+            .annotate(icon=Max("personal_finance_category_icon_url"))
+        ],
+        batch_size=1000,
+        ignore_conflicts=True,
+    )
+
+    # The archive only kept the merchant name and the primary category
+    Merchant.objects.bulk_create(
+        [
+            Merchant(name=name)
+            for name in ArchivedTransaction.objects.exclude(merchant_name="")
+            .values_list("merchant_name", flat=True)
+            .order_by()
+            .distinct()
+        ],
+        batch_size=1000,
+        ignore_conflicts=True,
+    )
+    PersonalFinanceCategory.objects.bulk_create(
+        [
+            PersonalFinanceCategory(primary=primary)
+            for primary in ArchivedTransaction.objects.exclude(primary_personal_finance_category="")
+            .values_list("primary_personal_finance_category", flat=True)
+            .order_by()
+            .distinct()
+        ],
+        batch_size=1000,
+        ignore_conflicts=True,
+    )
+
+    for batch in batches(Transaction):
+        Transaction.objects.filter(has_merchant, **batch).update(
+            merchant_id=Subquery(
+                Merchant.objects.filter(
+                    entity_id=OuterRef("merchant_entity_id"), name=OuterRef("merchant_name")
+                ).values("id")[:1]
+            )
+        )
+        Transaction.objects.filter(has_category, **batch).update(
+            category_id=Subquery(
+                PersonalFinanceCategory.objects.filter(
+                    primary=OuterRef("primary_personal_finance_category"),
+                    detailed=OuterRef("detailed_personal_finance_category"),
+                ).values("id")[:1]
+            )
+        )
+
+    for batch in batches(ArchivedTransaction):
+        ArchivedTransaction.objects.filter(**batch).exclude(merchant_name="").update(
+            merchant_id=Subquery(
+                Merchant.objects.filter(entity_id="", name=OuterRef("merchant_name")).values("id")[:1]
+            )
+        )
+        ArchivedTransaction.objects.filter(**batch).exclude(primary_personal_finance_category="").update(
+            category_id=Subquery(
+                PersonalFinanceCategory.objects.filter(
+                    primary=OuterRef("primary_personal_finance_category"), detailed=""
+                ).values("id")[:1]
+            )
+        )
+
+
+def restore_columns(apps, schema_editor):
+    Merchant = apps.get_model("plaid", "Merchant")
+    PersonalFinanceCategory = apps.get_model("plaid", "PersonalFinanceCategory")
+    Transaction = apps.get_model("plaid", "Transaction")
+    ArchivedTransaction = apps.get_model("plaid", "ArchivedTransaction")
+
+    def merchant(field):
+        return Subquery(Merchant.objects.filter(id=OuterRef("merchant_id")).values(field)[:1])
+
+    def category(field):
+        return Subquery(PersonalFinanceCategory.objects.filter(id=OuterRef("category_id")).values(field)[:1])
+
+    for batch in batches(Transaction):
+        Transaction.objects.filter(merchant__isnull=False, **batch).update(
+            merchant_entity_id=merchant("entity_id"),
+            merchant_name=merchant("name"),
+            logo_url=merchant("logo_url"),
+            website=merchant("website"),
+        )
+        Transaction.objects.filter(category__isnull=False, **batch).update(
+            primary_personal_finance_category=category("primary"),
+            detailed_personal_finance_category=category("detailed"),
+            personal_finance_category_icon_url=category("icon_url"),
+        )
+
+    for batch in batches(ArchivedTransaction):
+        ArchivedTransaction.objects.filter(merchant__isnull=False, **batch).update(merchant_name=merchant("name"))
+        ArchivedTransaction.objects.filter(category__isnull=False, **batch).update(
+            primary_personal_finance_category=category("primary")
+        )
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ("plaid", "0015_merchant_category_dimensions"),
+    ]
+
+    operations = [
+        migrations.RunPython(populate_dimensions, restore_columns),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 5.1.15 on 2026-10-18 09:38
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("plaid", "0016_backfill_merchant_category"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="transaction",
+            name="plaid_txn_user_cat_idx",
+        ),
+        migrations.RemoveField(
+            model_name="archivedtransaction",
+            name="merchant_name",
+        ),
+        migrations.RemoveField(
+            model_name="archivedtransaction",
+            name="primary_personal_finance_category",
+        ),
+        migrations.RemoveField(
+            model_name="transaction",
+            name="detailed_personal_finance_category",
+        ),
+        migrations.RemoveField(
+            model_name="transaction",
+            name="logo_url",
+        ),
+        migrations.RemoveField(
+            model_name="transaction",
+            name="merchant_entity_id",
+        ),
+        migrations.RemoveField(
+            model_name="transaction",
+            name="merchant_name",
+        ),
+        migrations.RemoveField(
+            model_name="transaction",
+            name="personal_finance_category_icon_url",
+        ),
+        migrations.RemoveField(
+            model_name="transaction",
+            name="primary_personal_finance_category",
+        ),
+        migrations.RemoveField(
+            model_name="transaction",
+            name="website",
+        ),
+    ]
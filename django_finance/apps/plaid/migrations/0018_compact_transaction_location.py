@@ -0,0 +1,22 @@
+# Generated by Django 5.1.15 on 2026-10-18 09:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("plaid", "0017_remove_transaction_merchant_category_fields"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="transaction",
+            name="location",
+            field=models.JSONField(
+                blank=True,
+                help_text="A representation of where a transaction took place, without its null keys. Null when no key is known.",
+                null=True,
+            ),
+        ),
+    ]
@@ -0,0 +1,53 @@
+from django.db import migrations
+from django.db.models import Max
+
+BATCH_SIZE = 10000
+
+# Keys of a Plaid location, restored as nulls when migrating back
+LOCATION_KEYS = ["address", "city", "region", "postal_code", "country", "lat", "lon", "store_number"]
+
+
+def compact(location):
+    location = {key: value for key, value in (location or {}).items() if value is not None}
+    return location or None
+
+
+def expand(location):
+    return {**dict.fromkeys(LOCATION_KEYS), **(location or {})}
+
+
+def rewrite_locations(apps, convert):
+    Transaction = apps.get_model("plaid", "Transaction")
+
+    # Each id range is read and written on its own, so large tables aren't locked at once
+    last_id = Transaction.objects.aggregate(Max("id"))["id__max"] or 0
+    for start in range(0, last_id, BATCH_SIZE):
+        changed = []
+        for id, location in Transaction.objects.filter(id__gt=start, id__lte=start + BATCH_SIZE).values_list(
+            "id", "location"
+        ):
+            converted = convert(location)
+            if converted != location:
+                changed.append(Transaction(id=id, location=converted))
+
+        Transaction.objects.bulk_update(changed, ["location"], batch_size=1000)
+
+
+def compact_locations(apps, schema_editor):
+    rewrite_locations(apps, compact)
+
+
+def expand_locations(apps, schema_editor):
+    rewrite_locations(apps, expand)
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ("plaid", "0018_compact_transaction_location"),
+    ]
+
+    operations = [
+        migrations.RunPython(compact_locations, expand_locations),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.1.15 on 2026-10-18 09:43
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("plaid", "0019_compact_existing_locations"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="transaction",
+            name="plaid_txn_account_date_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="transaction",
+            name="plaid_txn_user_date_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="transaction",
+            name="plaid_txn_user_category_idx",
+        ),
+        migrations.AddIndex(
+            model_name="transaction",
+            index=models.Index(
+                fields=["user", "category", "-date", "-id"],
+                name="plaid_txn_user_category_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="transaction",
+            index=models.Index(
+                fields=["user", "is_active", "-date", "-id"],
+                name="plaid_txn_user_date_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="transaction",
+            index=models.Index(
+                fields=["account", "is_active", "-date", "-id"],
+                name="plaid_txn_account_date_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,89 @@
+from decimal import Decimal
+
+from django.db import migrations
+from django.db.models import Count, Q, Sum
+from django.db.transaction import atomic
+
+from django_finance.apps.common.fields import get_currency_exponent
+
+CURRENCY_FIELDS = ("iso_currency_code", "unofficial_currency_code")
+
+
+def aggregate_user(models, user_id):
+    """
+    Returns the daily totals of a user's live and archived transactions per account, day and primary category.
+    """
+    groups = {}
+
+    for model, filters in models:
+        rows = (
+            model.objects.filter(user_id=user_id, **filters)
+            .values("account_id", "date", "category__primary", *CURRENCY_FIELDS)
+            .order_by()
+            .annotate(
+                total=Sum("amount"),
+                income=Sum("amount", filter=Q(amount__gt=0)),
+                expense=Sum("amount", filter=Q(amount__lt=0)),
+                count=Count("id"),
+            )
+        )
+
+        for row in rows:
+            exponent = get_currency_exponent(*(row[name] for name in CURRENCY_FIELDS))
+            key = (row["account_id"], row["date"], row["category__primary"] or "")
+            totals = groups.setdefault(key, [Decimal(0), Decimal(0), Decimal(0), 0])
+
+            for i, name in enumerate(["total", "income", "expense"]):
+                if row[name] is not None:
+                    totals[i] += Decimal(int(row[name])).scaleb(-exponent)
+            totals[3] += row["count"]
+
+    return groups
+
+
+def backfill_rollups(apps, schema_editor):
+    DailyTransactionRollup = apps.get_model("plaid", "DailyTransactionRollup")
+    Transaction = apps.get_model("plaid", "Transaction")
+    ArchivedTransaction = apps.get_model("plaid", "ArchivedTransaction")
+    models = [(Transaction, {"is_active": True}), (ArchivedTransaction, {})]
+
+    user_ids = set(Transaction.objects.values_list("user_id", flat=True).order_by().distinct())
+    user_ids |= set(ArchivedTransaction.objects.values_list("user_id", flat=True).order_by().distinct())
+
+    # Rows of users without transactions can only be left over from deleted ones
+    DailyTransactionRollup.objects.exclude(user_id__in=user_ids).delete()
+
+    # One user at a time, each committed on its own, so large tables aren't locked at once. Rows written by syncs
+    # before the backfill only hold the changes since the rollups were added, so they are replaced.
+    for user_id in sorted(user_ids):
+        with atomic():
+            groups = aggregate_user(models, user_id)
+            DailyTransactionRollup.objects.filter(user_id=user_id).delete()
+            DailyTransactionRollup.objects.bulk_create(
+                [
+                    DailyTransactionRollup(
+                        user_id=user_id,
+                        account_id=account_id,
+                        date=day,
+                        primary_personal_finance_category=category,
+                        total=total,
+                        income=income,
+                        expense=expense,
+                        transaction_count=count,
+                    )
+                    for (account_id, day, category), (total, income, expense, count) in groups.items()
+                ],
+                batch_size=1000,
+            )
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ("plaid", "0020_transaction_list_indexes"),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
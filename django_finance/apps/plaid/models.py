@@ -2,6 +2,7 @@ from django.conf import settings
 from django.db import models
 from django.utils.translation import gettext_lazy as _
 
+from django_finance.apps.common.fields import MinorUnitsField
 from django_finance.apps.common.models import BaseModel
 
 
@@ -16,6 +17,11 @@ class Item(BaseModel):
         GOOD = "GOOD", _("Good")
         BAD = "BAD", _("Bad")
 
+    class SyncStatusChoices(models.TextChoices):
+        IDLE = "IDLE", _("Idle")
+        QUEUED = "QUEUED", _("Queued")
+        RUNNING = "RUNNING", _("Running")
+
     user = models.ForeignKey(settings.AUTH_USER_MODEL, related_name="items", on_delete=models.CASCADE)
     access_token = models.CharField(
         unique=True,
@@ -50,6 +56,21 @@ class Item(BaseModel):
             "Cursor used for fetching any future transaction updates after the latest update provided in a transaction response."
         ),
     )
+    sync_status = models.CharField(
+        max_length=7,
+        choices=SyncStatusChoices,
+        default=SyncStatusChoices.IDLE,
+        help_text=_("Whether a transactions sync of the item is queued or running."),
+    )
+    sync_requested = models.BooleanField(
+        default=False,
+        help_text=_("Set to `True` when updates arrive while a sync is queued or running, so one more sync follows."),
+    )
+    sync_status_updated_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text=_("When `sync_status` last changed. Used to recover items whose sync worker died."),
+    )
 
     class Meta:
         ordering = ("-created_at",)
@@ -110,6 +131,12 @@ class Account(BaseModel):
         OTHER = "other", _("Other")
 
     item = models.ForeignKey(Item, related_name="accounts", on_delete=models.CASCADE)
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        related_name="accounts",
+        on_delete=models.CASCADE,
+        help_text=_("The owner of the item, stored here so user-scoped queries don't join through the item."),
+    )
     account_id = models.CharField(
         unique=True,
         max_length=255,
@@ -128,25 +155,19 @@ class Account(BaseModel):
         blank=True,
         help_text=_("The official name of the account as given by the financial institution."),
     )
-    available_balance = models.DecimalField(
-        max_digits=65,
-        decimal_places=30,
+    available_balance = MinorUnitsField(
         blank=True,
         null=True,
         help_text=_(
             "The amount of funds available to be withdrawn from the account, as determined by the financial institution."
         ),
     )
-    current_balance = models.DecimalField(
-        max_digits=65,
-        decimal_places=30,
+    current_balance = MinorUnitsField(
         blank=True,
         null=True,
         help_text=_("The total amount of funds in or owed by the account."),
     )
-    limit = models.DecimalField(
-        max_digits=65,
-        decimal_places=30,
+    limit = MinorUnitsField(
         blank=True,
         null=True,
         help_text=_("For credit-type accounts, this represents the credit limit."),
@@ -167,11 +188,73 @@ class Account(BaseModel):
         help_text=_("Account types. Possible values: investment, credit, depository, loan, brokerage, other"),
     )
     account_subtype = models.CharField(max_length=250, blank=True, help_text=_("Account subtype"))
+    fingerprint = models.CharField(
+        max_length=64,
+        blank=True,
+        help_text=_("SHA-256 hash of the stored Plaid values, used to skip writes when nothing changed."),
+    )
 
     def __str__(self):
         return f"Account {self.account_id}, Item {self.item}"
 
 
+class Merchant(BaseModel):
+    """
+    Merchant as enriched by Plaid, stored once and referenced by all of its transactions.
+    """
+
+    entity_id = models.TextField(
+        blank=True,
+        help_text=_("A unique, stable, Plaid-generated ID that maps to the merchant."),
+    )
+    name = models.TextField(blank=True, help_text=_("The merchant name."))
+    logo_url = models.URLField(
+        max_length=2000,
+        blank=True,
+        null=True,
+        help_text=_("The URL of a logo associated with the merchant. The logo will always be 100×100 pixel PNG file."),
+    )
+    website = models.TextField(blank=True, help_text=_("The website associated with the merchant, if available."))
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=["entity_id", "name"], name="plaid_merchant_unique")]
+
+    def __str__(self):
+        return self.name or self.entity_id
+
+
+class PersonalFinanceCategory(BaseModel):
+    """
+    Plaid personal finance category, stored once and referenced by all of its transactions.
+    https://plaid.com/documents/transactions-personal-finance-category-taxonomy.csv
+    """
+
+    primary = models.CharField(
+        max_length=200,
+        help_text=_("A high level category that communicates the broad category of the transaction."),
+    )
+    detailed = models.CharField(
+        max_length=200,
+        blank=True,
+        help_text=_("A granular category conveying the transaction's intent."),
+    )
+    icon_url = models.URLField(
+        max_length=2000,
+        blank=True,
+        null=True,
+        help_text=_(
+            "The URL of an icon associated with the primary personal finance category. The icon will always be 100×100 pixel PNG file."
+        ),
+    )
+
+    class Meta:
+        verbose_name_plural = "personal finance categories"
+        constraints = [models.UniqueConstraint(fields=["primary", "detailed"], name="plaid_category_unique")]
+
+    def __str__(self):
+        return self.detailed or self.primary
+
+
 class Transaction(BaseModel):
     """
     Used to store the transactions associated with each account.
@@ -184,7 +267,15 @@ class Transaction(BaseModel):
         HIGH = "high", _("High")
         VERY_HIGH = "very_high", _("Very High")
 
-    account = models.ForeignKey(Account, related_name="transactions", on_delete=models.CASCADE)
+    # Indexed by the composite indexes below
+    account = models.ForeignKey(Account, related_name="transactions", on_delete=models.CASCADE, db_index=False)
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        related_name="transactions",
+        on_delete=models.CASCADE,
+        db_index=False,
+        help_text=_("The owner of the account, stored here so user-scoped queries don't join through the item."),
+    )
     transaction_id = models.CharField(
         unique=True,
         max_length=255,
@@ -192,9 +283,7 @@ class Transaction(BaseModel):
             "The unique ID of the transaction. Like all Plaid identifiers, the transaction_id is case sensitive."
         ),
     )
-    amount = models.DecimalField(
-        max_digits=65,
-        decimal_places=30,
+    amount = MinorUnitsField(
         blank=True,
         null=True,
         help_text=_(
@@ -215,15 +304,21 @@ class Transaction(BaseModel):
         blank=True,
         help_text=_("The check number of the transaction. This field is only populated for check transactions."),
     )
-    location = models.JSONField(help_text=_("A representation of where a transaction took place."))
-    name = models.TextField(blank=True, help_text=_("The merchant name or transaction description."))
-    merchant_name = models.TextField(
+    location = models.JSONField(
         blank=True,
-        help_text=_("The merchant name, as enriched by Plaid from the name field."),
+        null=True,
+        help_text=_(
+            "A representation of where a transaction took place, without its null keys. Null when no key is known."
+        ),
     )
-    merchant_entity_id = models.TextField(
+    name = models.TextField(blank=True, help_text=_("The merchant name or transaction description."))
+    merchant = models.ForeignKey(
+        "Merchant",
+        related_name="transactions",
+        on_delete=models.PROTECT,
         blank=True,
-        help_text=_("A unique, stable, Plaid-generated ID that maps to the merchant."),
+        null=True,
+        help_text=_("The merchant, as enriched by Plaid from the name field."),
     )
     pending = models.BooleanField(help_text=_("When true, identifies the transaction as pending or unsettled."))
     account_owner = models.TextField(
@@ -232,17 +327,6 @@ class Transaction(BaseModel):
             "The name of the account owner. This field is not typically populated and only relevant when dealing with sub-accounts."
         ),
     )
-    logo_url = models.URLField(
-        blank=True,
-        null=True,
-        help_text=_(
-            "The URL of a logo associated with this transaction, if available. The logo will always be 100×100 pixel PNG file."
-        ),
-    )
-    website = models.TextField(
-        blank=True,
-        help_text=_("The website associated with this transaction, if available."),
-    )
     date = models.DateField(
         help_text=_(
             "For pending transactions, the date that the transaction occurred; for posted transactions, the date that the transaction posted."
@@ -273,15 +357,13 @@ class Transaction(BaseModel):
             "to use over the date field for posted transactions, as it will generally represent the date the user actually made the transaction."
         ),
     )
-    primary_personal_finance_category = models.TextField(
+    category = models.ForeignKey(
+        "PersonalFinanceCategory",
+        related_name="transactions",
+        on_delete=models.PROTECT,
         blank=True,
-        help_text=_("A high level category that communicates the broad category of the transaction."),
-    )
-    detailed_personal_finance_category = models.TextField(
-        blank=True,
-        help_text=_(
-            "A granular category conveying the transaction's intent. This field can also be used as a unique identifier for the category."
-        ),
+        null=True,
+        help_text=_("The personal finance category of the transaction."),
     )
     confidence_level = models.CharField(
         max_length=200,
@@ -291,16 +373,206 @@ class Transaction(BaseModel):
             "A description of how confident we are that the provided categories accurately describe the transaction intent."
         ),
     )
-    personal_finance_category_icon_url = models.URLField(
+    fingerprint = models.CharField(
+        max_length=64,
+        blank=True,
+        help_text=_("SHA-256 hash of the stored Plaid values, used to skip writes when nothing changed."),
+    )
+
+    class Meta:
+        ordering = ("-date",)
+        indexes = [
+            # Recent transactions of a user in a category, id breaks ties in the keyset-paginated list
+            models.Index(fields=["user", "category", "-date", "-id"], name="plaid_txn_user_category_idx"),
+            # Recent transactions of a user or account, the manager always filters on is_active
+            models.Index(fields=["user", "is_active", "-date", "-id"], name="plaid_txn_user_date_idx"),
+            models.Index(fields=["account", "is_active", "-date", "-id"], name="plaid_txn_account_date_idx"),
+        ]
+
+    def __str__(self):
+        return f"Transaction {self.transaction_id}, Account {self.account}"
+
+    @property
+    def merchant_name(self) -> str:
+        return self.merchant.name if self.merchant_id else ""
+
+    @property
+    def primary_personal_finance_category(self) -> str:
+        return self.category.primary if self.category_id else ""
+
+    @property
+    def personal_finance_category_icon_url(self) -> str | None:
+        return self.category.icon_url if self.category_id else None
+
+
+class WebhookEvent(BaseModel):
+    """
+    Inbox of verified Plaid webhooks, stored as received and processed later by a worker.
+    """
+
+    class StatusChoices(models.TextChoices):
+        PENDING = "PENDING", _("Pending")
+        PROCESSED = "PROCESSED", _("Processed")
+        FAILED = "FAILED", _("Failed")
+
+    webhook_type = models.CharField(max_length=100, blank=True, help_text=_("The `webhook_type` of the payload."))
+    webhook_code = models.CharField(max_length=100, blank=True, help_text=_("The `webhook_code` of the payload."))
+    plaid_item_id = models.CharField(
+        max_length=255,
+        blank=True,
+        help_text=_("The Plaid item_id the webhook is about, if any."),
+    )
+    payload = models.JSONField(help_text=_("The webhook body as sent by Plaid."))
+    status = models.CharField(
+        max_length=9,
+        choices=StatusChoices,
+        default=StatusChoices.PENDING,
+        help_text=_("Whether the event is waiting to be processed, was processed, or failed too many times."),
+    )
+    attempts = models.PositiveSmallIntegerField(default=0, help_text=_("Number of failed processing attempts."))
+    error = models.TextField(blank=True, help_text=_("The error of the last failed processing attempt."))
+    processed_at = models.DateTimeField(null=True, blank=True, help_text=_("When the event was processed."))
+
+    class Meta:
+        ordering = ("id",)
+        indexes = [models.Index(fields=["status", "id"], name="plaid_webhook_status_idx")]
+
+    def __str__(self):
+        return f"WebhookEvent {self.webhook_type} {self.webhook_code}, Item {self.plaid_item_id}"
+
+
+class UserFinanceSummary(BaseModel):
+    """
+    Precomputed dashboard totals of a user, kept up to date by the sync pipeline so the dashboard reads a single row.
+    """
+
+    user = models.OneToOneField(settings.AUTH_USER_MODEL, related_name="finance_summary", on_delete=models.CASCADE)
+    net_worth = models.DecimalField(
+        max_digits=65,
+        decimal_places=30,
         blank=True,
         null=True,
+        help_text=_("Sum of the current balances of all the user's accounts."),
+    )
+    total_income = models.DecimalField(
+        max_digits=65,
+        decimal_places=30,
+        default=0,
+        help_text=_("Sum of the positive transaction amounts."),
+    )
+    total_expense = models.DecimalField(
+        max_digits=65,
+        decimal_places=30,
+        default=0,
+        help_text=_("Sum of the negative transaction amounts."),
+    )
+    category_totals = models.JSONField(
+        default=dict,
+        blank=True,
         help_text=_(
-            "The URL of an icon associated with the primary personal finance category. The icon will always be 100×100 pixel PNG file."
+            "Total amount and number of transactions per primary personal finance category, "
+            'as {"CATEGORY": {"total": "<decimal>", "count": <int>}}.'
         ),
     )
 
+    def __str__(self):
+        return f"Finance summary of {self.user}"
+
+
+class DailyTransactionRollup(BaseModel):
+    """
+    Transaction totals per account, day and primary personal finance category, kept up to date by the sync pipeline
+    so charts over time read one row per day instead of every transaction.
+    """
+
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, related_name="daily_rollups", on_delete=models.CASCADE)
+    account = models.ForeignKey(Account, related_name="daily_rollups", on_delete=models.CASCADE)
+    date = models.DateField(help_text=_("The day the transactions are dated."))
+    primary_personal_finance_category = models.CharField(
+        max_length=200,
+        blank=True,
+        help_text=_("The primary personal finance category of the transactions."),
+    )
+    total = models.DecimalField(
+        max_digits=65,
+        decimal_places=30,
+        default=0,
+        help_text=_("Sum of the transaction amounts."),
+    )
+    income = models.DecimalField(
+        max_digits=65,
+        decimal_places=30,
+        default=0,
+        help_text=_("Sum of the positive transaction amounts."),
+    )
+    expense = models.DecimalField(
+        max_digits=65,
+        decimal_places=30,
+        default=0,
+        help_text=_("Sum of the negative transaction amounts."),
+    )
+    transaction_count = models.PositiveIntegerField(default=0, help_text=_("Number of transactions."))
+
+    class Meta:
+        ordering = ("date",)
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "account", "date", "primary_personal_finance_category"],
+                name="plaid_daily_rollup_unique",
+            )
+        ]
+        indexes = [models.Index(fields=["user", "date"], name="plaid_daily_rollup_user_idx")]
+
+    def __str__(self):
+        return f"Rollup {self.date} {self.primary_personal_finance_category}, Account {self.account_id}"
+
+
+class ArchivedTransaction(models.Model):
+    """
+    Compact copy of a transaction older than the archive horizon, moved out of the Transaction table so its indexes
+    only cover recent rows. Range partitioned by month on Postgres.
+    """
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL, related_name="archived_transactions", on_delete=models.CASCADE, db_index=False
+    )
+    account = models.ForeignKey(
+        Account, related_name="archived_transactions", on_delete=models.CASCADE, db_index=False
+    )
+    transaction_id = models.CharField(max_length=255, help_text=_("The ID of the transaction."))
+    date = models.DateField(help_text=_("The date that the transaction posted."))
+    amount = MinorUnitsField(
+        blank=True,
+        null=True,
+        help_text=_("The settled value of the transaction."),
+    )
+    iso_currency_code = models.CharField(max_length=100, blank=True, help_text=_("The ISO-4217 currency code."))
+    unofficial_currency_code = models.CharField(
+        max_length=100, blank=True, help_text=_("The unofficial currency code, for currencies without an ISO code.")
+    )
+    name = models.TextField(blank=True, help_text=_("The merchant name or transaction description."))
+    merchant = models.ForeignKey(
+        Merchant, related_name="archived_transactions", on_delete=models.PROTECT, blank=True, null=True
+    )
+    category = models.ForeignKey(
+        PersonalFinanceCategory, related_name="archived_transactions", on_delete=models.PROTECT, blank=True, null=True
+    )
+    archived_at = models.DateTimeField(auto_now_add=True)
+
     class Meta:
         ordering = ("-date",)
+        indexes = [
+            models.Index(fields=["user", "-date"], name="plaid_archive_user_date_idx"),
+            models.Index(fields=["account", "-date"], name="plaid_archive_account_date_idx"),
+        ]
 
     def __str__(self):
-        return f"Transaction {self.transaction_id}, Account {self.account}"
+        return f"ArchivedTransaction {self.transaction_id}, Account {self.account_id}"
+
+    @property
+    def merchant_name(self) -> str:
+        return self.merchant.name if self.merchant_id else ""
+
+    @property
+    def primary_personal_finance_category(self) -> str:
+        return self.category.primary if self.category_id else ""
@@ -0,0 +1,105 @@
+import logging
+from collections.abc import Iterable
+from datetime import date
+
+from django.db import connection, models
+
+logger = logging.getLogger(__name__)
+
+
+def month_start(day: date) -> date:
+    return day.replace(day=1)
+
+
+def next_month(day: date) -> date:
+    return date(day.year + day.month // 12, day.month % 12 + 1, 1)
+
+
+def partition_name(model: type[models.Model], month: date) -> str:
+    return f"{model._meta.db_table}_{month:%Y_%m}"
+
+
+def create_partitioned_model(schema_editor, model: type[models.Model], partition_field: str) -> None:
+    """
+    Migration helper creating the table of `model` range partitioned on `partition_field` on Postgres, with a default
+    partition catching rows of months without their own. Other databases get a regular table.
+    """
+    if schema_editor.connection.vendor != "postgresql":
+        schema_editor.create_model(model)
+        return
+
+    qn = schema_editor.quote_name
+    table = model._meta.db_table
+    pk = model._meta.pk.column
+    key = model._meta.get_field(partition_field).column
+    sequence = f"{table}_{pk}_seq"
+
+    # The primary key of a partitioned table must include the partition key, and before Postgres 17 it can't have
+    # identity columns, so ids come from a sequence instead
+    sql, params = schema_editor.table_sql(model)
+    identity = " PRIMARY KEY GENERATED BY DEFAULT AS IDENTITY"
+    if identity not in sql:
+        raise ValueError(f"{model.__name__} must have an auto primary key to be partitioned")
+    sql = sql.replace(identity, f" DEFAULT nextval('{sequence}')")
+    sql = f"{sql[:-1]}, PRIMARY KEY ({qn(pk)}, {qn(key)})) PARTITION BY RANGE ({qn(key)})"
+
+    schema_editor.execute(f"CREATE SEQUENCE {qn(sequence)}")
+    schema_editor.execute(sql, params or None)
+    schema_editor.execute(f"ALTER SEQUENCE {qn(sequence)} OWNED BY {qn(table)}.{qn(pk)}")
+    schema_editor.execute(f"CREATE TABLE {qn(table + '_default')} PARTITION OF {qn(table)} DEFAULT")
+    schema_editor.deferred_sql.extend(schema_editor._model_indexes_sql(model))
+
+
+def is_partitioned(model: type[models.Model]) -> bool:
+    if connection.vendor != "postgresql":
+        return False
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM pg_partitioned_table WHERE partrelid = %s::regclass",
+            [connection.ops.quote_name(model._meta.db_table)],
+        )
+        return cursor.fetchone() is not None
+
+
+def get_partitions(model: type[models.Model]) -> set[str]:
+    """
+    Returns the names of the partitions of a partitioned table.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT child.relname FROM pg_inherits "
+            "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+            "WHERE pg_inherits.inhparent = %s::regclass",
+            [connection.ops.quote_name(model._meta.db_table)],
+        )
+        return {row[0] for row in cursor.fetchall()}
+
+
+def ensure_partitions(model: type[models.Model], days: Iterable[date]) -> list[str]:
+    """
+    Creates the missing monthly partitions of a partitioned table for the months of `days`, before rows dated on them
+    are inserted. Returns the names of the created partitions. Does nothing on tables that aren't partitioned.
+    """
+    if not is_partitioned(model):
+        return []
+
+    qn = connection.ops.quote_name
+    existing = get_partitions(model)
+    created = []
+
+    for month in sorted({month_start(day) for day in days}):
+        name = partition_name(model, month)
+        if name in existing:
+            continue
+
+        # DDL can't take parameters, the bounds are dates we built
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"CREATE TABLE IF NOT EXISTS {qn(name)} PARTITION OF {qn(model._meta.db_table)} "
+                f"FOR VALUES FROM ('{month.isoformat()}') TO ('{next_month(month).isoformat()}')"
+            )
+        created.append(name)
+        logger.info(f"Partition {name} created.")
+
+    return created
@@ -0,0 +1,166 @@
+import json
+import logging
+import random
+import threading
+import time
+
+from django.conf import settings
+
+import plaid
+
+from django_finance.apps.plaid.utils import plaid_config
+
+logger = logging.getLogger(__name__)
+
+# Plaid error types that are worth retrying after a pause.
+# https://plaid.com/docs/errors/
+RETRYABLE_ERROR_TYPES = {"RATE_LIMIT_EXCEEDED", "API_ERROR"}
+
+# Atomically refills a token bucket stored in a Redis hash and takes a token from it.
+# Returns the number of seconds to wait before a token is available, 0 when one was taken.
+TOKEN_BUCKET_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local time = redis.call("TIME")
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+local state = redis.call("HMGET", KEYS[1], "tokens", "timestamp")
+local tokens = tonumber(state[1]) or capacity
+local timestamp = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - timestamp) * rate)
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    wait = (1 - tokens) / rate
+end
+redis.call("HSET", KEYS[1], "tokens", tokens, "timestamp", now)
+redis.call("EXPIRE", KEYS[1], math.ceil(capacity / rate) + 1)
+return tostring(wait)
+"""
+
+
+class TokenBucketRateLimiter:
+    """
+    Token bucket rate limiter for Plaid API calls.
+    Buckets live in Redis so the limit is shared by all workers. When Redis isn't configured or can't be reached,
+    every process falls back to its own in-memory buckets, going back to Redis after `redis_retry` seconds.
+    """
+
+    def __init__(self, rate: float, capacity: float, redis_url: str | None = None, redis_retry: float = 30):
+        self.rate = rate
+        self.capacity = capacity
+        self.redis_retry = redis_retry
+        self._lock = threading.Lock()
+        self._buckets = {}
+        self._script = None
+        self._redis_retry_at = 0.0
+
+        if rate > 0 and redis_url:
+            try:
+                import redis
+
+                self._script = redis.Redis.from_url(redis_url).register_script(TOKEN_BUCKET_SCRIPT)
+            except ImportError:
+                logger.warning("redis is not installed, falling back to an in-process rate limiter")
+
+    def acquire(self, key: str = "default") -> None:
+        """
+        Blocks until a request for `key` is allowed by the rate limit.
+        """
+        if self.rate <= 0:
+            return
+
+        while (wait := self._reserve(key)) > 0:
+            time.sleep(wait)
+
+    def _reserve(self, key: str) -> float:
+        if self._script is not None and time.monotonic() >= self._redis_retry_at:
+            try:
+                return float(self._script(keys=[f"plaid:ratelimit:{key}"], args=[self.rate, self.capacity]))
+            except Exception as e:
+                logger.warning(
+                    f"Redis rate limiter unavailable, using an in-process one for {self.redis_retry}s: {str(e)}"
+                )
+                self._redis_retry_at = time.monotonic() + self.redis_retry
+
+        return self._reserve_local(key)
+
+    def _reserve_local(self, key: str) -> float:
+        with self._lock:
+            now = time.monotonic()
+            tokens, timestamp = self._buckets.get(key, (self.capacity, now))
+            tokens = min(self.capacity, tokens + (now - timestamp) * self.rate)
+
+            if tokens >= 1:
+                self._buckets[key] = (tokens - 1, now)
+                return 0
+
+            self._buckets[key] = (tokens, now)
+            return (1 - tokens) / self.rate
+
+
+rate_limiter = TokenBucketRateLimiter(
+    rate=settings.PLAID_RATE_LIMIT,
+    capacity=settings.PLAID_RATE_LIMIT_BURST,
+    redis_url=settings.PLAID_RATE_LIMIT_REDIS_URL,
+    redis_retry=settings.PLAID_RATE_LIMIT_REDIS_RETRY,
+)
+
+
+def get_plaid_error(exception: plaid.ApiException) -> dict:
+    """
+    Returns the error object from the body of a failed Plaid request.
+    """
+    try:
+        return json.loads(exception.body) or {}
+    except (TypeError, ValueError):
+        return {}
+
+
+def is_retryable(exception: plaid.ApiException) -> bool:
+    """
+    Whether a failed Plaid request is likely to succeed when retried later.
+    """
+    error = get_plaid_error(exception)
+
+    # Pagination has to restart from its first cursor, which is up to the caller
+    if error.get("error_code") == "TRANSACTIONS_SYNC_MUTATION_DURING_PAGINATION":
+        return False
+
+    if exception.status == 429 or (exception.status or 0) >= 500:
+        return True
+    return error.get("error_type") in RETRYABLE_ERROR_TYPES
+
+
+def backoff_delay(attempt: int) -> float:
+    """
+    Exponential backoff with full jitter, so retrying workers spread out instead of failing again in lockstep.
+    """
+    return random.uniform(0, min(settings.PLAID_RETRY_BACKOFF_MAX, settings.PLAID_RETRY_BACKOFF_BASE * 2**attempt))
+
+
+def call_plaid(endpoint: str, request, max_retries: int | None = None):
+    """
+    Sends a request to the Plaid client's `endpoint` method once the rate limiter allows it.
+    Rate limited and transient server errors are retried with exponential backoff, up to `max_retries` times,
+    `PLAID_MAX_RETRIES` by default.
+    """
+    if max_retries is None:
+        max_retries = settings.PLAID_MAX_RETRIES
+    attempt = 0
+    # The generated client sends requests without a timeout unless one is passed with each call
+    timeout = (settings.PLAID_CONNECT_TIMEOUT, settings.PLAID_READ_TIMEOUT)
+
+    while True:
+        rate_limiter.acquire(endpoint)
+
+        try:
+            return getattr(plaid_config.client, endpoint)(request, _request_timeout=timeout)
+        except plaid.ApiException as e:
+            if attempt >= max_retries or not is_retryable(e):
+                raise
+
+            delay = backoff_delay(attempt)
+            attempt += 1
+            logger.warning(f"Plaid {endpoint} failed with status {e.status}, retry {attempt} in {delay:.2f}s")
+            time.sleep(delay)
@@ -0,0 +1,182 @@
+import logging
+from dataclasses import dataclass, field
+from datetime import date
+from decimal import Decimal
+
+from django.db.models import F, Sum
+from django.db.models.functions import TruncMonth
+from django.db.transaction import atomic
+
+from django_finance.apps.plaid.models import DailyTransactionRollup
+from django_finance.apps.plaid.summaries import aggregate_amounts_by_category, to_decimal
+
+logger = logging.getLogger(__name__)
+
+# Periods a rollup series can be grouped by, mapped to the expression giving the first day of each period
+SERIES_PERIODS = {
+    "day": F("date"),
+    "month": TruncMonth("date"),
+}
+
+
+def to_date(value) -> date:
+    """
+    Converts a Plaid ISO date string or a database date to a date.
+    """
+    return date.fromisoformat(value) if isinstance(value, str) else value
+
+
+@dataclass
+class RollupDelta:
+    """
+    Change in a user's daily rollups caused by a transactions write, keyed by (account id, date, category) and
+    holding the change in total, count, income and expense.
+    """
+
+    days: dict = field(default_factory=dict)
+
+    def __bool__(self) -> bool:
+        return any(any(values) for values in self.days.values())
+
+    def add(self, account_id: int, day, amount, category: str, sign: int = 1) -> None:
+        """
+        Counts a stored transaction in (`sign` 1) or out (`sign` -1) of the rollup of its day.
+        """
+        amount = to_decimal(amount)
+        key = (account_id, to_date(day), category)
+        total, count, income, expense = self.days.get(key, (Decimal(0), 0, Decimal(0), Decimal(0)))
+
+        self.days[key] = (
+            total + sign * amount,
+            count + sign,
+            income + sign * amount if amount > 0 else income,
+            expense + sign * amount if amount < 0 else expense,
+        )
+
+    def remove(self, account_id: int, day, amount, category: str) -> None:
+        self.add(account_id, day, amount, category, sign=-1)
+
+
+def apply_rollup_delta(user_id: int, delta: RollupDelta) -> None:
+    """
+    Adds the change caused by a transactions write to the user's daily rollups with one read, one insert, one
+    update and one delete at most. Rows left without transactions are deleted.
+    Writes to an account's rows are serialized by the sync lock of its item.
+    """
+    changes = {key: values for key, values in delta.days.items() if any(values)}
+    if not changes:
+        return
+
+    with atomic():
+        stored = {
+            (row.account_id, row.date, row.primary_personal_finance_category): row
+            for row in DailyTransactionRollup.objects.select_for_update().filter(
+                user_id=user_id,
+                account_id__in={account_id for account_id, _, _ in changes},
+                date__in={day for _, day, _ in changes},
+                primary_personal_finance_category__in={category for _, _, category in changes},
+            )
+        }
+
+        to_create, to_update, to_delete = [], [], []
+        for key, (total, count, income, expense) in changes.items():
+            row = stored.get(key)
+
+            if row is None:
+                if count > 0:
+                    account_id, day, category = key
+                    to_create.append(
+                        DailyTransactionRollup(
+                            user_id=user_id,
+                            account_id=account_id,
+                            date=day,
+                            primary_personal_finance_category=category,
+                            total=total,
+                            income=income,
+                            expense=expense,
+                            transaction_count=count,
+                        )
+                    )
+                continue
+
+            if row.transaction_count + count <= 0:
+                to_delete.append(row.id)
+                continue
+
+            row.total += total
+            row.income += income
+            row.expense += expense
+            row.transaction_count += count
+            to_update.append(row)
+
+        if to_create:
+            DailyTransactionRollup.objects.bulk_create(to_create)
+        if to_update:
+            DailyTransactionRollup.objects.bulk_update(
+                to_update, ["total", "income", "expense", "transaction_count", "updated_at"]
+            )
+        if to_delete:
+            DailyTransactionRollup.objects.filter(id__in=to_delete).delete()
+
+
+def rebuild_daily_rollups(user_id: int) -> int:
+    """
+    Recomputes a user's daily rollups from all their transactions, archived ones included.
+    Returns the number of rows stored.
+    """
+    rows = aggregate_amounts_by_category(user_id, ["account_id", "date"])
+
+    with atomic():
+        DailyTransactionRollup.objects.filter(user_id=user_id).delete()
+        created = DailyTransactionRollup.objects.bulk_create(
+            [
+                DailyTransactionRollup(
+                    user_id=user_id,
+                    account_id=row["account_id"],
+                    date=row["date"],
+                    primary_personal_finance_category=row["primary_personal_finance_category"],
+                    total=row["total"],
+                    income=row["income"],
+                    expense=row["expense"],
+                    transaction_count=row["count"],
+                )
+                for row in rows
+            ],
+            batch_size=1000,
+        )
+
+    logger.info(f"Daily rollups of user {user_id} rebuilt.")
+    return len(created)
+
+
+def get_rollup_series(
+    user_id: int,
+    period: str = "day",
+    account=None,
+    date_from: date | None = None,
+    date_to: date | None = None,
+) -> list[dict]:
+    """
+    Returns the total, income, expense and number of a user's transactions per day or month, oldest first, read
+    from their daily rollups. Each period is keyed by its first day, and periods without transactions are left out.
+    """
+    rollups = DailyTransactionRollup.objects.filter(user_id=user_id)
+
+    if account is not None:
+        rollups = rollups.filter(account=account)
+    if date_from is not None:
+        rollups = rollups.filter(date__gte=date_from)
+    if date_to is not None:
+        rollups = rollups.filter(date__lte=date_to)
+
+    return list(
+        rollups.annotate(period=SERIES_PERIODS[period])
+        .values("period")
+        .order_by("period")
+        .annotate(
+            total=Sum("total"),
+            income=Sum("income"),
+            expense=Sum("expense"),
+            count=Sum("transaction_count"),
+        )
+    )
@@ -1,14 +1,73 @@
-import json
+import asyncio
 import logging
+import time
+from collections.abc import AsyncIterator, Iterator
+from concurrent.futures import Executor
+from dataclasses import dataclass
 
 import plaid
+from django.conf import settings
+from django.db.transaction import atomic
+
+from django_finance.apps.plaid import dimensions
+from django_finance.apps.plaid.dashboard import invalidate_dashboard_on_commit
 from django_finance.apps.plaid.models import Account, Item, Transaction
-from django_finance.apps.plaid.utils import plaid_config
+from django_finance.apps.plaid.ratelimit import backoff_delay, call_plaid, get_plaid_error
+from django_finance.apps.plaid.rollups import RollupDelta, apply_rollup_delta
+from django_finance.apps.plaid.summaries import (
+    FinanceDelta,
+    apply_finance_delta,
+    refresh_net_worth,
+)
+from django_finance.apps.plaid.utils import compact_location, get_fingerprint
 from plaid.model.accounts_get_request import AccountsGetRequest
 from plaid.model.transactions_sync_request import TransactionsSyncRequest
 
 logger = logging.getLogger(__name__)
 
+# Transaction fields that may be stored as NULL when missing from the Plaid payload.
+NULLABLE_TRANSACTION_FIELDS = [
+    "amount",
+    "authorized_date",
+    "datetime",
+    "authorized_datetime",
+]
+
+# Transaction fields that are stored as an empty string when missing from the Plaid payload.
+TEXT_TRANSACTION_FIELDS = [
+    "iso_currency_code",
+    "unofficial_currency_code",
+    "check_number",
+    "name",
+    "account_owner",
+]
+
+
+@dataclass
+class UpsertResult:
+    """
+    Number of rows inserted, updated, left untouched and removed by a bulk write.
+    """
+
+    inserted: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    removed: int = 0
+
+
+@dataclass
+class TransactionsSyncPage:
+    """
+    A single page of incremental transaction updates returned by /transactions/sync.
+    """
+
+    added: list
+    modified: list
+    removed: list
+    cursor: str
+    next_cursor: str
+    has_more: bool
+
 
 class PlaidService:
     """
@@ -20,54 +79,123 @@ class PlaidService:
         self.access_token = item.access_token
         self.cursor = item.transactions_cursor if item.transactions_cursor is not None else ""
 
-    def fetch_transactions(self, retries_left=3) -> tuple[list, list, list, str]:
+    def iter_transaction_pages(self, retries_left=3) -> Iterator[TransactionsSyncPage]:
         """
-        Get incremental transaction updates on an Item.
+        Get incremental transaction updates on an Item, yielding each page as soon as it arrives.
+        When the data changes during pagination, pagination restarts from the cursor it began with after a backoff.
+        Any other error, or running out of restarts, is raised so the sync isn't mistaken for a complete one.
         https://plaid.com/docs/api/products/transactions/#transactionssync
         """
-        added, modified, removed = [], [], []
+        start_cursor = self.cursor
         has_more = True
+        restarts = 0
 
-        if retries_left <= 0:
-            logger.info("Too many retries")
-            return added, modified, removed, self.cursor
-
-        try:
-            while has_more:
+        while has_more:
+            try:
                 request = TransactionsSyncRequest(access_token=self.access_token, cursor=self.cursor)
-                response = plaid_config.client.transactions_sync(request).to_dict()
+                response = call_plaid("transactions_sync", request).to_dict()
+
+            except plaid.ApiException as e:
+                error_code = get_plaid_error(e).get("error_code")
+                if error_code == "TRANSACTIONS_SYNC_MUTATION_DURING_PAGINATION" and restarts < retries_left:
+                    self.cursor = start_cursor
+                    time.sleep(backoff_delay(restarts))
+                    restarts += 1
+                    continue
+
+                logger.error(f"Error fetching transactions: {error_code or e.status}, {restarts} restarts")
+                raise
+
+            except Exception as e:
+                logger.error(f"Error fetching transactions: {str(e)}")
+                raise
+
+            page = TransactionsSyncPage(
+                added=response["added"],
+                modified=response["modified"],
+                removed=response["removed"],
+                cursor=self.cursor,
+                next_cursor=response["next_cursor"],
+                has_more=response["has_more"],
+            )
+            has_more = page.has_more
+            self.cursor = page.next_cursor
 
-                added.extend(response["added"])
-                modified.extend(response["modified"])
-                removed.extend(response["removed"])
-                has_more = response["has_more"]
-                self.cursor = response["next_cursor"]
+            yield page
 
-            return added, modified, removed, self.cursor
+    def fetch_transactions(self, retries_left=3) -> tuple[list, list, list, str]:
+        """
+        Get incremental transaction updates on an Item, collected into lists.
+        https://plaid.com/docs/api/products/transactions/#transactionssync
+        """
+        added, modified, removed = [], [], []
+        start_cursor = self.cursor
 
-        except plaid.ApiException as e:
-            err = json.loads(e.body)
-            if err["error_code"] == "TRANSACTIONS_SYNC_MUTATION_DURING_PAGINATION":
-                return self.fetch_transactions(retries_left - 1)
+        for page in self.iter_transaction_pages(retries_left):
+            # Pagination restarted, drop the pages collected so far
+            if page.cursor == start_cursor:
+                added, modified, removed = [], [], []
 
-            return added, modified, removed, self.cursor
+            added.extend(page.added)
+            modified.extend(page.modified)
+            removed.extend(page.removed)
 
-        except Exception as e:
-            logger.error(f"Error fetching transactions: {str(e)}")
-            return added, modified, removed, self.cursor
+        return added, modified, removed, self.cursor
 
     def fetch_accounts(self) -> list:
         """
         Used to retrieve a list of accounts associated with any linked Item.
+        Errors are raised, as transactions of accounts that weren't stored can't be saved.
         https://plaid.com/docs/api/accounts/#accountsget
         """
         try:
             request = AccountsGetRequest(access_token=self.access_token)
-            response = plaid_config.client.accounts_get(request)
+            response = call_plaid("accounts_get", request)
             return response.to_dict().get("accounts")
         except Exception as e:
             logger.error(f"Error fetching accounts: {str(e)}")
-            return []
+            raise
+
+
+class AsyncPlaidService:
+    """
+    Asyncio variant of the Plaid API service class.
+    The Plaid SDK only provides a blocking client, so every request runs on `executor` (or the loop's default
+    executor) while the event loop awaits many items' requests concurrently.
+    """
+
+    def __init__(self, item: Item, executor: Executor | None = None):
+        self.service = PlaidService(item)
+        self.executor = executor
+
+    @property
+    def cursor(self) -> str:
+        return self.service.cursor
+
+    async def _run(self, func, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, func, *args)
+
+    async def iter_transaction_pages(self, retries_left=3) -> AsyncIterator[TransactionsSyncPage]:
+        """
+        Get incremental transaction updates on an Item, yielding each page as soon as it arrives.
+        """
+        pages = self.service.iter_transaction_pages(retries_left)
+
+        while (page := await self._run(next, pages, None)) is not None:
+            yield page
+
+    async def fetch_transactions(self, retries_left=3) -> tuple[list, list, list, str]:
+        """
+        Get incremental transaction updates on an Item, collected into lists.
+        """
+        return await self._run(self.service.fetch_transactions, retries_left)
+
+    async def fetch_accounts(self) -> list:
+        """
+        Used to retrieve a list of accounts associated with any linked Item.
+        """
+        return await self._run(self.service.fetch_accounts)
 
 
 class PlaidDatabaseService:
@@ -78,117 +206,302 @@ class PlaidDatabaseService:
     def __init__(self, item: Item):
         self.item = item
 
-    def create_or_update_accounts(self, accounts) -> None:
+    def create_or_update_accounts(self, accounts) -> dict[str, Account]:
         """
-        Creates or updates multiple accounts related to a single item.
+        Creates or updates multiple accounts related to a single item with a single upsert.
+        Accounts whose fingerprint matches the stored one are not written.
+        Returns a mapping of Plaid account_id to Account for all accounts of the item.
         """
+        existing = Account.objects.filter(item=self.item).in_bulk(field_name="account_id")
+
+        objs = {}
         for account in accounts:
-            defaults = {
-                "name": account["name"],
-                "account_type": account["type"],
-            }
+            values = self._get_account_values(account)
+            fingerprint = get_fingerprint(values)
+            stored = existing.get(account["account_id"])
 
-            # Handle balances
-            balances = account.get("balances")
-            if balances:
-                available = balances.get("available")
-                current = balances.get("current")
-                limit = balances.get("limit")
-                iso_currency_code = balances.get("iso_currency_code")
-                unofficial_currency_code = balances.get("unofficial_currency_code")
-
-                if available is not None:
-                    defaults["available_balance"] = available
-                if current is not None:
-                    defaults["current_balance"] = current
-                if limit is not None:
-                    defaults["limit"] = limit
-                if iso_currency_code is not None:
-                    defaults["iso_currency_code"] = iso_currency_code
-                if unofficial_currency_code is not None:
-                    defaults["unofficial_currency_code"] = unofficial_currency_code
-
-            # Handle other fields
-            for key in ["mask", "official_name", "account_subtype"]:
-                val = account.get(key)
-                if val is not None:
-                    defaults[key] = val
-
-            # Create or update the account
-            Account.objects.update_or_create(
+            if stored is not None and stored.fingerprint == fingerprint:
+                continue
+
+            objs[account["account_id"]] = Account(
                 item=self.item,
+                user_id=self.item.user_id,
                 account_id=account["account_id"],
-                defaults=defaults,
+                fingerprint=fingerprint,
+                **values,
             )
 
-        logger.info(f"{len(accounts)} accounts saved for item {self.item.item_id}")
+        if not objs:
+            logger.info(f"Accounts for item {self.item.item_id} are unchanged")
+            return existing
+
+        Account.objects.bulk_create(
+            objs.values(),
+            update_conflicts=True,
+            unique_fields=["account_id"],
+            update_fields=["updated_at", "fingerprint", *self._get_account_values({}).keys()],
+        )
 
-    def create_or_update_transactions(self, transactions) -> None:
+        logger.info(f"{len(objs)} accounts saved for item {self.item.item_id}")
+        refresh_net_worth(self.item.user_id)
+        invalidate_dashboard_on_commit(self.item.user_id)
+        return Account.objects.filter(item=self.item).in_bulk(field_name="account_id")
+
+    @staticmethod
+    def _get_account_values(account) -> dict:
+        """
+        Maps a Plaid account to the values stored on the Account model.
         """
-        Creates or updates multiple transactions.
+        balances = account.get("balances") or {}
+
+        return {
+            "name": account.get("name") or "",
+            "account_type": account.get("type") or "",
+            "available_balance": balances.get("available"),
+            "current_balance": balances.get("current"),
+            "limit": balances.get("limit"),
+            "iso_currency_code": balances.get("iso_currency_code") or "",
+            "unofficial_currency_code": balances.get("unofficial_currency_code") or "",
+            "mask": account.get("mask") or "",
+            "official_name": account.get("official_name") or "",
+            "account_subtype": account.get("account_subtype") or "",
+        }
+
+    def create_or_update_transactions(
+        self,
+        transactions,
+        accounts: dict[str, Account] | None = None,
+        batch_size: int | None = None,
+    ) -> UpsertResult:
         """
+        Creates or updates multiple transactions in batches of upserts, then applies the change in totals to the
+        user's finance summary and daily rollups.
+        `accounts` maps Plaid account_id to Account, as returned by `create_or_update_accounts`.
+        When it isn't given, all referenced accounts are fetched in a single query. A transaction of an unknown
+        account raises Account.DoesNotExist, so a synced page isn't checkpointed past transactions it didn't store.
+        """
+        result = UpsertResult()
+        delta = FinanceDelta()
+        rollup_delta = RollupDelta()
+        batch_size = batch_size or settings.PLAID_SYNC_BATCH_SIZE
+
+        if accounts is None:
+            account_ids = {transaction["account_id"] for transaction in transactions}
+            accounts = Account.objects.in_bulk(account_ids, field_name="account_id")
+
+        # Keep the last version of each transaction, an upsert can't touch the same row twice
+        received = {}
         for transaction in transactions:
-            defaults = {
-                "location": transaction["location"],
-                "pending": transaction["pending"],
-                "date": transaction["date"],
-            }
+            account = accounts.get(transaction["account_id"])
+            if account is None:
+                raise Account.DoesNotExist(
+                    f"Account {transaction['account_id']} not found for transaction {transaction['transaction_id']}"
+                )
+
+            received[transaction["transaction_id"]] = (
+                account,
+                transaction,
+                self._get_merchant(transaction),
+                self._get_category(transaction),
+            )
 
-            # Handle personal finance category
-            category = transaction.get("personal_finance_category")
-            if category:
-                defaults["primary_personal_finance_category"] = category.get("primary")
-                defaults["detailed_personal_finance_category"] = category.get("detailed")
-                defaults["confidence_level"] = category.get("confidence_level")
-
-            # Handle other fields
-            for key in [
-                "amount",
-                "iso_currency_code",
-                "unofficial_currency_code",
-                "check_number",
-                "location",
-                "name",
-                "merchant_name",
-                "merchant_entity_id",
-                "account_owner",
-                "logo_url",
-                "website",
-                "authorized_date",
-                "datetime",
-                "authorized_datetime",
-                "personal_finance_category_icon_url",
-            ]:
-                val = transaction.get(key)
-                if val is not None:
-                    defaults[key] = val
-
-            # Fetch the account associated with the transaction
-            account = Account.objects.filter(account_id=transaction["account_id"]).first()
-
-            # Create or update the transaction
-            Transaction.objects.update_or_create(
-                account=account,
-                transaction_id=transaction["transaction_id"],
-                defaults=defaults,
+        # Resolve the merchants and categories of the whole page to ids at once
+        merchant_ids = dimensions.merchants.resolve(dict(filter(None, (row[2] for row in received.values()))))
+        category_ids = dimensions.categories.resolve(dict(filter(None, (row[3] for row in received.values()))))
+
+        objs = []
+        # Primary category of each received transaction, for the totals
+        primaries = {}
+        for transaction_id, (account, transaction, merchant, category) in received.items():
+            values = self._get_transaction_values(transaction)
+            objs.append(
+                Transaction(
+                    account=account,
+                    user_id=account.user_id,
+                    transaction_id=transaction_id,
+                    merchant_id=merchant_ids[merchant[0]] if merchant else None,
+                    category_id=category_ids[category[0]] if category else None,
+                    # The location is hashed as received, so compacting stored locations kept their fingerprints
+                    fingerprint=get_fingerprint(
+                        {
+                            "account_id": account.account_id,
+                            "merchant": merchant,
+                            "category": category,
+                            **values,
+                            "location": transaction.get("location") or {},
+                        }
+                    ),
+                    **values,
+                )
             )
+            primaries[transaction_id] = category[0][0] if category else ""
+
+        update_fields = [
+            "account",
+            "user",
+            "merchant",
+            "category",
+            "updated_at",
+            "fingerprint",
+            *self._get_transaction_values({}).keys(),
+        ]
+
+        for start in range(0, len(objs), batch_size):
+            batch = objs[start : start + batch_size]
+            existing = {
+                transaction.transaction_id: transaction
+                for transaction in Transaction.objects.filter(transaction_id__in=[obj.transaction_id for obj in batch])
+                .select_related("category")
+                .only(
+                    "transaction_id",
+                    "fingerprint",
+                    "account_id",
+                    "date",
+                    "amount",
+                    "iso_currency_code",
+                    "unofficial_currency_code",
+                    "category__primary",
+                )
+            }
 
-        logger.info(f"{len(transactions)} transactions saved to database.")
+            # Only write rows that are new or whose content changed
+            changed = [
+                obj
+                for obj in batch
+                if obj.transaction_id not in existing or existing[obj.transaction_id].fingerprint != obj.fingerprint
+            ]
+            if changed:
+                Transaction.objects.bulk_create(
+                    changed,
+                    update_conflicts=True,
+                    unique_fields=["transaction_id"],
+                    update_fields=update_fields,
+                )
+
+            for obj in changed:
+                # A modified transaction is taken out of the totals as stored, then counted in again as received
+                stored = existing.get(obj.transaction_id)
+                if stored is not None:
+                    category = stored.primary_personal_finance_category
+                    delta.remove(stored.amount, category)
+                    rollup_delta.remove(stored.account_id, stored.date, stored.amount, category)
+                delta.add(obj.amount, primaries[obj.transaction_id])
+                rollup_delta.add(obj.account_id, obj.date, obj.amount, primaries[obj.transaction_id])
+
+            updated = sum(1 for obj in changed if obj.transaction_id in existing)
+            result.inserted += len(changed) - updated
+            result.updated += updated
+            result.unchanged += len(batch) - len(changed)
+
+        logger.info(
+            f"{result.inserted} transactions created, {result.updated} updated "
+            f"and {result.unchanged} unchanged in database."
+        )
+        apply_finance_delta(self.item.user_id, delta)
+        apply_rollup_delta(self.item.user_id, rollup_delta)
+        if result.inserted or result.updated:
+            invalidate_dashboard_on_commit(self.item.user_id)
+        return result
+
+    @staticmethod
+    def _get_transaction_values(transaction) -> dict:
+        """
+        Maps a Plaid transaction to the values stored on the Transaction model.
+        """
+        values = {
+            "location": compact_location(transaction.get("location")),
+            "pending": transaction.get("pending", False),
+            "date": transaction.get("date"),
+        }
+
+        # Handle personal finance category
+        category = transaction.get("personal_finance_category") or {}
+        values["confidence_level"] = category.get("confidence_level") or ""
+
+        # Handle other fields
+        for key in NULLABLE_TRANSACTION_FIELDS:
+            values[key] = transaction.get(key)
+
+        for key in TEXT_TRANSACTION_FIELDS:
+            values[key] = transaction.get(key) or ""
+
+        return values
+
+    @staticmethod
+    def _get_merchant(transaction) -> tuple[tuple, dict] | None:
+        """
+        Returns the natural key and attributes of the merchant of a Plaid transaction, None when it has none.
+        """
+        key = (transaction.get("merchant_entity_id") or "", transaction.get("merchant_name") or "")
+        if not any(key):
+            return None
+        return key, {"logo_url": transaction.get("logo_url"), "website": transaction.get("website") or ""}
+
+    @staticmethod
+    def _get_category(transaction) -> tuple[tuple, dict] | None:
+        """
+        Returns the natural key and attributes of the personal finance category of a Plaid transaction, None when
+        it has none.
+        """
+        category = transaction.get("personal_finance_category") or {}
+        key = (category.get("primary") or "", category.get("detailed") or "")
+        if not any(key):
+            return None
+        return key, {"icon_url": transaction.get("personal_finance_category_icon_url")}
+
+    def save_transactions_page(
+        self,
+        page: TransactionsSyncPage,
+        accounts: dict[str, Account] | None = None,
+    ) -> UpsertResult:
+        """
+        Stores a page of transaction updates and checkpoints the item's cursor in the same database transaction,
+        so an interrupted sync resumes from the last committed page instead of restarting.
+        """
+        with atomic():
+            result = self.create_or_update_transactions(page.added + page.modified, accounts=accounts)
+            result.removed = self.delete_transactions(page.removed)
+            self.update_item_transaction_cursor(page.next_cursor)
 
-    def delete_transactions(self, transactions) -> None:
+        return result
+
+    def delete_transactions(self, transactions) -> int:
         """
-        Removes one or more transactions.
+        Removes one or more transactions and takes them out of the user's finance summary and daily rollups.
         """
         transaction_ids = [transaction["transaction_id"] for transaction in transactions]
-        deleted_count, _ = Transaction.objects.filter(transaction_id__in=transaction_ids).delete()
+        if not transaction_ids:
+            return 0
+
+        rows = Transaction.objects.filter(transaction_id__in=transaction_ids)
+        delta = FinanceDelta()
+        rollup_delta = RollupDelta()
+        for transaction in rows.select_related("category").only(
+            "account_id",
+            "date",
+            "amount",
+            "iso_currency_code",
+            "unofficial_currency_code",
+            "category__primary",
+        ):
+            category = transaction.primary_personal_finance_category
+            delta.remove(transaction.amount, category)
+            rollup_delta.remove(transaction.account_id, transaction.date, transaction.amount, category)
+
+        deleted_count, _ = rows.delete()
         logger.info(f"{deleted_count} transactions deleted from database.")
+        apply_finance_delta(self.item.user_id, delta)
+        apply_rollup_delta(self.item.user_id, rollup_delta)
+        if deleted_count:
+            invalidate_dashboard_on_commit(self.item.user_id)
+        return deleted_count
 
     def update_item_transaction_cursor(self, cursor) -> None:
         """
         Updates the transaction cursor for the item.
         """
         self.item.transactions_cursor = cursor
-        self.item.save()
+        self.item.save(update_fields=["transactions_cursor", "updated_at"])
         logger.info("Transaction cursor updated successfully.")
 
     def update_item_to_bad_state(self) -> None:
@@ -197,6 +510,7 @@ class PlaidDatabaseService:
         """
         self.item.status = "Bad"
         self.item.save()
+        invalidate_dashboard_on_commit(self.item.user_id)
 
         # TODO - Create an alert
 
@@ -206,5 +520,6 @@ class PlaidDatabaseService:
         """
         self.item.new_accounts_detected = True
         self.item.save()
+        invalidate_dashboard_on_commit(self.item.user_id)
 
         # TODO - Create an alert
@@ -0,0 +1,241 @@
+import logging
+from dataclasses import dataclass, field
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db.models import Count, Q, QuerySet, Sum
+from django.db.transaction import atomic
+
+from django_finance.apps.common.fields import from_minor_units, get_currency_exponent
+from django_finance.apps.plaid.dimensions import get_primary_categories
+from django_finance.apps.plaid.models import (
+    Account,
+    ArchivedTransaction,
+    Transaction,
+    UserFinanceSummary,
+)
+
+logger = logging.getLogger(__name__)
+
+# Amounts are stored in minor units of these currencies, so sums are only meaningful per currency
+CURRENCY_FIELDS = ("iso_currency_code", "unofficial_currency_code")
+TOTAL_FIELDS = ("total", "income", "expense", "count")
+
+
+def to_decimal(amount) -> Decimal:
+    """
+    Converts a Plaid or database amount to a Decimal, treating a missing amount as zero.
+    """
+    if amount is None:
+        return Decimal(0)
+    return amount if isinstance(amount, Decimal) else Decimal(str(amount))
+
+
+def sum_to_decimal(minor_units, row: dict) -> Decimal:
+    """
+    Converts a sum of minor units of the currency of an aggregated row to a Decimal, treating a missing sum as zero.
+    """
+    if minor_units is None:
+        return Decimal(0)
+    return from_minor_units(minor_units, get_currency_exponent(*(row[name] for name in CURRENCY_FIELDS)))
+
+
+@dataclass
+class FinanceDelta:
+    """
+    Change in a user's transaction totals caused by a write, applied to the summary once the write is done.
+    """
+
+    income: Decimal = Decimal(0)
+    expense: Decimal = Decimal(0)
+    categories: dict = field(default_factory=dict)
+
+    def __bool__(self) -> bool:
+        return bool(self.income or self.expense or self.categories)
+
+    def add(self, amount, category: str, sign: int = 1) -> None:
+        """
+        Counts a stored transaction in (`sign` 1) or out (`sign` -1) of the totals.
+        """
+        amount = to_decimal(amount)
+
+        if amount > 0:
+            self.income += sign * amount
+        elif amount < 0:
+            self.expense += sign * amount
+
+        total, count = self.categories.get(category, (Decimal(0), 0))
+        self.categories[category] = (total + sign * amount, count + sign)
+
+    def remove(self, amount, category: str) -> None:
+        self.add(amount, category, sign=-1)
+
+
+def aggregate_amounts(user_id: int, fields: list[str]) -> list[dict]:
+    """
+    Returns the total, income, expense and number of a user's transactions, archived ones included, grouped by
+    `fields`. Each table is read with a single conditional-aggregation query, grouped by currency as well.
+    """
+    groups = {}
+
+    for model in (Transaction, ArchivedTransaction):
+        rows = (
+            model.objects.filter(user_id=user_id)
+            .values(*fields, *CURRENCY_FIELDS)
+            .order_by()
+            .annotate(
+                total=Sum("amount"),
+                income=Sum("amount", filter=Q(amount__gt=0)),
+                expense=Sum("amount", filter=Q(amount__lt=0)),
+                count=Count("id"),
+            )
+        )
+
+        for row in rows:
+            add_totals(
+                groups,
+                {name: row[name] for name in fields},
+                {
+                    "total": sum_to_decimal(row["total"], row),
+                    "income": sum_to_decimal(row["income"], row),
+                    "expense": sum_to_decimal(row["expense"], row),
+                    "count": row["count"],
+                },
+            )
+
+    return list(groups.values())
+
+
+def add_totals(groups: dict, values: dict, totals: dict) -> None:
+    """
+    Adds `totals` to the group of `groups` identified by `values`, creating it when needed.
+    """
+    group = groups.setdefault(
+        tuple(values.values()),
+        {**values, "total": Decimal(0), "income": Decimal(0), "expense": Decimal(0), "count": 0},
+    )
+    for name in TOTAL_FIELDS:
+        group[name] += totals[name]
+
+
+def aggregate_amounts_by_category(user_id: int, fields: list[str]) -> list[dict]:
+    """
+    Same as `aggregate_amounts`, grouped by primary personal finance category as well. The tables are grouped on
+    integer category ids, whose rows are then merged per primary category with one more query for their names.
+    """
+    rows = aggregate_amounts(user_id, [*fields, "category_id"])
+    primaries = get_primary_categories({row["category_id"] for row in rows} - {None})
+    groups = {}
+
+    for row in rows:
+        add_totals(
+            groups,
+            {
+                **{name: row[name] for name in fields},
+                "primary_personal_finance_category": primaries[row["category_id"]],
+            },
+            row,
+        )
+
+    return list(groups.values())
+
+
+def sum_current_balances(accounts: QuerySet, *fields: str) -> dict[tuple, Decimal]:
+    """
+    Returns the current balance of `accounts` grouped by `fields`, keyed by the tuple of their values.
+    Groups without any known balance are left out.
+    """
+    balances = {}
+    rows = accounts.values(*fields, *CURRENCY_FIELDS).order_by().annotate(balance=Sum("current_balance"))
+
+    for row in rows:
+        if row["balance"] is not None:
+            key = tuple(row[name] for name in fields)
+            balances[key] = balances.get(key, Decimal(0)) + sum_to_decimal(row["balance"], row)
+
+    return balances
+
+
+def get_net_worth(user_id: int) -> Decimal | None:
+    return sum_current_balances(Account.objects.filter(user_id=user_id)).get(())
+
+
+def aggregate_transactions_by_category(user_id: int) -> list[dict]:
+    """
+    Returns the total, income, expense and number of a user's transactions per primary personal finance category.
+    """
+    return aggregate_amounts_by_category(user_id, [])
+
+
+def rebuild_user_finance_summary(user_id: int) -> UserFinanceSummary:
+    """
+    Recomputes a user's summary from all their accounts and transactions.
+    Rebuilds of the same user wait on the user's row, so concurrent first reads don't both insert the summary.
+    """
+    with atomic():
+        get_user_model().objects.select_for_update().filter(id=user_id).first()
+        categories = aggregate_transactions_by_category(user_id)
+
+        summary, _ = UserFinanceSummary.objects.update_or_create(
+            user_id=user_id,
+            defaults={
+                "net_worth": get_net_worth(user_id),
+                "total_income": sum(to_decimal(row["income"]) for row in categories),
+                "total_expense": sum(to_decimal(row["expense"]) for row in categories),
+                "category_totals": {
+                    row["primary_personal_finance_category"]: {
+                        "total": str(to_decimal(row["total"])),
+                        "count": row["count"],
+                    }
+                    for row in categories
+                },
+            },
+        )
+
+    logger.info(f"Finance summary of user {user_id} rebuilt.")
+    return summary
+
+
+def apply_finance_delta(user_id: int, delta: FinanceDelta) -> None:
+    """
+    Adds the change caused by a transactions write to the user's summary.
+    A user without a summary yet gets one built from scratch, which already includes the write.
+    """
+    if not delta:
+        return
+
+    with atomic():
+        summary = UserFinanceSummary.objects.select_for_update().filter(user_id=user_id).first()
+
+        if summary is None:
+            rebuild_user_finance_summary(user_id)
+            return
+
+        summary.total_income += delta.income
+        summary.total_expense += delta.expense
+
+        for category, (total, count) in delta.categories.items():
+            stored = summary.category_totals.get(category, {"total": "0", "count": 0})
+            count += stored["count"]
+
+            if count > 0:
+                summary.category_totals[category] = {"total": str(Decimal(stored["total"]) + total), "count": count}
+            else:
+                summary.category_totals.pop(category, None)
+
+        summary.save(update_fields=["total_income", "total_expense", "category_totals", "updated_at"])
+
+
+def refresh_net_worth(user_id: int) -> None:
+    """
+    Recomputes a user's net worth after their account balances changed. Users have few accounts, so this is cheap.
+    """
+    if not UserFinanceSummary.objects.filter(user_id=user_id).update(net_worth=get_net_worth(user_id)):
+        rebuild_user_finance_summary(user_id)
+
+
+def get_user_finance_summary(user_id: int) -> UserFinanceSummary:
+    """
+    Returns a user's summary, building it on first access for data stored before summaries existed.
+    """
+    return UserFinanceSummary.objects.filter(user_id=user_id).first() or rebuild_user_finance_summary(user_id)
@@ -0,0 +1,294 @@
+import asyncio
+import logging
+import time
+from collections.abc import Iterable
+from concurrent.futures import FIRST_COMPLETED, Executor, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import connection
+from django.db.transaction import on_commit
+from django.utils import timezone
+
+from django_finance.apps.plaid.locks import ItemLock
+from django_finance.apps.plaid.models import Item
+from django_finance.apps.plaid.services import (
+    AsyncPlaidService,
+    PlaidDatabaseService,
+    PlaidService,
+    UpsertResult,
+)
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ItemSyncResult:
+    """
+    Outcome and timing of a single item sync.
+    """
+
+    item_id: int
+    success: bool = True
+    pages: int = 0
+    inserted: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    removed: int = 0
+    duration: float = 0.0
+    lock_wait: float = 0.0
+    lock_hold: float = 0.0
+    locked: bool = False
+    error: str = ""
+
+    def add_page(self, page_result: UpsertResult) -> None:
+        self.pages += 1
+        self.inserted += page_result.inserted
+        self.updated += page_result.updated
+        self.unchanged += page_result.unchanged
+        self.removed += page_result.removed
+
+    def log(self) -> None:
+        logger.info(
+            f"Plaid item {self.item_id} synced in {self.duration:.2f}s: {self.pages} pages, {self.inserted} created, "
+            f"{self.updated} updated, {self.unchanged} unchanged, {self.removed} removed, "
+            f"lock waited {self.lock_wait:.2f}s and held {self.lock_hold:.2f}s"
+        )
+
+
+def start_item_sync(id: int) -> None:
+    """
+    Marks an item's sync as running. Updates arriving from now on are not covered by it and must trigger another one.
+    """
+    Item.objects.filter(id=id).update(
+        sync_status=Item.SyncStatusChoices.RUNNING,
+        sync_requested=False,
+        sync_status_updated_at=timezone.now(),
+    )
+
+
+def finish_item_sync(id: int) -> None:
+    """
+    Marks an item's sync as done, enqueueing the follow-up sync if updates were requested while it ran.
+    """
+    # tasks imports this module to run syncs
+    from django_finance.apps.plaid.tasks import update_transactions
+
+    now = timezone.now()
+    items = Item.objects.filter(id=id)
+
+    if items.filter(sync_requested=False).update(sync_status=Item.SyncStatusChoices.IDLE, sync_status_updated_at=now):
+        return
+
+    items.update(sync_status=Item.SyncStatusChoices.QUEUED, sync_requested=False, sync_status_updated_at=now)
+    logger.info(f"Updates requested during sync of plaid item {id}, enqueueing another sync")
+    on_commit(lambda: update_transactions.delay(id))
+
+
+def sync_item(item: Item) -> ItemSyncResult:
+    """
+    Handles the fetching and storing of accounts and new, modified, and removed transactions of an item.
+    Holds the item's lock meanwhile, since concurrent syncs would page through the same cursor range.
+    The item's sync status only changes while the lock is held, so a sync waiting on the lock can't clear the updates
+    requested during the current holder's sync or be marked idle by it.
+    """
+    result = ItemSyncResult(item_id=item.id)
+    started_at = time.monotonic()
+    lock = ItemLock(item.id)
+
+    if not lock.acquire():
+        return lock_not_acquired(result, started_at)
+
+    result.locked = True
+    result.lock_wait = time.monotonic() - started_at
+
+    try:
+        # Another sync may have moved the cursor while this one waited for the lock
+        item.refresh_from_db()
+        start_item_sync(item.id)
+
+        service = PlaidService(item)
+        db_service = PlaidDatabaseService(item)
+
+        # Accounts must exist before the transactions referencing them are stored
+        accounts = db_service.create_or_update_accounts(service.fetch_accounts())
+
+        # Persist and checkpoint each page as it arrives so memory stays bounded by a single page
+        # and an interrupted sync resumes from the last committed page
+        for page in service.iter_transaction_pages():
+            result.add_page(db_service.save_transactions_page(page, accounts=accounts))
+
+            # Extend the lease so a long sync keeps the item to itself, and stop once it was lost to another sync
+            if not lock.renew():
+                raise RuntimeError(f"Sync lock of plaid item {item.id} expired")
+
+    except Exception as e:
+        logger.error(f"Something went wrong in update_transactions for plaid item {item.id}, {str(e)}")
+        result.success = False
+        result.error = str(e)
+
+    finally:
+        try:
+            finish_item_sync(item.id)
+        finally:
+            lock.release()
+
+    result.lock_hold = time.monotonic() - started_at - result.lock_wait
+    result.duration = time.monotonic() - started_at
+    result.log()
+    return result
+
+
+def lock_not_acquired(result: ItemSyncResult, started_at: float) -> ItemSyncResult:
+    """
+    Fills in the result of a sync skipped because another sync of the item held its lock for too long.
+    """
+    logger.warning(f"Plaid item {result.item_id} is already being synced, skipping")
+    result.success = False
+    result.error = "Sync already in progress"
+    result.lock_wait = result.duration = time.monotonic() - started_at
+    return result
+
+
+def sync_item_by_id(item_id: int) -> ItemSyncResult:
+    """
+    Syncs a single item from a worker thread, closing the thread's database connection afterwards.
+    """
+    try:
+        item = Item.objects.filter(id=item_id).first()
+
+        if not item:
+            logger.error(f"Item with id {item_id} not found")
+            return ItemSyncResult(item_id=item_id, success=False, error="Item not found")
+
+        return sync_item(item)
+    finally:
+        connection.close()
+
+
+def sync_items(item_ids: Iterable[int], max_workers: int | None = None) -> list[ItemSyncResult]:
+    """
+    Syncs many items concurrently with a bounded pool of threads, since syncing is dominated by Plaid API calls.
+    At most twice as many items as workers are queued at once, so `item_ids` can be a lazy iterator.
+    """
+    max_workers = max_workers or settings.PLAID_SYNC_MAX_WORKERS
+    results = []
+
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="plaid-sync") as executor:
+        pending = set()
+
+        for item_id in item_ids:
+            if len(pending) >= max_workers * 2:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                results.extend(future.result() for future in done)
+
+            pending.add(executor.submit(sync_item_by_id, item_id))
+
+        done, _ = wait(pending)
+        results.extend(future.result() for future in done)
+
+    return results
+
+
+async def async_sync_item(item: Item, executor: Executor | None = None) -> ItemSyncResult:
+    """
+    Asyncio variant of `sync_item`. Plaid requests are awaited so many items can be fetched on one event loop,
+    while database writes run through `sync_to_async` on a single thread.
+    """
+    result = ItemSyncResult(item_id=item.id)
+    started_at = time.monotonic()
+    lock = ItemLock(item.id)
+
+    if not await lock.aacquire():
+        return lock_not_acquired(result, started_at)
+
+    result.locked = True
+    result.lock_wait = time.monotonic() - started_at
+
+    try:
+        await item.arefresh_from_db()
+        await sync_to_async(start_item_sync)(item.id)
+
+        service = AsyncPlaidService(item, executor=executor)
+        db_service = PlaidDatabaseService(item)
+
+        accounts = await sync_to_async(db_service.create_or_update_accounts)(await service.fetch_accounts())
+
+        async for page in service.iter_transaction_pages():
+            result.add_page(await sync_to_async(db_service.save_transactions_page)(page, accounts=accounts))
+            if not await lock.arenew():
+                raise RuntimeError(f"Sync lock of plaid item {item.id} expired")
+
+    except Exception as e:
+        logger.error(f"Something went wrong in async_sync_item for plaid item {item.id}, {str(e)}")
+        result.success = False
+        result.error = str(e)
+
+    finally:
+        try:
+            await sync_to_async(finish_item_sync)(item.id)
+        finally:
+            await lock.arelease()
+
+    result.lock_hold = time.monotonic() - started_at - result.lock_wait
+    result.duration = time.monotonic() - started_at
+    result.log()
+    return result
+
+
+async def async_sync_items(item_ids: Iterable[int], concurrency: int | None = None) -> list[ItemSyncResult]:
+    """
+    Syncs many items concurrently on the running event loop, with at most `concurrency` Plaid requests in flight.
+    """
+    concurrency = concurrency or settings.PLAID_SYNC_MAX_WORKERS
+    item_ids = iter(item_ids)
+    results = []
+
+    async def worker(executor: Executor):
+        # Workers share one iterator, so each item is picked up exactly once
+        for item_id in item_ids:
+            item = await Item.objects.filter(id=item_id).afirst()
+
+            if not item:
+                logger.error(f"Item with id {item_id} not found")
+                results.append(ItemSyncResult(item_id=item_id, success=False, error="Item not found"))
+                continue
+
+            results.append(await async_sync_item(item, executor=executor))
+
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="plaid-async") as executor:
+        await asyncio.gather(*(worker(executor) for _ in range(concurrency)))
+
+    return results
+
+
+def summarize_sync_results(results: list[ItemSyncResult]) -> dict:
+    """
+    Aggregates item sync results into totals that can be logged or returned from a task.
+    """
+    summary = {
+        "items": len(results),
+        "succeeded": 0,
+        "failed": 0,
+        "pages": 0,
+        "inserted": 0,
+        "updated": 0,
+        "unchanged": 0,
+        "removed": 0,
+        "duration": 0.0,
+        "lock_wait": 0.0,
+        "slowest_item_id": None,
+        "slowest_duration": 0.0,
+    }
+
+    for result in results:
+        summary["succeeded" if result.success else "failed"] += 1
+        for key in ["pages", "inserted", "updated", "unchanged", "removed", "duration", "lock_wait"]:
+            summary[key] += getattr(result, key)
+
+        if result.duration > summary["slowest_duration"]:
+            summary["slowest_item_id"] = result.item_id
+            summary["slowest_duration"] = result.duration
+
+    return summary
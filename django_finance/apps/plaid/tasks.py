@@ -1,9 +1,21 @@
+import asyncio
 import logging
+from datetime import timedelta
 
 from celery import shared_task
+from django.conf import settings
+from django.db.models import Q
+from django.db.transaction import on_commit
+from django.utils import timezone
 
+from django_finance.apps.plaid.archive import archive_transactions
 from django_finance.apps.plaid.models import Item
-from django_finance.apps.plaid.services import PlaidDatabaseService, PlaidService
+from django_finance.apps.plaid.sync import (
+    async_sync_items,
+    summarize_sync_results,
+    sync_item,
+    sync_items,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -13,24 +25,114 @@ def update_transactions(id: int):
     """
     Handles the fetching and storing of new, modified, and removed transactions.
     """
-    try:
-        item = Item.objects.filter(id=id).first()
+    item = Item.objects.filter(id=id).first()
 
-        if not item:
-            logger.error(f"Item with id {id} not found")
-            return
+    if not item:
+        logger.error(f"Item with id {id} not found")
+        return
 
-        service = PlaidService(item)
+    locked = sync_item(item).locked
 
-        added, modified, removed, cursor = service.fetch_transactions()
-        accounts = service.fetch_accounts()
+    # Another sync held the item's lock and may have started before the updates this run was queued for.
+    # Its finish_item_sync enqueues the follow-up, enqueueing one here would only wait on the lock again.
+    if not locked and not Item.objects.filter(id=id).exclude(sync_status=Item.SyncStatusChoices.IDLE).update(
+        sync_requested=True
+    ):
+        schedule_item_sync(id)
 
-        db_service = PlaidDatabaseService(item)
 
-        db_service.create_or_update_accounts(accounts)
-        db_service.create_or_update_transactions(added + modified)
-        db_service.delete_transactions(removed)
-        db_service.update_item_transaction_cursor(cursor)
+def schedule_item_sync(id: int) -> bool:
+    """
+    Enqueues a transactions sync of an item unless one is already queued or running.
+    In that case the item is marked as requested instead, so exactly one follow-up sync runs after the current one.
+    Returns whether a sync was enqueued, which happens when the current database transaction commits.
+    """
+    items = Item.objects.filter(id=id)
+    stale_before = timezone.now() - timedelta(seconds=settings.PLAID_SYNC_STALE_AFTER)
+
+    # A sync may finish between the two updates below, so retry claiming the item if it went idle meanwhile
+    for _ in range(3):
+        claimed = items.filter(
+            Q(sync_status=Item.SyncStatusChoices.IDLE) | Q(sync_status_updated_at__lt=stale_before)
+        ).update(
+            sync_status=Item.SyncStatusChoices.QUEUED,
+            sync_requested=False,
+            sync_status_updated_at=timezone.now(),
+        )
+
+        if claimed:
+            # Only once the queued status is committed, so the task can't run first and find it missing
+            on_commit(lambda: update_transactions.delay(id))
+            return True
+
+        if items.exclude(sync_status=Item.SyncStatusChoices.IDLE).update(sync_requested=True):
+            logger.info(f"Sync of plaid item {id} already pending, marked as requested")
+            return False
+
+    logger.error(f"Could not schedule a sync of plaid item {id}")
+    return False
+
+
+@shared_task(queue="long")
+def sync_all_items(user_id: int | None = None, max_workers: int | None = None, use_asyncio: bool = False) -> dict:
+    """
+    Syncs every item, or every item of a user, with a bounded pool of worker threads.
+    With `use_asyncio`, Plaid requests of all items are awaited concurrently on a single event loop instead.
+    """
+    items = Item.objects.all()
+
+    if user_id is not None:
+        items = items.filter(user_id=user_id)
+
+    item_ids = items.values_list("id", flat=True)
+
+    if use_asyncio:
+        results = asyncio.run(async_sync_items(list(item_ids), concurrency=max_workers))
+    else:
+        results = sync_items(item_ids.iterator(), max_workers=max_workers)
+
+    summary = summarize_sync_results(results)
+    logger.info(f"Synced {summary['items']} plaid items, {summary['failed']} failed")
+    return summary
+
+
+@shared_task(queue="long")
+def process_webhook_inbox(batch_size: int | None = None) -> int:
+    """
+    Drains pending webhook events stored by the webhook view in inbox mode.
+    """
+    # webhooks imports this module to schedule syncs
+    from django_finance.apps.plaid.webhooks import drain_webhook_inbox
+
+    processed = drain_webhook_inbox(batch_size)
+    logger.info(f"{processed} plaid webhook events processed")
+    return processed
+
+
+@shared_task(queue="long")
+def prune_old_webhook_events() -> int:
+    """
+    Deletes processed webhook events older than the inbox retention period.
+    """
+    if not settings.PLAID_WEBHOOK_RETENTION_DAYS:
+        return 0
+
+    # webhooks imports this module to schedule syncs
+    from django_finance.apps.plaid.webhooks import prune_webhook_inbox
+
+    deleted = prune_webhook_inbox()
+    logger.info(f"{deleted} processed plaid webhook events pruned")
+    return deleted
+
+
+@shared_task(queue="long")
+def archive_old_transactions() -> int:
+    """
+    Moves transactions older than the archive horizon to the archive table.
+    """
+    if not settings.PLAID_ARCHIVE_AFTER_DAYS:
+        return 0
 
-    except Exception as e:
-        logger.error(f"Something went wrong in update_transactions for plaid item {id}, {str(e)}")
+    archived = archive_transactions()
+    logger.info(f"{archived} plaid transactions archived")
+    return archived
@@ -0,0 +1,157 @@
+import base64
+from dataclasses import dataclass
+from datetime import date
+
+from django.conf import settings
+from django.db.models import Q, QuerySet
+
+from django_finance.apps.plaid.models import ArchivedTransaction, Transaction
+
+
+@dataclass
+class TransactionPage:
+    """
+    A page of transactions, newest first, with the cursor of the next page. The cursor is None on the last page.
+    """
+
+    transactions: list[Transaction]
+    next_cursor: str | None
+
+
+def encode_cursor(transaction: Transaction) -> str:
+    """
+    Returns the opaque cursor of the position right after `transaction` in the list.
+    """
+    return base64.urlsafe_b64encode(f"{transaction.date.isoformat()}|{transaction.id}".encode()).decode()
+
+
+def decode_cursor(cursor: str) -> tuple[date, int]:
+    """
+    Returns the (date, id) position held by a cursor, raising ValueError when it isn't one.
+    """
+    day, _, pk = base64.urlsafe_b64decode(cursor.encode()).decode().partition("|")
+    return date.fromisoformat(day), int(pk)
+
+
+def filter_transactions(
+    user_id: int,
+    account=None,
+    category=None,
+    pending: bool | None = None,
+    date_from: date | None = None,
+    date_to: date | None = None,
+) -> QuerySet:
+    """
+    Returns a user's transactions matching the given filters, with what the transaction list shows.
+    """
+    transactions = (
+        Transaction.objects.filter(user_id=user_id).select_related("account", "merchant", "category").defer("location")
+    )
+
+    if pending is not None:
+        transactions = transactions.filter(pending=pending)
+
+    return apply_transaction_filters(transactions, account, category, date_from, date_to)
+
+
+def filter_archived_transactions(
+    user_id: int,
+    account=None,
+    category=None,
+    date_from: date | None = None,
+    date_to: date | None = None,
+) -> QuerySet:
+    """
+    Returns a user's archived transactions matching the given filters, with what the transaction list shows.
+    Archived transactions keep no pending state, so they can't be filtered by it.
+    """
+    transactions = ArchivedTransaction.objects.filter(user_id=user_id).select_related(
+        "account", "merchant", "category"
+    )
+    return apply_transaction_filters(transactions, account, category, date_from, date_to)
+
+
+def apply_transaction_filters(
+    transactions: QuerySet, account=None, category=None, date_from: date | None = None, date_to: date | None = None
+) -> QuerySet:
+    """
+    Narrows live or archived transactions down to the filters both of them support.
+    """
+    if account is not None:
+        transactions = transactions.filter(account=account)
+    if category is not None:
+        transactions = transactions.filter(category=category)
+    if date_from is not None:
+        transactions = transactions.filter(date__gte=date_from)
+    if date_to is not None:
+        transactions = transactions.filter(date__lte=date_to)
+
+    return transactions
+
+
+def seek_transactions(transactions: QuerySet, after: tuple[date, int] | None = None) -> QuerySet:
+    """
+    Returns `transactions` or archived transactions following the (date, id) position `after`, newest first.
+    The position is a keyset condition rather than an offset, so the query enters the (date, id) index right at
+    the position and a deep page costs the same as the first one.
+    """
+    transactions = transactions.order_by("-date", "-id")
+    if after is None:
+        return transactions
+
+    day, pk = after
+    # The date bound alone is what the index seeks to, the rest skips the rows of that day already returned
+    return transactions.filter(date__lte=day).filter(Q(date__lt=day) | Q(id__lt=pk))
+
+
+def get_transaction_page(
+    transactions: QuerySet, after: tuple[date, int] | None = None, page_size: int | None = None
+) -> TransactionPage:
+    """
+    Returns the page of `transactions` following the (date, id) position `after`.
+    """
+    page_size = page_size or settings.PLAID_TRANSACTIONS_PAGE_SIZE
+
+    # One extra row tells whether there is a next page
+    rows = list(seek_transactions(transactions, after)[: page_size + 1])
+    next_cursor = encode_cursor(rows[page_size - 1]) if len(rows) > page_size else None
+    return TransactionPage(transactions=rows[:page_size], next_cursor=next_cursor)
+
+
+def serialize_transaction(transaction: Transaction) -> dict:
+    """
+    Returns the JSON representation of a transaction of the list.
+    """
+    return {
+        "transaction_id": transaction.transaction_id,
+        "account_id": transaction.account.account_id,
+        "account_name": transaction.account.name,
+        "date": transaction.date,
+        "name": transaction.name,
+        "merchant_name": transaction.merchant_name,
+        "primary_personal_finance_category": transaction.primary_personal_finance_category,
+        "detailed_personal_finance_category": transaction.category.detailed if transaction.category_id else "",
+        "amount": transaction.amount,
+        "iso_currency_code": transaction.iso_currency_code,
+        "unofficial_currency_code": transaction.unofficial_currency_code,
+        "pending": transaction.pending,
+    }
+
+
+def serialize_archived_transaction(transaction: ArchivedTransaction) -> dict:
+    """
+    Returns the JSON representation of an archived transaction, as a transaction of the list without its pending state.
+    """
+    return {
+        "transaction_id": transaction.transaction_id,
+        "account_id": transaction.account.account_id,
+        "account_name": transaction.account.name,
+        "date": transaction.date,
+        "name": transaction.name,
+        "merchant_name": transaction.merchant_name,
+        "primary_personal_finance_category": transaction.primary_personal_finance_category,
+        "detailed_personal_finance_category": transaction.category.detailed if transaction.category_id else "",
+        "amount": transaction.amount,
+        "iso_currency_code": transaction.iso_currency_code,
+        "unofficial_currency_code": transaction.unofficial_currency_code,
+    }
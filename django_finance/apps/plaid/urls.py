@@ -2,6 +2,7 @@ from django.urls import path
 
 from django_finance.apps.plaid.views import (
     AccountsInItemView,
+    ArchivedTransactionListAPIView,
     CreatePlaidLinkEvent,
     CreatePlaidLinkToken,
     DashboardView,
@@ -10,12 +11,23 @@ from django_finance.apps.plaid.views import (
     PlaidSandboxItemFireWebhook,
     PlaidSandboxItemResetLogin,
     PlaidWebhook,
+    RollupSeriesAPIView,
+    TransactionListAPIView,
+    TransactionListView,
     UpdatePlaidItemStatus,
 )
 
 urlpatterns = [
     path("", DashboardView.as_view(), name="dashboard"),
     path("item-accounts/<int:pk>", AccountsInItemView.as_view(), name="account_list"),
+    path("transactions/", TransactionListView.as_view(), name="transaction_list"),
+    path("api/transactions/", TransactionListAPIView.as_view(), name="transaction_list_api"),
+    path(
+        "api/transactions/archived/",
+        ArchivedTransactionListAPIView.as_view(),
+        name="archived_transaction_list_api",
+    ),
+    path("api/rollups/", RollupSeriesAPIView.as_view(), name="rollup_series_api"),
     path("create-link-token/", CreatePlaidLinkToken.as_view(), name="create_link_token"),
     path(
         "exchange-public-token/",
@@ -1,4 +1,13 @@
+import hashlib
+import json
+import os
+import socket
+import threading
+
+import urllib3
 from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from urllib3.connection import HTTPConnection
 
 import plaid
 from plaid.api import plaid_api
@@ -22,7 +31,23 @@ class PlaidConfig:
         self.environment = self._get_plaid_environment()
         self.redirect_uri = self._get_redirect_uri()
         self.webhook_uri = self._get_webhook_uri()
-        self.client = self._initialize_client()
+        self._lock = threading.Lock()
+        self._client = None
+        self._client_pid = None
+
+    @property
+    def client(self) -> plaid_api.PlaidApi:
+        """
+        Returns the Plaid API client of the current process, shared by all of its threads.
+        urllib3 pools are thread-safe and sized by `PLAID_POOL_MAXSIZE`, so threads reuse warm connections.
+        A new client is created after a fork, so processes never share sockets.
+        """
+        if self._client is None or self._client_pid != os.getpid():
+            with self._lock:
+                if self._client is None or self._client_pid != os.getpid():
+                    self._client = self.create_client()
+                    self._client_pid = os.getpid()
+        return self._client
 
     def _get_plaid_environment(self) -> plaid.Environment:
         """
@@ -34,9 +59,9 @@ class PlaidConfig:
             return plaid.Environment.Sandbox
         return plaid.Environment.Sandbox
 
-    def _initialize_client(self) -> plaid_api.PlaidApi:
+    def create_client(self) -> plaid_api.PlaidApi:
         """
-        Initializes and returns the Plaid API client with the configured environment.
+        Initializes and returns a Plaid API client with the configured environment and connection pool settings.
         """
         configuration = plaid.Configuration(
             host=self.environment,
@@ -46,7 +71,24 @@ class PlaidConfig:
                 "plaidVersion": self.version,
             },
         )
+        configuration.connection_pool_maxsize = settings.PLAID_POOL_MAXSIZE
+        # Only retry failed connection attempts, a request that reached Plaid may not be safe to resend
+        configuration.retries = urllib3.Retry(
+            total=settings.PLAID_CONNECTION_RETRIES,
+            connect=settings.PLAID_CONNECTION_RETRIES,
+            read=0,
+            status=0,
+            redirect=0,
+            backoff_factor=0.2,
+        )
+        # Keep idle pooled connections alive so they can be reused instead of paying for a new TLS handshake
+        configuration.socket_options = HTTPConnection.default_socket_options + [
+            (socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1),
+        ]
+
         api_client = plaid.ApiClient(configuration)
+        # Wait for a free connection instead of opening throwaway ones once the pool is exhausted
+        api_client.rest_client.pool_manager.connection_pool_kw.update(block=True)
         return plaid_api.PlaidApi(api_client)
 
     def _get_products(self) -> list[Products]:
@@ -77,3 +119,20 @@ class PlaidConfig:
 
 
 plaid_config = PlaidConfig()
+
+
+def get_fingerprint(values: dict) -> str:
+    """
+    Returns a stable SHA-256 hash of the given values, used to detect whether Plaid data changed.
+    """
+    payload = json.dumps(values, sort_keys=True, cls=DjangoJSONEncoder)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def compact_location(location: dict | None) -> dict | None:
+    """
+    Returns a Plaid location without its null keys, or None when no key is set, which is the case of most
+    transactions.
+    """
+    location = {key: value for key, value in (location or {}).items() if value is not None}
+    return location or None
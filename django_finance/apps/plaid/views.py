@@ -1,25 +1,38 @@
 import json
 import logging
 
+from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.core.serializers.json import DjangoJSONEncoder
-from django.db.models import Sum
+from django.db.models import QuerySet
 from django.http import HttpResponse, JsonResponse
 from django.shortcuts import render
-from django.urls import reverse_lazy
+from django.urls import reverse, reverse_lazy
 from django.utils.decorators import method_decorator
 from django.views import View
 from django.views.decorators.csrf import csrf_exempt
 from django.views.generic import DeleteView, ListView
 from django.views.generic.base import TemplateView
 
-from django_finance.apps.plaid.models import Account, Item, PlaidLinkEvent, Transaction
-from django_finance.apps.plaid.tasks import update_transactions
+from django_finance.apps.plaid.dashboard import get_dashboard_context, invalidate_dashboard
+from django_finance.apps.plaid.forms import RollupSeriesForm, TransactionFilterForm
+from django_finance.apps.plaid.models import Account, Item, PlaidLinkEvent
+from django_finance.apps.plaid.ratelimit import call_plaid
+from django_finance.apps.plaid.rollups import get_rollup_series
+from django_finance.apps.plaid.summaries import rebuild_user_finance_summary
+from django_finance.apps.plaid.tasks import schedule_item_sync
+from django_finance.apps.plaid.transactions import (
+    TransactionPage,
+    filter_archived_transactions,
+    filter_transactions,
+    get_transaction_page,
+    serialize_archived_transaction,
+    serialize_transaction,
+)
 from django_finance.apps.plaid.utils import plaid_config
 from django_finance.apps.plaid.webhooks import (
-    handle_item_webhook,
-    handle_transactions_webhook,
+    enqueue_webhook,
+    handle_webhook,
     verify_webhook,
 )
 from plaid.model.item_public_token_exchange_request import (
@@ -43,49 +56,8 @@ class DashboardView(LoginRequiredMixin, TemplateView):
     template_name = "plaid/index.html"
 
     def get_context_data(self, *args, **kwargs) -> dict:
-        context = super(DashboardView, self).get_context_data()
-        user = self.request.user
-        items = Item.objects.filter(user=user)
-        name_of_banks_connected = items.values_list("institution_name", flat=True)
-
-        # Net worth across all banks
-        net_worth = Account.objects.filter(item__user=user).aggregate(Sum("current_balance"))["current_balance__sum"]
-
-        # Total income and total expense
-        total_income = Transaction.objects.filter(account__item__user=user, amount__gt=0).aggregate(Sum("amount"))[
-            "amount__sum"
-        ]
-        total_expense = Transaction.objects.filter(account__item__user=user, amount__lt=0).aggregate(Sum("amount"))[
-            "amount__sum"
-        ]
-
-        # 5 Recent transactions
-        transactions = Transaction.objects.filter(account__item__user=user)[:5]
-
-        # Category spending breakdown
-        category_spending = (
-            Transaction.objects.filter(account__item__user=user)
-            .values("primary_personal_finance_category")
-            .distinct()
-            .order_by()
-            .annotate(total_spending=Sum("amount"))
-        )
-
-        category_spending_json = json.dumps(list(category_spending), cls=DjangoJSONEncoder)  # For chart.js
-
-        context = {
-            "items": items,
-            "no_of_banks": items.count(),
-            "name_of_banks_connected": name_of_banks_connected,
-            "net_worth": net_worth,
-            "total_income": total_income,
-            "total_expense": total_expense,
-            "transactions": transactions,
-            "category_spending": category_spending,
-            "category_spending_json": category_spending_json,
-        }
-
-        return context
+        # Cached per user until a sync or item change bumps the user's dashboard version
+        return get_dashboard_context(self.request.user.id)
 
 
 class AccountsInItemView(LoginRequiredMixin, ListView):
@@ -98,6 +70,120 @@ class AccountsInItemView(LoginRequiredMixin, ListView):
         return Account.objects.filter(item_id=item_id)
 
 
+class TransactionPageMixin:
+    """
+    Reads the filters and position of the transaction list from the query string.
+    """
+
+    next_page_view_name = None
+
+    def get_transaction_page(self) -> tuple[TransactionFilterForm, TransactionPage | None]:
+        """
+        Returns the filter form and the requested page of the user's transactions, None when the form is invalid.
+        """
+        form = TransactionFilterForm(self.request.GET, user=self.request.user)
+        if not form.is_valid():
+            return form, None
+
+        return form, get_transaction_page(self.get_transactions(form), after=form.cleaned_data["cursor"])
+
+    def get_transactions(self, form: TransactionFilterForm) -> QuerySet:
+        return filter_transactions(self.request.user.id, **form.get_filters())
+
+    def get_next_url(self, page: TransactionPage | None) -> str | None:
+        """
+        Returns the URL of the next page with the same filters, None on the last page.
+        """
+        if page is None or page.next_cursor is None:
+            return None
+
+        params = self.request.GET.copy()
+        params["cursor"] = page.next_cursor
+        return f"{reverse(self.next_page_view_name)}?{params.urlencode()}"
+
+
+class TransactionListView(LoginRequiredMixin, TransactionPageMixin, TemplateView):
+    """
+    Lists a user's transactions, newest first. HTMX requests of the next pages only get their rows, which the list
+    loads as it is scrolled.
+    """
+
+    template_name = "plaid/transactions.html"
+    rows_template_name = "components/transaction_rows.html"
+    next_page_view_name = "transaction_list"
+
+    def get_template_names(self) -> list[str]:
+        if self.request.headers.get("HX-Request"):
+            return [self.rows_template_name]
+        return [self.template_name]
+
+    def get_context_data(self, *args, **kwargs) -> dict:
+        context = super().get_context_data(*args, **kwargs)
+        form, page = self.get_transaction_page()
+        context.update(
+            {
+                "form": form,
+                "transactions": page.transactions if page is not None else [],
+                "is_first_page": not (form.is_valid() and form.cleaned_data["cursor"]),
+                "next_url": self.get_next_url(page),
+            }
+        )
+        return context
+
+
+class TransactionListAPIView(LoginRequiredMixin, TransactionPageMixin, View):
+    """
+    JSON API of the transaction list, taking the same filters and cursor.
+    """
+
+    next_page_view_name = "transaction_list_api"
+
+    def get(self, request, *args, **kwargs):
+        form, page = self.get_transaction_page()
+        if page is None:
+            return JsonResponse({"errors": form.errors}, status=400)
+
+        return JsonResponse(
+            {
+                "results": [self.serialize_transaction(transaction) for transaction in page.transactions],
+                "next_cursor": page.next_cursor,
+                "next": self.get_next_url(page),
+            }
+        )
+
+    def serialize_transaction(self, transaction) -> dict:
+        return serialize_transaction(transaction)
+
+
+class ArchivedTransactionListAPIView(TransactionListAPIView):
+    """
+    JSON API of a user's archived transactions, taking the same filters and cursor except for `pending`.
+    """
+
+    next_page_view_name = "archived_transaction_list_api"
+
+    def get_transactions(self, form: TransactionFilterForm) -> QuerySet:
+        filters = form.get_filters()
+        filters.pop("pending")
+        return filter_archived_transactions(self.request.user.id, **filters)
+
+    def serialize_transaction(self, transaction) -> dict:
+        return serialize_archived_transaction(transaction)
+
+
+class RollupSeriesAPIView(LoginRequiredMixin, View):
+    """
+    JSON API of a user's transaction totals per day or month, optionally of a single account.
+    """
+
+    def get(self, request, *args, **kwargs):
+        form = RollupSeriesForm(request.GET, user=request.user)
+        if not form.is_valid():
+            return JsonResponse({"errors": form.errors}, status=400)
+
+        return JsonResponse({"results": get_rollup_series(request.user.id, **form.cleaned_data)})
+
+
 class CreatePlaidLinkToken(LoginRequiredMixin, View):
     """
     Create a link_token and pass the temporary token to your app's client.
@@ -129,7 +215,7 @@ class CreatePlaidLinkToken(LoginRequiredMixin, View):
             if new_accounts_detected:
                 link_request["update"] = LinkTokenCreateRequestUpdate(account_selection_enabled=True)
 
-            link_response = plaid_config.client.link_token_create(link_request)
+            link_response = call_plaid("link_token_create", link_request, max_retries=0)
             return JsonResponse(link_response.to_dict(), status=201)
         except Exception as e:
             logger.error(
@@ -158,7 +244,7 @@ class ExchangePlaidPublicAccessToken(LoginRequiredMixin, View):
                 return render(request, "components/bank_cards.html", {"items": items})
 
             exchange_request = ItemPublicTokenExchangeRequest(public_token=public_token)
-            exchange_response = plaid_config.client.item_public_token_exchange(exchange_request)
+            exchange_response = call_plaid("item_public_token_exchange", exchange_request, max_retries=0)
 
             access_token = exchange_response.get("access_token")
             item_id = exchange_response.get("item_id")
@@ -172,8 +258,10 @@ class ExchangePlaidPublicAccessToken(LoginRequiredMixin, View):
                 status=Item.ItemStatusChoices.GOOD,
             )
 
+            invalidate_dashboard(self.request.user.id)
+
             # Make an initial call to fetch transactions
-            update_transactions.delay(instance.id)
+            schedule_item_sync(instance.id)
 
             items = Item.objects.filter(user=self.request.user)
             return render(request, "components/bank_cards.html", {"items": items})
@@ -200,7 +288,7 @@ class PlaidRemoveItemView(LoginRequiredMixin, DeleteView):
         try:
             access_token = self.object.access_token
             remove_request = ItemRemoveRequest(access_token=access_token)
-            plaid_config.client.item_remove(remove_request)
+            call_plaid("item_remove", remove_request, max_retries=0)
         except Exception as e:
             logger.error(f"Something went wrong in removing plaid item with id {self.object.id} , error: {str(e)}")
             messages.error(
@@ -209,6 +297,9 @@ class PlaidRemoveItemView(LoginRequiredMixin, DeleteView):
             )
         else:
             self.object.delete()
+            # The item's transactions were deleted with it
+            rebuild_user_finance_summary(self.request.user.id)
+            invalidate_dashboard(self.request.user.id)
             logger.info("Plaid item deleted successfully")
         finally:
             items = Item.objects.filter(user=self.request.user)
@@ -262,6 +353,7 @@ class UpdatePlaidItemStatus(LoginRequiredMixin, View):
         try:
             plaid_id = json.loads(self.request.body).get("plaid_id")
             Item.objects.filter(id=plaid_id).update(status=Item.ItemStatusChoices.GOOD, new_accounts_detected=False)
+            invalidate_dashboard(self.request.user.id)
             return JsonResponse(
                 {
                     "msg": "Item updated successfully.",
@@ -289,7 +381,7 @@ class PlaidSandboxItemResetLogin(LoginRequiredMixin, View):
         try:
             access_token = Item.objects.first().access_token
             reset_login_request = SandboxItemResetLoginRequest(access_token)
-            plaid_config.client.sandbox_item_reset_login(reset_login_request)
+            call_plaid("sandbox_item_reset_login", reset_login_request, max_retries=0)
             return HttpResponse(status=200)
         except Exception as e:
             logger.error(f"Something went wrong in PlaidSandboxItemResetLogin {request.user} , error: {str(e)}")
@@ -305,7 +397,7 @@ class PlaidSandboxItemFireWebhook(LoginRequiredMixin, View):
         try:
             access_token = Item.objects.first().access_token
             reset_login_request = SandboxItemFireWebhookRequest(access_token, webhook_code="NEW_ACCOUNTS_AVAILABLE")
-            plaid_config.client.sandbox_item_fire_webhook(reset_login_request)
+            call_plaid("sandbox_item_fire_webhook", reset_login_request, max_retries=0)
             return HttpResponse(status=200)
         except Exception as e:
             logger.error(f"Something went wrong in PlaidSandboxItemFireWebhook {request.user} , error: {str(e)}")
@@ -322,16 +414,12 @@ class PlaidWebhook(View):
         try:
             if verify_webhook(request.body, request.headers):
                 payload = json.loads(request.body)
-                webhook_type = payload.get("webhook_type")
-                webhook_code = payload.get("webhook_code")
-                item_id = payload.get("item_id")
-                error = payload.get("error")
-
-                if webhook_type == "ITEM":
-                    handle_item_webhook(webhook_code, item_id, error)
 
-                elif webhook_type == "TRANSACTIONS":
-                    handle_transactions_webhook(webhook_code, item_id)
+                # Acknowledge right away and let a worker process it, Plaid retries slow webhooks
+                if settings.PLAID_WEBHOOK_INBOX:
+                    enqueue_webhook(payload)
+                else:
+                    handle_webhook(payload)
 
                 return HttpResponse(status=200)
 
@@ -2,21 +2,65 @@ import hashlib
 import hmac
 import logging
 import time
+from collections import defaultdict
+from datetime import timedelta
 
+import plaid
+from django.conf import settings
+from django.core.cache import cache
+from django.db.transaction import atomic, on_commit
+from django.utils import timezone
 from jose import jwt
 
-from django_finance.apps.plaid.models import Item
+from django_finance.apps.plaid.cache import TieredCache
+from django_finance.apps.plaid.dashboard import invalidate_dashboard_on_commit
+from django_finance.apps.plaid.models import Item, WebhookEvent
+from django_finance.apps.plaid.ratelimit import call_plaid
 from django_finance.apps.plaid.services import PlaidDatabaseService
-from django_finance.apps.plaid.tasks import update_transactions
-from django_finance.apps.plaid.utils import plaid_config
+from django_finance.apps.plaid.tasks import process_webhook_inbox, schedule_item_sync
 from plaid.model.webhook_verification_key_get_request import (
     WebhookVerificationKeyGetRequest,
 )
 
 logger = logging.getLogger(__name__)
 
-# Cache for webhook validation keys.
-KEY_CACHE = {}
+# Webhook verification keys by key id, shared by all workers through Django's cache.
+webhook_key_cache = TieredCache("plaid:webhook-key", maxsize=settings.PLAID_WEBHOOK_KEY_CACHE_SIZE)
+
+# Set while a drain of the webhook inbox is queued, cleared by the drain before it reads the inbox.
+WEBHOOK_DRAIN_SCHEDULED_KEY = "plaid:webhook-inbox:drain-scheduled"
+
+
+def fetch_verification_key(key_id) -> dict | None:
+    """
+    Fetches a webhook verification key from Plaid, returning None when Plaid doesn't know the key id.
+    https://plaid.com/docs/api/webhooks/webhook-verification/#webhook_verification_keyget
+    """
+    try:
+        request = WebhookVerificationKeyGetRequest(key_id=key_id)
+        # Verification runs while Plaid waits for the webhook response, so failures aren't retried here
+        res = call_plaid("webhook_verification_key_get", request, max_retries=0)
+    except plaid.ApiException as e:
+        # Other errors are transient and must not be cached as a missing key
+        if e.status is not None and 400 <= e.status < 500:
+            logger.info(f"Unknown webhook verification key {key_id}")
+            return None
+        raise
+
+    return res.to_dict().get("key")
+
+
+def get_verification_key(key_id) -> dict | None:
+    """
+    Returns the webhook verification key for `key_id`, fetching it from Plaid at most once per cache TTL.
+    Keys are re-fetched when their TTL runs out, which picks up keys Plaid has since expired.
+    """
+    return webhook_key_cache.get_or_set(
+        key_id,
+        lambda: fetch_verification_key(key_id),
+        ttl=settings.PLAID_WEBHOOK_KEY_TTL,
+        negative_ttl=settings.PLAID_WEBHOOK_KEY_NEGATIVE_TTL,
+    )
 
 
 def verify_webhook(body, headers) -> bool:
@@ -26,24 +70,14 @@ def verify_webhook(body, headers) -> bool:
     signed_jwt = headers.get("plaid-verification")
     current_key_id = jwt.get_unverified_header(signed_jwt)["kid"]
 
-    if current_key_id not in KEY_CACHE:
-        keys_ids_to_update = [key_id for key_id, key in KEY_CACHE.items() if key["expired_at"] is None]
-        keys_ids_to_update.append(current_key_id)
-
-        for key_id in keys_ids_to_update:
-            try:
-                request = WebhookVerificationKeyGetRequest(key_id=key_id)
-                res = plaid_config.client.webhook_verification_key_get(request)
-            except Exception:
-                continue
-            else:
-                key = res.to_dict().get("key")
-                KEY_CACHE[key_id] = key
-
-    if current_key_id not in KEY_CACHE:
+    try:
+        key = get_verification_key(current_key_id)
+    except Exception as e:
+        logger.error(f"Could not fetch webhook verification key {current_key_id}: {str(e)}")
         return False
 
-    key = KEY_CACHE[current_key_id]
+    if key is None:
+        return False
 
     if key["expired_at"] is not None:
         return False
@@ -97,4 +131,177 @@ def handle_transactions_webhook(webhook_code, item_id) -> None:
     """
     if webhook_code == "SYNC_UPDATES_AVAILABLE":
         item = Item.objects.filter(item_id=item_id).first()
-        update_transactions.delay(item.id)
+
+        if not item:
+            logger.error(f"Item with id {item_id} not found")
+            return
+
+        # Bursts of webhooks for the same item collapse into at most one queued sync
+        schedule_item_sync(item.id)
+
+
+def handle_webhook(payload: dict) -> None:
+    """
+    Dispatches a verified webhook payload to its handler.
+    """
+    webhook_type = payload.get("webhook_type")
+    webhook_code = payload.get("webhook_code")
+    item_id = payload.get("item_id")
+    error = payload.get("error")
+
+    if webhook_type == "ITEM":
+        handle_item_webhook(webhook_code, item_id, error)
+
+    elif webhook_type == "TRANSACTIONS":
+        handle_transactions_webhook(webhook_code, item_id)
+
+
+def enqueue_webhook(payload: dict) -> WebhookEvent:
+    """
+    Appends a verified webhook payload to the inbox and schedules a drain of the inbox once it is committed.
+    Bursts of webhooks schedule a single drain.
+    """
+    event = WebhookEvent.objects.create(
+        webhook_type=payload.get("webhook_type") or "",
+        webhook_code=payload.get("webhook_code") or "",
+        plaid_item_id=payload.get("item_id") or "",
+        payload=payload,
+    )
+
+    def schedule_drain():
+        if cache.add(WEBHOOK_DRAIN_SCHEDULED_KEY, True, timeout=60):
+            process_webhook_inbox.delay()
+
+    on_commit(schedule_drain)
+    return event
+
+
+def process_webhook_events(events: list[WebhookEvent]) -> dict[int, str]:
+    """
+    Applies a batch of inbox events with one query per kind of change instead of a few queries per event.
+    All referenced items are loaded in a single query, events are grouped per item, and repeated events for the same
+    item collapse into a single change, e.g. many SYNC_UPDATES_AVAILABLE schedule one sync.
+    Returns the errors of events that couldn't be applied, by event id.
+    """
+    items = Item.objects.in_bulk({event.plaid_item_id for event in events}, field_name="item_id")
+    events_by_item = defaultdict(list)
+    errors = {}
+
+    for event in events:
+        if event.plaid_item_id in items:
+            events_by_item[items[event.plaid_item_id].id].append(event)
+        elif event.webhook_type in ("ITEM", "TRANSACTIONS"):
+            logger.error(f"Item with id {event.plaid_item_id} not found")
+
+    bad_item_ids, new_accounts_item_ids = set(), set()
+    sync_events = defaultdict(list)
+
+    for item_id, item_events in events_by_item.items():
+        for event in item_events:
+            error = event.payload.get("error") or {}
+
+            if event.webhook_type == "ITEM":
+                if event.webhook_code == "PENDING_EXPIRATION" or (
+                    event.webhook_code == "ERROR" and error.get("error_code") == "ITEM_LOGIN_REQUIRED"
+                ):
+                    bad_item_ids.add(item_id)
+                elif event.webhook_code == "NEW_ACCOUNTS_AVAILABLE":
+                    new_accounts_item_ids.add(item_id)
+                elif event.webhook_code == "ERROR":
+                    logger.info(
+                        f"WEBHOOK: ITEMS: Plaid item id {event.plaid_item_id}: unhandled ITEM error "
+                        f"{error.get('error_message')}"
+                    )
+
+            elif event.webhook_type == "TRANSACTIONS" and event.webhook_code == "SYNC_UPDATES_AVAILABLE":
+                sync_events[item_id].append(event)
+
+    if bad_item_ids:
+        # Same value as `PlaidDatabaseService.update_item_to_bad_state`, which the bank cards template checks
+        Item.objects.filter(id__in=bad_item_ids).update(status="Bad", updated_at=timezone.now())
+        logger.info(f"{len(bad_item_ids)} PlaidItems updated to bad state.")
+
+    if new_accounts_item_ids:
+        Item.objects.filter(id__in=new_accounts_item_ids).update(new_accounts_detected=True, updated_at=timezone.now())
+        logger.info(f"{len(new_accounts_item_ids)} PlaidItems new accounts detected.")
+
+    # Bank cards on the dashboard show these flags
+    for user_id in {item.user_id for item in items.values() if item.id in bad_item_ids | new_accounts_item_ids}:
+        invalidate_dashboard_on_commit(user_id)
+
+    for item_id, item_events in sync_events.items():
+        try:
+            # A savepoint per item, so a failing one doesn't break the drain's transaction for the others.
+            # The sync is enqueued once the drain commits, so it can't run before the item is marked queued.
+            with atomic():
+                schedule_item_sync(item_id)
+        except Exception as e:
+            logger.error(f"Could not schedule a sync of plaid item {item_id}, {str(e)}")
+            errors.update({event.id: str(e) for event in item_events})
+
+    return errors
+
+
+def drain_webhook_inbox(batch_size: int | None = None) -> int:
+    """
+    Processes pending inbox events in batches, oldest first, until none are left.
+    Rows are locked with SKIP LOCKED, so concurrent drains split the inbox instead of processing events twice.
+    A failing event is retried by later drains until it has failed `PLAID_WEBHOOK_MAX_ATTEMPTS` times.
+    Returns the number of events processed.
+    """
+    batch_size = batch_size or settings.PLAID_WEBHOOK_BATCH_SIZE
+    cache.delete(WEBHOOK_DRAIN_SCHEDULED_KEY)
+    processed = 0
+    # Events failing in this drain are left for the next one, so it always terminates
+    failed_ids = set()
+
+    while True:
+        with atomic():
+            events = list(
+                WebhookEvent.objects.select_for_update(skip_locked=True)
+                .filter(status=WebhookEvent.StatusChoices.PENDING)
+                .exclude(id__in=failed_ids)
+                .order_by("id")[:batch_size]
+            )
+
+            if not events:
+                return processed
+
+            try:
+                with atomic():
+                    errors = process_webhook_events(events)
+            except Exception as e:
+                logger.error(f"Something went wrong processing a batch of {len(events)} webhook events, {str(e)}")
+                errors = {event.id: str(e) for event in events}
+
+            now = timezone.now()
+            for event in events:
+                if event.id in errors:
+                    failed_ids.add(event.id)
+                    event.attempts += 1
+                    event.error = errors[event.id]
+                    if event.attempts >= settings.PLAID_WEBHOOK_MAX_ATTEMPTS:
+                        event.status = WebhookEvent.StatusChoices.FAILED
+                else:
+                    event.status = WebhookEvent.StatusChoices.PROCESSED
+                    event.processed_at = now
+                    processed += 1
+
+            WebhookEvent.objects.bulk_update(events, ["status", "attempts", "error", "processed_at"])
+
+
+def prune_webhook_inbox(before=None, batch_size: int | None = None) -> int:
+    """
+    Deletes inbox events processed before `before`, `PLAID_WEBHOOK_RETENTION_DAYS` ago by default, in batches.
+    Failed events are kept for inspection.
+    Returns the number of deleted events.
+    """
+    before = before or timezone.now() - timedelta(days=settings.PLAID_WEBHOOK_RETENTION_DAYS)
+    batch_size = batch_size or settings.PLAID_WEBHOOK_BATCH_SIZE
+    events = WebhookEvent.objects.filter(status=WebhookEvent.StatusChoices.PROCESSED, processed_at__lt=before)
+    deleted = 0
+
+    while ids := list(events.order_by("id").values_list("id", flat=True)[:batch_size]):
+        deleted += WebhookEvent.objects.filter(id__in=ids).delete()[0]
+
+    return deleted
@@ -110,6 +110,20 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+
+CACHE_URL = os.getenv("CACHE_URL", os.getenv("CELERY_BROKER_URL"))
+
+CACHES = {
+    "default": (
+        {"BACKEND": "django.core.cache.backends.redis.RedisCache", "LOCATION": CACHE_URL}
+        if CACHE_URL
+        else {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}
+    )
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 
@@ -214,9 +228,70 @@ PLAID_PRODUCTS = os.getenv("PLAID_PRODUCTS", "auth")
 PLAID_COUNTRY_CODES = os.getenv("PLAID_COUNTRY_CODES", "US")
 PLAID_CLIENT_ID = os.getenv("PLAID_CLIENT_ID")
 PLAID_SECRET = os.getenv("PLAID_SECRET")
+PLAID_SYNC_BATCH_SIZE = int(os.getenv("PLAID_SYNC_BATCH_SIZE", 500))
+PLAID_SYNC_MAX_WORKERS = int(os.getenv("PLAID_SYNC_MAX_WORKERS", 8))
+# Seconds after which a queued or running sync is considered lost and a new one may be enqueued.
+PLAID_SYNC_STALE_AFTER = int(os.getenv("PLAID_SYNC_STALE_AFTER", 60 * 60))
+# Per-item sync lock: lease duration, renewed after each saved page, how long a sync waits for it and how often
+# it retries meanwhile, in seconds.
+PLAID_LOCK_REDIS_URL = os.getenv("PLAID_LOCK_REDIS_URL", os.getenv("CELERY_BROKER_URL"))
+PLAID_SYNC_LOCK_TTL = int(os.getenv("PLAID_SYNC_LOCK_TTL", 15 * 60))
+PLAID_SYNC_LOCK_TIMEOUT = float(os.getenv("PLAID_SYNC_LOCK_TIMEOUT", 30))
+PLAID_SYNC_LOCK_POLL_INTERVAL = float(os.getenv("PLAID_SYNC_LOCK_POLL_INTERVAL", 0.5))
+PLAID_POOL_MAXSIZE = int(os.getenv("PLAID_POOL_MAXSIZE", PLAID_SYNC_MAX_WORKERS * 2))
+PLAID_CONNECT_TIMEOUT = float(os.getenv("PLAID_CONNECT_TIMEOUT", 5))
+PLAID_READ_TIMEOUT = float(os.getenv("PLAID_READ_TIMEOUT", 60))
+PLAID_CONNECTION_RETRIES = int(os.getenv("PLAID_CONNECTION_RETRIES", 3))
+# Requests per second allowed for each Plaid endpoint, shared by all workers through Redis. 0 disables the limiter.
+PLAID_RATE_LIMIT = float(os.getenv("PLAID_RATE_LIMIT", 20))
+PLAID_RATE_LIMIT_BURST = float(os.getenv("PLAID_RATE_LIMIT_BURST", PLAID_RATE_LIMIT))
+PLAID_RATE_LIMIT_REDIS_URL = os.getenv("PLAID_RATE_LIMIT_REDIS_URL", os.getenv("CELERY_BROKER_URL"))
+# Seconds the rate limiter stays on in-process buckets after a Redis error before trying Redis again.
+PLAID_RATE_LIMIT_REDIS_RETRY = float(os.getenv("PLAID_RATE_LIMIT_REDIS_RETRY", 30))
+PLAID_MAX_RETRIES = int(os.getenv("PLAID_MAX_RETRIES", 5))
+PLAID_RETRY_BACKOFF_BASE = float(os.getenv("PLAID_RETRY_BACKOFF_BASE", 0.5))
+PLAID_RETRY_BACKOFF_MAX = float(os.getenv("PLAID_RETRY_BACKOFF_MAX", 30))
+# Webhook verification keys: seconds a fetched key is cached, seconds an unknown key id is remembered as missing,
+# and how many keys each process keeps in memory in front of the shared cache.
+PLAID_WEBHOOK_KEY_TTL = int(os.getenv("PLAID_WEBHOOK_KEY_TTL", 60 * 60))
+PLAID_WEBHOOK_KEY_NEGATIVE_TTL = int(os.getenv("PLAID_WEBHOOK_KEY_NEGATIVE_TTL", 60))
+PLAID_WEBHOOK_KEY_CACHE_SIZE = int(os.getenv("PLAID_WEBHOOK_KEY_CACHE_SIZE", 128))
+# Store verified webhooks in an inbox table and process them from a worker instead of in the request.
+PLAID_WEBHOOK_INBOX = os.getenv("PLAID_WEBHOOK_INBOX", "false").lower() == "true"
+PLAID_WEBHOOK_BATCH_SIZE = int(os.getenv("PLAID_WEBHOOK_BATCH_SIZE", 100))
+PLAID_WEBHOOK_MAX_ATTEMPTS = int(os.getenv("PLAID_WEBHOOK_MAX_ATTEMPTS", 5))
+# Seconds between scheduled drains of the webhook inbox, picking up events whose drain was lost or that failed.
+PLAID_WEBHOOK_DRAIN_INTERVAL = int(os.getenv("PLAID_WEBHOOK_DRAIN_INTERVAL", 60))
+# Days processed webhook events are kept in the inbox, 0 keeps them forever.
+PLAID_WEBHOOK_RETENTION_DAYS = int(os.getenv("PLAID_WEBHOOK_RETENTION_DAYS", 7))
+# Seconds a user's dashboard stays cached. Entries are also replaced as soon as the user's data changes.
+PLAID_DASHBOARD_CACHE_TTL = int(os.getenv("PLAID_DASHBOARD_CACHE_TTL", 24 * 60 * 60))
+# Days after which transactions are moved to the archive table, 0 disables archiving. Plaid returns at most 730 days
+# of history, so a longer horizon keeps updates from Plaid away from archived transactions.
+PLAID_ARCHIVE_AFTER_DAYS = int(os.getenv("PLAID_ARCHIVE_AFTER_DAYS", 760))
+PLAID_ARCHIVE_BATCH_SIZE = int(os.getenv("PLAID_ARCHIVE_BATCH_SIZE", 1000))
+# Merchant and category ids each process keeps in memory for the sync writer, and seconds they are kept.
+PLAID_DIMENSION_CACHE_SIZE = int(os.getenv("PLAID_DIMENSION_CACHE_SIZE", 10000))
+PLAID_DIMENSION_CACHE_TTL = int(os.getenv("PLAID_DIMENSION_CACHE_TTL", 60 * 60))
+# Transactions per page of the transaction list and its JSON API.
+PLAID_TRANSACTIONS_PAGE_SIZE = int(os.getenv("PLAID_TRANSACTIONS_PAGE_SIZE", 50))
 
 # Celery
 CELERY_TIMEZONE = TIME_ZONE
 CELERY_BROKER_URL = os.getenv("CELERY_BROKER_URL")
 CELERY_RESULT_BACKEND = CELERY_BROKER_URL
 CELERY_BROKER_CONNECTION_RETRY_ON_STARTUP = True
+CELERY_BEAT_SCHEDULE = {
+    "process-plaid-webhook-inbox": {
+        "task": "django_finance.apps.plaid.tasks.process_webhook_inbox",
+        "schedule": PLAID_WEBHOOK_DRAIN_INTERVAL,
+    },
+    "prune-plaid-webhook-inbox": {
+        "task": "django_finance.apps.plaid.tasks.prune_old_webhook_events",
+        "schedule": 24 * 60 * 60,
+    },
+    "archive-plaid-transactions": {
+        "task": "django_finance.apps.plaid.tasks.archive_old_transactions",
+        "schedule": 24 * 60 * 60,
+    },
+}
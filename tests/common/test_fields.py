@@ -0,0 +1,47 @@
+from decimal import Decimal
+
+import pytest
+
+from django_finance.apps.common.fields import (
+    from_minor_units,
+    get_currency_exponent,
+    to_minor_units,
+)
+from django_finance.apps.plaid.models import Transaction
+from tests.plaid.factories import TransactionFactory
+
+
+class TestCurrencyExponent:
+    @pytest.mark.parametrize(
+        "iso_currency_code, unofficial_currency_code, exponent",
+        [("USD", "", 2), ("JPY", "", 0), ("KWD", "", 3), ("", "BTC", 8), ("", "", 2)],
+    )
+    def test_get_currency_exponent(self, iso_currency_code, unofficial_currency_code, exponent):
+        assert get_currency_exponent(iso_currency_code, unofficial_currency_code) == exponent
+
+    def test_conversion(self):
+        assert to_minor_units(12.345, 2) == 1234
+        assert to_minor_units(Decimal("-0.005"), 2) == 0
+        assert to_minor_units("500", 0) == 500
+        assert from_minor_units(-1234, 2) == Decimal("-12.34")
+
+
+@pytest.mark.django_db
+class TestMinorUnitsField:
+    def test_stored_as_minor_units(self):
+        transaction = TransactionFactory.create(amount=Decimal("12.34"), iso_currency_code="USD")
+        assert Transaction.objects.filter(id=transaction.id).values_list("amount", flat=True).get() == 1234
+        assert Transaction.objects.get(id=transaction.id).amount == Decimal("12.34")
+
+    def test_uses_currency_of_the_row(self):
+        transaction = TransactionFactory.create(amount=500, iso_currency_code="JPY")
+        assert Transaction.objects.filter(id=transaction.id).values_list("amount", flat=True).get() == 500
+        assert Transaction.objects.get(id=transaction.id).amount == Decimal(500)
+
+    def test_assigned_amount_is_rounded_to_the_currency(self):
+        transaction = Transaction(amount=12.345, iso_currency_code="USD")
+        assert transaction.amount == Decimal("12.34")
+
+    def test_null(self):
+        transaction = TransactionFactory.create(amount=None)
+        assert Transaction.objects.get(id=transaction.id).amount is None
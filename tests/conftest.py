@@ -1,6 +1,8 @@
 import pytest
+from django.core.cache import cache
 from django.test import Client
 
+from django_finance.apps.plaid import dimensions
 from tests.accounts.factories import UserFactory
 
 
@@ -68,3 +70,14 @@ def login(client, create_user, test_password):
         return client, user
 
     return _make_login
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    """
+    Fixture clearing Django's cache and the process-local dimension ids, so cached values don't leak between tests
+    reusing the same ids.
+    """
+    cache.clear()
+    dimensions.merchants.clear()
+    dimensions.categories.clear()
@@ -1,6 +1,13 @@
 import factory
 
-from django_finance.apps.plaid.models import Account, Item, PlaidLinkEvent, Transaction
+from django_finance.apps.plaid.models import (
+    Account,
+    Item,
+    Merchant,
+    PersonalFinanceCategory,
+    PlaidLinkEvent,
+    Transaction,
+)
 from tests.accounts.factories import UserFactory
 
 
@@ -9,8 +16,8 @@ class ItemFactory(factory.django.DjangoModelFactory):
         model = Item
 
     user = factory.SubFactory(UserFactory)
-    access_token = factory.Faker("word")
-    item_id = factory.Faker("word")
+    access_token = factory.Sequence(lambda n: f"access-sandbox-{n}")
+    item_id = factory.Sequence(lambda n: f"item-{n}")
     institution_id = factory.Faker("word")
     institution_name = factory.Faker("word")
 
@@ -35,7 +42,8 @@ class AccountFactory(factory.django.DjangoModelFactory):
         model = Account
 
     item = factory.SubFactory(ItemFactory)
-    account_id = factory.Faker("word")
+    user = factory.SelfAttribute("item.user")
+    account_id = factory.Sequence(lambda n: f"account-{n}")
     name = factory.Faker("word")
     account_type = factory.Faker(
         "random_element",
@@ -43,12 +51,41 @@ class AccountFactory(factory.django.DjangoModelFactory):
     )
 
 
+class MerchantFactory(factory.django.DjangoModelFactory):
+    class Meta:
+        model = Merchant
+        django_get_or_create = ("entity_id", "name")
+
+    entity_id = factory.Sequence(lambda n: f"merchant-{n}")
+    name = factory.Faker("company")
+
+
+class PersonalFinanceCategoryFactory(factory.django.DjangoModelFactory):
+    class Meta:
+        model = PersonalFinanceCategory
+        django_get_or_create = ("primary", "detailed")
+
+    primary = "GENERAL_MERCHANDISE"
+    detailed = ""
+
+
 class TransactionFactory(factory.django.DjangoModelFactory):
     class Meta:
         model = Transaction
 
+    class Params:
+        primary_personal_finance_category = ""
+
     account = factory.SubFactory(AccountFactory)
-    transaction_id = factory.Faker("word")
+    user = factory.SelfAttribute("account.user")
+    transaction_id = factory.Sequence(lambda n: f"transaction-{n}")
     location = factory.Faker("json")
     pending = factory.Faker("boolean")
     date = factory.Faker("date")
+    category = factory.Maybe(
+        "primary_personal_finance_category",
+        yes_declaration=factory.SubFactory(
+            PersonalFinanceCategoryFactory, primary=factory.SelfAttribute("..primary_personal_finance_category")
+        ),
+        no_declaration=None,
+    )
@@ -0,0 +1,82 @@
+from datetime import date
+from decimal import Decimal
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from django_finance.apps.plaid.archive import archive_transactions
+from django_finance.apps.plaid.models import Account, ArchivedTransaction, Item, Transaction
+from django_finance.apps.plaid.partitions import ensure_partitions, next_month, partition_name
+from django_finance.apps.plaid.rollups import rebuild_daily_rollups
+from django_finance.apps.plaid.summaries import rebuild_user_finance_summary
+from django_finance.apps.plaid.tasks import archive_old_transactions
+from tests.plaid.factories import AccountFactory, ItemFactory, TransactionFactory
+
+pytestmark = pytest.mark.django_db
+
+
+class TestArchiveTransactions:
+    @pytest.fixture
+    def account(self, create_user) -> Account:
+        item: Item = ItemFactory.create(user=create_user())
+        return AccountFactory.create(item=item)
+
+    def test_moves_old_transactions(self, account: Account):
+        old = TransactionFactory.create(account=account, date=date(2020, 1, 15), amount=Decimal("-20"))
+        recent = TransactionFactory.create(account=account, date=date(2024, 1, 15))
+
+        assert archive_transactions(before=date(2023, 1, 1)) == 1
+
+        assert list(Transaction.objects.values_list("id", flat=True)) == [recent.id]
+        archived = ArchivedTransaction.objects.get()
+        assert archived.transaction_id == old.transaction_id
+        assert archived.user_id == account.user_id
+        assert archived.amount == Decimal("-20")
+
+    def test_archives_in_batches(self, account: Account):
+        TransactionFactory.create_batch(3, account=account, date=date(2020, 1, 15))
+        assert archive_transactions(before=date(2023, 1, 1), batch_size=2) == 3
+        assert ArchivedTransaction.objects.count() == 3
+        assert not Transaction.objects.exists()
+
+    def test_archived_transactions_stay_in_totals(self, account: Account):
+        TransactionFactory.create(account=account, date=date(2020, 1, 15), amount=Decimal("-20"))
+        TransactionFactory.create(account=account, date=date(2024, 1, 15), amount=Decimal("50"))
+        archive_transactions(before=date(2023, 1, 1))
+
+        summary = rebuild_user_finance_summary(account.user_id)
+
+        assert summary.total_income == Decimal("50")
+        assert summary.total_expense == Decimal("-20")
+        assert rebuild_daily_rollups(account.user_id) == 2
+
+    def test_task_disabled(self, settings, account: Account):
+        settings.PLAID_ARCHIVE_AFTER_DAYS = 0
+        TransactionFactory.create(account=account, date=date(2000, 1, 1))
+        assert archive_old_transactions() == 0
+        assert Transaction.objects.exists()
+
+    def test_command(self, account: Account):
+        TransactionFactory.create(account=account, date=date(2020, 1, 15))
+        out = StringIO()
+
+        call_command("archive_transactions", "--before", "2023-01-01", stdout=out)
+
+        assert "Archived 1 transactions dated before 2023-01-01." in out.getvalue()
+
+
+class TestPartitions:
+    def test_partition_name(self):
+        assert partition_name(ArchivedTransaction, date(2024, 3, 1)) == "plaid_archivedtransaction_2024_03"
+
+    def test_next_month(self):
+        assert next_month(date(2024, 3, 1)) == date(2024, 4, 1)
+        assert next_month(date(2024, 12, 1)) == date(2025, 1, 1)
+
+    def test_not_partitioned(self):
+        assert ensure_partitions(ArchivedTransaction, [date(2024, 3, 10)]) == []
+
+        out = StringIO()
+        call_command("maintain_archive_partitions", stdout=out)
+        assert "isn't partitioned" in out.getvalue()
@@ -0,0 +1,76 @@
+import threading
+import time
+
+
+from django_finance.apps.plaid.cache import LOCK_STRIPES, MISSING, LocalTTLCache, TieredCache
+
+
+class TestLocalTTLCache:
+    def test_expiry(self, mocker):
+        local = LocalTTLCache(maxsize=2)
+        local.set("a", 1, ttl=10)
+        assert local.get("a") == 1
+        mocker.patch("django_finance.apps.plaid.cache.time.monotonic", return_value=time.monotonic() + 11)
+        assert local.get("a") is MISSING
+
+    def test_evicts_least_recently_used(self):
+        local = LocalTTLCache(maxsize=2)
+        local.set("a", 1, ttl=10)
+        local.set("b", 2, ttl=10)
+        local.get("a")
+        local.set("c", 3, ttl=10)
+        assert local.get("a") == 1
+        assert local.get("b") is MISSING
+        assert local.get("c") == 3
+
+
+class TestTieredCache:
+    def test_shared_between_processes(self):
+        TieredCache("test", maxsize=8).set("a", {"kid": "a"}, ttl=60)
+        other = TieredCache("test", maxsize=8)
+        assert other.get("a") == {"kid": "a"}
+        assert other.local.get("a") == {"kid": "a"}
+
+    def test_negative_caching(self, mocker):
+        tiered = TieredCache("test", maxsize=8)
+        fetch = mocker.Mock(return_value=None)
+        assert tiered.get_or_set("a", fetch, ttl=60, negative_ttl=5) is None
+        assert tiered.get_or_set("a", fetch, ttl=60, negative_ttl=5) is None
+        fetch.assert_called_once()
+
+    def test_single_flight(self):
+        tiered = TieredCache("test", maxsize=8)
+        calls = []
+        started = threading.Event()
+
+        def fetch():
+            calls.append(1)
+            started.set()
+            time.sleep(0.05)
+            return "value"
+
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(tiered.get_or_set("a", fetch, ttl=60, negative_ttl=5)))
+            for _ in range(5)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert results == ["value"] * 5
+        assert len(calls) == 1
+
+    def test_locks_are_bounded(self):
+        tiered = TieredCache("test", maxsize=8)
+        for kid in range(LOCK_STRIPES * 2):
+            tiered.get_or_set(str(kid), lambda: None, ttl=60, negative_ttl=5)
+        assert len(tiered._locks) == LOCK_STRIPES
+
+    def test_shared_cache_failure(self, mocker):
+        tiered = TieredCache("test", maxsize=8)
+        mocker.patch("django_finance.apps.plaid.cache.caches").__getitem__.side_effect = ConnectionError("down")
+        tiered.set("a", 1, ttl=60)
+        assert tiered.get("a") == 1
+        assert tiered.get("b") is MISSING
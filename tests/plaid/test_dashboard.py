@@ -0,0 +1,93 @@
+from decimal import Decimal
+
+import pytest
+
+from django_finance.apps.plaid.dashboard import (
+    get_dashboard_context,
+    get_dashboard_summary,
+    invalidate_dashboard,
+)
+from django_finance.apps.plaid.models import Item
+from django_finance.apps.plaid.services import PlaidDatabaseService
+from tests.plaid.dummy_data import TRANSACTIONS_ADDED
+from tests.plaid.factories import AccountFactory, ItemFactory, TransactionFactory
+
+pytestmark = pytest.mark.django_db
+
+
+class TestDashboardSummary:
+    @pytest.fixture
+    def user_with_data(self, create_user):
+        user = create_user()
+        item: Item = ItemFactory.create(user=user, institution_name="BOA")
+        account = AccountFactory.create(item=item, current_balance=Decimal("1000"))
+        AccountFactory.create(item=ItemFactory.create(user=user), current_balance=Decimal("-200"))
+        TransactionFactory.create(account=account, amount=Decimal("50"), primary_personal_finance_category="INCOME")
+        TransactionFactory.create(account=account, amount=Decimal("-20"), primary_personal_finance_category="RENT")
+        TransactionFactory.create(account=account, amount=Decimal("-5"), primary_personal_finance_category="RENT")
+        TransactionFactory.create(amount=Decimal("999"))
+        return user
+
+    def test_get_dashboard_summary(self, user_with_data):
+        summary = get_dashboard_summary(user_with_data.id)
+
+        assert summary.no_of_banks == 2
+        assert "BOA" in summary.name_of_banks_connected
+        assert summary.net_worth == Decimal("800")
+        assert summary.total_income == Decimal("50")
+        assert summary.total_expense == Decimal("-25")
+        assert {
+            row["primary_personal_finance_category"]: row["total_spending"] for row in summary.category_spending
+        } == {
+            "INCOME": Decimal("50"),
+            "RENT": Decimal("-25"),
+        }
+
+    def test_empty_dashboard(self, create_user):
+        summary = get_dashboard_summary(create_user().id)
+
+        assert summary.items == []
+        assert summary.net_worth is None
+        assert summary.total_income is None
+        assert summary.total_expense is None
+        assert summary.category_spending_json == "[]"
+
+
+class TestDashboardCache:
+    def test_cached_until_invalidated(self, create_user, django_assert_num_queries):
+        user = create_user()
+        item: Item = ItemFactory.create(user=user)
+        get_dashboard_context(user.id)
+
+        with django_assert_num_queries(0):
+            context = get_dashboard_context(user.id)
+        assert context["no_of_banks"] == 1
+
+        ItemFactory.create(user=user)
+        invalidate_dashboard(user.id)
+
+        assert get_dashboard_context(user.id)["no_of_banks"] == 2
+        assert item in get_dashboard_context(user.id)["items"]
+
+    def test_sync_write_invalidates(self, create_user, django_capture_on_commit_callbacks):
+        user = create_user()
+        item: Item = ItemFactory.create(user=user)
+        account = AccountFactory.create(item=item, account_id=TRANSACTIONS_ADDED[0]["account_id"])
+        assert get_dashboard_context(user.id)["total_income"] is None
+
+        with django_capture_on_commit_callbacks(execute=True):
+            PlaidDatabaseService(item).create_or_update_transactions(
+                TRANSACTIONS_ADDED, accounts={account.account_id: account}
+            )
+
+        assert get_dashboard_context(user.id)["total_income"] is not None
+
+    def test_other_users_are_not_invalidated(self, create_user, django_assert_num_queries):
+        user = create_user()
+        other = create_user("other@example.com")
+        get_dashboard_context(user.id)
+
+        invalidate_dashboard(other.id)
+
+        with django_assert_num_queries(0):
+            get_dashboard_context(user.id)
@@ -0,0 +1,88 @@
+from decimal import Decimal
+
+import pytest
+
+from django_finance.apps.plaid.dimensions import categories, merchants
+from django_finance.apps.plaid.models import Item, Merchant, PersonalFinanceCategory, Transaction
+from django_finance.apps.plaid.services import PlaidDatabaseService
+from django_finance.apps.plaid.summaries import aggregate_transactions_by_category
+from tests.plaid.dummy_data import TRANSACTIONS_ADDED
+from tests.plaid.factories import (
+    AccountFactory,
+    ItemFactory,
+    MerchantFactory,
+    PersonalFinanceCategoryFactory,
+    TransactionFactory,
+)
+
+pytestmark = pytest.mark.django_db
+
+WALMART = ("walmart-id", "Walmart")
+
+
+class TestDimensionTable:
+    def test_resolve_inserts_missing_rows(self):
+        existing = MerchantFactory.create(entity_id="", name="Target", website="target.com", logo_url=None)
+        ids = merchants.resolve(
+            {
+                WALMART: {"logo_url": None, "website": "walmart.com"},
+                ("", "Target"): {"logo_url": None, "website": "target.com"},
+            }
+        )
+        assert ids[("", "Target")] == existing.id
+        assert Merchant.objects.get(id=ids[WALMART]).website == "walmart.com"
+
+    def test_resolve_updates_changed_attributes(self):
+        ids = categories.resolve({("FOOD_AND_DRINK", ""): {"icon_url": None}})
+        categories.resolve({("FOOD_AND_DRINK", ""): {"icon_url": "https://example.com/food.png"}})
+        assert PersonalFinanceCategory.objects.get(id=ids[("FOOD_AND_DRINK", "")]).icon_url == (
+            "https://example.com/food.png"
+        )
+
+    def test_resolved_ids_cached_on_commit(self, django_assert_num_queries, django_capture_on_commit_callbacks):
+        rows = {WALMART: {"logo_url": None, "website": "walmart.com"}}
+        with django_capture_on_commit_callbacks() as callbacks:
+            ids = merchants.resolve(rows)
+
+        # Not cached until the transaction commits, the insert could still be rolled back
+        with django_assert_num_queries(1):
+            merchants.resolve(rows)
+
+        for callback in callbacks:
+            callback()
+        with django_assert_num_queries(0):
+            assert merchants.resolve(rows) == ids
+        # Changed attributes bypass the cache
+        with django_assert_num_queries(2):
+            merchants.resolve({WALMART: {"logo_url": None, "website": "walmart.co.uk"}})
+
+
+class TestTransactionDimensions:
+    def test_transactions_share_merchants_and_categories(self, create_user):
+        user = create_user()
+        item: Item = ItemFactory.create(user=user)
+        AccountFactory.create(item=item, account_id=TRANSACTIONS_ADDED[0]["account_id"])
+        copy = {**TRANSACTIONS_ADDED[0], "transaction_id": "copy"}
+        PlaidDatabaseService(item).create_or_update_transactions([*TRANSACTIONS_ADDED, copy])
+
+        transaction, other = Transaction.objects.filter(
+            transaction_id__in=[TRANSACTIONS_ADDED[0]["transaction_id"], "copy"]
+        )
+        assert (transaction.merchant_id, transaction.category_id) == (other.merchant_id, other.category_id)
+        assert transaction.merchant.entity_id == TRANSACTIONS_ADDED[0]["merchant_entity_id"]
+        assert transaction.merchant.logo_url == TRANSACTIONS_ADDED[0]["logo_url"]
+        icon_url = TRANSACTIONS_ADDED[0]["personal_finance_category_icon_url"]
+        assert transaction.personal_finance_category_icon_url == icon_url
+
+    def test_detailed_categories_grouped_by_primary(self, item: Item):
+        account = AccountFactory.create(item=item)
+        for detailed, amount in [("FOOD_AND_DRINK_GROCERIES", "-10"), ("FOOD_AND_DRINK_COFFEE", "-5")]:
+            TransactionFactory.create(
+                account=account,
+                amount=Decimal(amount),
+                category=PersonalFinanceCategoryFactory.create(primary="FOOD_AND_DRINK", detailed=detailed),
+            )
+
+        [row] = aggregate_transactions_by_category(item.user_id)
+        assert row["primary_personal_finance_category"] == "FOOD_AND_DRINK"
+        assert (row["total"], row["count"]) == (Decimal("-15"), 2)
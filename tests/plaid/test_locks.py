@@ -0,0 +1,76 @@
+import threading
+
+from django_finance.apps.plaid.locks import ItemLock
+
+
+class TestItemLock:
+    def test_exclusive(self):
+        lock = ItemLock(1)
+        other = ItemLock(1)
+        assert lock.try_acquire()
+        assert lock.backend == "local"
+        assert not other.try_acquire()
+        lock.release()
+        assert other.try_acquire()
+        other.release()
+
+    def test_locks_are_per_item(self):
+        lock = ItemLock(1)
+        other = ItemLock(2)
+        assert lock.try_acquire()
+        assert other.try_acquire()
+        lock.release()
+        other.release()
+
+    def test_acquire_times_out(self, settings):
+        settings.PLAID_SYNC_LOCK_POLL_INTERVAL = 0.01
+        lock = ItemLock(1)
+        assert lock.try_acquire()
+        acquired = []
+        thread = threading.Thread(target=lambda: acquired.append(ItemLock(1).acquire(timeout=0.05)))
+        thread.start()
+        thread.join()
+        lock.release()
+        assert acquired == [False]
+
+    def test_redis_lock(self, mocker):
+        client = mocker.Mock()
+        client.set.return_value = True
+        mocker.patch("django_finance.apps.plaid.locks.get_redis", return_value=client)
+        lock = ItemLock(1, ttl=10)
+
+        assert lock.try_acquire()
+        client.set.assert_called_once_with("plaid:lock:item:1", lock.token, nx=True, px=10000)
+        lock.release()
+        client.eval.assert_called_once()
+        assert client.eval.call_args.args[1:] == (1, "plaid:lock:item:1", lock.token)
+
+    def test_redis_lock_renew(self, mocker):
+        client = mocker.Mock()
+        client.set.return_value = True
+        client.eval.side_effect = [1, 0]
+        mocker.patch("django_finance.apps.plaid.locks.get_redis", return_value=client)
+        lock = ItemLock(1, ttl=10)
+
+        assert lock.try_acquire()
+        assert lock.renew()
+        assert client.eval.call_args.args[1:] == (1, "plaid:lock:item:1", lock.token, 10000)
+        # The lease expired and was taken over by another worker
+        assert not lock.renew()
+
+    def test_local_lock_renew(self):
+        lock = ItemLock(1)
+        assert not lock.renew()
+        assert lock.try_acquire()
+        assert lock.renew()
+        lock.release()
+
+    def test_falls_back_when_redis_unavailable(self, mocker):
+        client = mocker.Mock()
+        client.set.side_effect = ConnectionError("Connection refused")
+        mocker.patch("django_finance.apps.plaid.locks.get_redis", return_value=client)
+        lock = ItemLock(1)
+
+        assert lock.try_acquire()
+        assert lock.backend == "local"
+        lock.release()
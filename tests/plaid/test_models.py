@@ -1,6 +1,12 @@
+from datetime import date
+
 import pytest
+from django.db import connection
+from django.db.models import QuerySet
 
-from django_finance.apps.plaid.models import Item, PlaidLinkEvent
+from django_finance.apps.plaid.models import Item, PlaidLinkEvent, Transaction
+from django_finance.apps.plaid.summaries import aggregate_transactions_by_category
+from django_finance.apps.plaid.transactions import filter_transactions, seek_transactions
 
 pytestmark = pytest.mark.django_db
 
@@ -13,3 +19,33 @@ class TestItemModel:
 class TestPlaidLinkEventModel:
     def test_str(self, link_event: PlaidLinkEvent):
         assert f"LinkEvent: user_id={link_event.user_id}, type={link_event.event_type}" == str(link_event)
+
+
+class TestTransactionIndexes:
+    @pytest.fixture(autouse=True)
+    def prefer_indexes(self):
+        # The planner would rightly scan the few rows of a test table, ask it for its best indexed plan instead
+        if connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                cursor.execute("SET LOCAL enable_seqscan = off")
+
+    def assert_index_scan(self, plan: str, index: str | None = None, table: str = "plaid_transaction"):
+        assert f"SCAN {table}" not in plan
+        assert f"Seq Scan on {table}" not in plan
+        if index is not None:
+            assert index in plan
+
+    def test_recent_transactions(self, item: Item):
+        plan = Transaction.objects.filter(user_id=item.user_id)[:5].explain()
+        self.assert_index_scan(plan, "plaid_txn_user_date_idx")
+
+    def test_transaction_list_page(self, item: Item):
+        plan = seek_transactions(filter_transactions(item.user_id), after=(date(2024, 1, 1), 100))[:50].explain()
+        self.assert_index_scan(plan, "plaid_txn_user_date_idx")
+
+    def test_category_totals(self, item: Item, mocker):
+        annotate = mocker.spy(QuerySet, "annotate")
+        aggregate_transactions_by_category(item.user_id)
+        transactions, archived = annotate.spy_return_list
+        self.assert_index_scan(transactions.explain())
+        self.assert_index_scan(archived.explain(), table="plaid_archivedtransaction")
@@ -0,0 +1,132 @@
+import plaid
+import pytest
+import urllib3
+
+from django_finance.apps.plaid.ratelimit import (
+    TokenBucketRateLimiter,
+    backoff_delay,
+    call_plaid,
+    is_retryable,
+)
+from django_finance.apps.plaid.utils import plaid_config
+from plaid.model.accounts_get_request import AccountsGetRequest
+
+
+def make_api_exception(status, body):
+    exception = plaid.ApiException(status=status, reason="Error")
+    exception.body = body
+    return exception
+
+
+class TestTokenBucketRateLimiter:
+    def test_burst_then_wait(self):
+        limiter = TokenBucketRateLimiter(rate=1, capacity=2)
+        assert limiter._reserve("transactions_sync") == 0
+        assert limiter._reserve("transactions_sync") == 0
+        assert 0 < limiter._reserve("transactions_sync") <= 1
+
+    def test_buckets_are_per_key(self):
+        limiter = TokenBucketRateLimiter(rate=1, capacity=1)
+        assert limiter._reserve("transactions_sync") == 0
+        assert limiter._reserve("accounts_get") == 0
+
+    def test_acquire_sleeps_until_token_available(self, mocker):
+        mock_sleep = mocker.patch("django_finance.apps.plaid.ratelimit.time.sleep")
+        limiter = TokenBucketRateLimiter(rate=10, capacity=1)
+        mocker.patch.object(limiter, "_reserve", side_effect=[0.1, 0])
+        limiter.acquire()
+        mock_sleep.assert_called_once_with(0.1)
+
+    def test_disabled(self, mocker):
+        limiter = TokenBucketRateLimiter(rate=0, capacity=0)
+        mock_reserve = mocker.patch.object(limiter, "_reserve")
+        limiter.acquire()
+        mock_reserve.assert_not_called()
+
+    def test_falls_back_when_redis_unavailable(self):
+        limiter = TokenBucketRateLimiter(rate=1, capacity=1, redis_url="redis://localhost:1/0")
+        assert limiter._reserve("transactions_sync") == 0
+        assert limiter._redis_retry_at > 0
+
+    def test_retries_redis_after_cooldown(self, mocker):
+        limiter = TokenBucketRateLimiter(rate=1, capacity=1, redis_retry=30)
+        limiter._script = mocker.Mock(side_effect=[ConnectionError("Connection refused"), "0.5"])
+        mock_monotonic = mocker.patch("django_finance.apps.plaid.ratelimit.time.monotonic", return_value=100)
+
+        assert limiter._reserve("transactions_sync") == 0
+        assert limiter._reserve("transactions_sync") == 1
+        assert limiter._script.call_count == 1
+
+        mock_monotonic.return_value = 130
+        assert limiter._reserve("transactions_sync") == 0.5
+        assert limiter._script.call_count == 2
+
+
+class TestCallPlaid:
+    @pytest.fixture
+    def mock_transactions_sync(self, mocker):
+        mocker.patch("django_finance.apps.plaid.ratelimit.time.sleep")
+        return mocker.patch("django_finance.apps.plaid.ratelimit.plaid_config.client.transactions_sync")
+
+    def test_retries_rate_limit(self, mock_transactions_sync):
+        response = object()
+        mock_transactions_sync.side_effect = [
+            make_api_exception(429, '{"error_type": "RATE_LIMIT_EXCEEDED"}'),
+            response,
+        ]
+        assert call_plaid("transactions_sync", "request") is response
+        assert mock_transactions_sync.call_count == 2
+
+    def test_gives_up_after_max_retries(self, settings, mock_transactions_sync):
+        settings.PLAID_MAX_RETRIES = 2
+        mock_transactions_sync.side_effect = make_api_exception(500, '{"error_type": "API_ERROR"}')
+        with pytest.raises(plaid.ApiException):
+            call_plaid("transactions_sync", "request")
+        assert mock_transactions_sync.call_count == 3
+
+    def test_max_retries_override(self, mock_transactions_sync):
+        mock_transactions_sync.side_effect = make_api_exception(500, '{"error_type": "API_ERROR"}')
+        with pytest.raises(plaid.ApiException):
+            call_plaid("transactions_sync", "request", max_retries=0)
+        assert mock_transactions_sync.call_count == 1
+
+    def test_does_not_retry_client_errors(self, mock_transactions_sync):
+        mock_transactions_sync.side_effect = make_api_exception(400, '{"error_type": "ITEM_ERROR"}')
+        with pytest.raises(plaid.ApiException):
+            call_plaid("transactions_sync", "request")
+        assert mock_transactions_sync.call_count == 1
+
+    def test_request_timeout(self, settings, mocker):
+        settings.PLAID_CONNECT_TIMEOUT = 2
+        settings.PLAID_READ_TIMEOUT = 30
+        pool_manager = plaid_config.client.api_client.rest_client.pool_manager
+        mock_request = mocker.patch.object(
+            pool_manager,
+            "request",
+            return_value=urllib3.HTTPResponse(body=b'{"error_type": "ITEM_ERROR"}', status=400, preload_content=False),
+        )
+        with pytest.raises(plaid.ApiException):
+            call_plaid("accounts_get", AccountsGetRequest(access_token="access-token"))
+
+        timeout = mock_request.call_args.kwargs["timeout"]
+        assert (timeout.connect_timeout, timeout.read_timeout) == (2, 30)
+
+
+class TestBackoff:
+    @pytest.mark.parametrize(
+        "status, body, retryable",
+        [
+            (429, "", True),
+            (500, '{"error_type": "API_ERROR", "error_code": "INTERNAL_SERVER_ERROR"}', True),
+            (400, '{"error_type": "RATE_LIMIT_EXCEEDED"}', True),
+            (400, '{"error_code": "TRANSACTIONS_SYNC_MUTATION_DURING_PAGINATION"}', False),
+            (400, '{"error_type": "INVALID_REQUEST"}', False),
+        ],
+    )
+    def test_is_retryable(self, status, body, retryable):
+        assert is_retryable(make_api_exception(status, body)) is retryable
+
+    def test_backoff_delay_is_capped(self, settings):
+        settings.PLAID_RETRY_BACKOFF_BASE = 1
+        settings.PLAID_RETRY_BACKOFF_MAX = 4
+        assert all(0 <= backoff_delay(attempt) <= 4 for attempt in range(10))
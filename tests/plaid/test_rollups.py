@@ -0,0 +1,159 @@
+from datetime import date
+from decimal import Decimal
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from django_finance.apps.plaid.models import Account, DailyTransactionRollup, Item
+from django_finance.apps.plaid.rollups import RollupDelta, get_rollup_series, rebuild_daily_rollups
+from django_finance.apps.plaid.services import PlaidDatabaseService
+from tests.plaid.dummy_data import TRANSACTIONS_ADDED
+from tests.plaid.factories import AccountFactory, ItemFactory, TransactionFactory
+
+pytestmark = pytest.mark.django_db
+
+
+def rollup_values(user_id: int) -> dict:
+    return {
+        (row.account_id, row.date, row.primary_personal_finance_category): (
+            Decimal(row.total),
+            Decimal(row.income),
+            Decimal(row.expense),
+            row.transaction_count,
+        )
+        for row in DailyTransactionRollup.objects.filter(user_id=user_id)
+    }
+
+
+class TestRollupDelta:
+    def test_add_and_remove(self):
+        delta = RollupDelta()
+        delta.add(1, "2023-09-24", 10, "FOOD_AND_DRINK")
+        delta.add(1, date(2023, 9, 24), Decimal("-4"), "FOOD_AND_DRINK")
+        delta.remove(1, "2023-09-24", 10, "FOOD_AND_DRINK")
+        assert delta.days == {(1, date(2023, 9, 24), "FOOD_AND_DRINK"): (Decimal("-4"), 1, Decimal(0), Decimal("-4"))}
+
+    def test_cancelled_changes_are_empty(self):
+        delta = RollupDelta()
+        delta.add(1, "2023-09-24", 10, "FOOD_AND_DRINK")
+        delta.remove(1, "2023-09-24", 10, "FOOD_AND_DRINK")
+        assert not delta
+
+
+class TestDailyTransactionRollup:
+    def test_rebuild(self, create_user):
+        user = create_user()
+        account: Account = AccountFactory.create(item=ItemFactory.create(user=user))
+        day = date(2023, 9, 24)
+        TransactionFactory.create(
+            account=account, date=day, amount=Decimal("50"), primary_personal_finance_category="INCOME"
+        )
+        TransactionFactory.create(
+            account=account, date=day, amount=Decimal("-20"), primary_personal_finance_category="RENT"
+        )
+        TransactionFactory.create(
+            account=account, date=day, amount=Decimal("-5"), primary_personal_finance_category="RENT"
+        )
+        TransactionFactory.create(date=day, amount=Decimal("1000"))
+
+        assert rebuild_daily_rollups(user.id) == 2
+        assert rollup_values(user.id) == {
+            (account.id, day, "INCOME"): (Decimal("50"), Decimal("50"), Decimal(0), 1),
+            (account.id, day, "RENT"): (Decimal("-25"), Decimal(0), Decimal("-25"), 2),
+        }
+
+    def test_sync_writes_keep_rollups_up_to_date(self, create_user):
+        user = create_user()
+        item: Item = ItemFactory.create(user=user)
+        account: Account = AccountFactory.create(item=item, account_id=TRANSACTIONS_ADDED[0]["account_id"])
+        TransactionFactory.create(account=account, transaction_id="removed", amount=Decimal("-30"))
+        rebuild_daily_rollups(user.id)
+        service = PlaidDatabaseService(item)
+
+        service.create_or_update_transactions(TRANSACTIONS_ADDED)
+        # Modified transactions can move to another day and category
+        service.create_or_update_transactions(
+            [{**TRANSACTIONS_ADDED[0], "amount": -12.5, "date": "2023-10-01", "personal_finance_category": None}]
+        )
+        service.delete_transactions([{"transaction_id": "removed"}])
+
+        incremental = rollup_values(user.id)
+        rebuild_daily_rollups(user.id)
+        assert incremental == rollup_values(user.id)
+        assert incremental[(account.id, date(2023, 10, 1), "")] == (
+            Decimal("-12.5"),
+            Decimal(0),
+            Decimal("-12.5"),
+            1,
+        )
+
+    def test_removing_last_transaction_deletes_rollup(self, create_user):
+        user = create_user()
+        item: Item = ItemFactory.create(user=user)
+        TransactionFactory.create(account=AccountFactory.create(item=item), transaction_id="removed")
+        rebuild_daily_rollups(user.id)
+
+        PlaidDatabaseService(item).delete_transactions([{"transaction_id": "removed"}])
+
+        assert not DailyTransactionRollup.objects.filter(user=user).exists()
+
+    def test_rebuild_command(self, create_user):
+        user = create_user()
+        TransactionFactory.create(account=AccountFactory.create(item=ItemFactory.create(user=user)))
+        out = StringIO()
+
+        call_command("rebuild_daily_rollups", "--user", str(user.id), stdout=out)
+
+        assert "Rebuilt 1 daily rollups of 1 users." in out.getvalue()
+        assert DailyTransactionRollup.objects.filter(user=user).count() == 1
+
+
+class TestRollupSeries:
+    @pytest.fixture
+    def accounts(self, create_user):
+        user = create_user()
+        item: Item = ItemFactory.create(user=user)
+        account, other = AccountFactory.create_batch(2, item=item)
+        for day, amount, category in [
+            (date(2024, 1, 5), "-10", "FOOD_AND_DRINK"),
+            (date(2024, 1, 5), "-4", "TRANSPORTATION"),
+            (date(2024, 1, 20), "100", "INCOME"),
+            (date(2024, 2, 1), "-6", "FOOD_AND_DRINK"),
+        ]:
+            TransactionFactory.create(
+                account=account, date=day, amount=Decimal(amount), primary_personal_finance_category=category
+            )
+        TransactionFactory.create(account=other, date=date(2024, 1, 5), amount=Decimal("-1"))
+        rebuild_daily_rollups(user.id)
+        return user, account
+
+    @staticmethod
+    def values(series):
+        return [
+            (row["period"], Decimal(row["total"]), Decimal(row["income"]), Decimal(row["expense"]), row["count"])
+            for row in series
+        ]
+
+    def test_daily(self, accounts):
+        user, account = accounts
+        assert self.values(get_rollup_series(user.id, account=account)) == [
+            (date(2024, 1, 5), Decimal("-14"), Decimal(0), Decimal("-14"), 2),
+            (date(2024, 1, 20), Decimal("100"), Decimal("100"), Decimal(0), 1),
+            (date(2024, 2, 1), Decimal("-6"), Decimal(0), Decimal("-6"), 1),
+        ]
+
+    def test_monthly(self, accounts):
+        user, _ = accounts
+        assert self.values(get_rollup_series(user.id, period="month", date_to=date(2024, 1, 31))) == [
+            (date(2024, 1, 1), Decimal("85"), Decimal("100"), Decimal("-15"), 4),
+        ]
+
+    def test_sync_writes_show_up_in_series(self, create_user):
+        user = create_user()
+        item: Item = ItemFactory.create(user=user)
+        AccountFactory.create(item=item, account_id=TRANSACTIONS_ADDED[0]["account_id"])
+
+        PlaidDatabaseService(item).create_or_update_transactions(TRANSACTIONS_ADDED)
+
+        assert sum(row["count"] for row in get_rollup_series(user.id, period="month")) == len(TRANSACTIONS_ADDED)
@@ -1,8 +1,17 @@
+import asyncio
+
 import plaid
 import pytest
 
 from django_finance.apps.plaid.models import Account, Item, Transaction
-from django_finance.apps.plaid.services import PlaidDatabaseService, PlaidService
+from django_finance.apps.plaid.services import (
+    AsyncPlaidService,
+    PlaidDatabaseService,
+    PlaidService,
+    TransactionsSyncPage,
+)
+from django_finance.apps.plaid.summaries import rebuild_user_finance_summary
+from django_finance.apps.plaid.utils import get_fingerprint
 from tests.plaid.dummy_data import (
     ACCOUNTS,
     ACCOUNTS_RESPONSE,
@@ -44,9 +53,9 @@ class TestPlaidService:
     def setup_mocks(self, mocker):
         return {
             "mock_transactions_sync": mocker.patch(
-                "django_finance.apps.plaid.services.plaid_config.client.transactions_sync"
+                "django_finance.apps.plaid.ratelimit.plaid_config.client.transactions_sync"
             ),
-            "mock_accounts_get": mocker.patch("django_finance.apps.plaid.services.plaid_config.client.accounts_get"),
+            "mock_accounts_get": mocker.patch("django_finance.apps.plaid.ratelimit.plaid_config.client.accounts_get"),
         }
 
     def test_fetch_transactions_success(self, create_user, setup_mocks):
@@ -77,24 +86,28 @@ class TestPlaidService:
         assert removed == TRANSACTIONS_REMOVED
         assert cursor == TRANSACTIONS_CURSOR
 
-    def test_fetch_transactions_max_retries(self, create_user, setup_mocks):
+    def test_fetch_transactions_max_retries(self, create_user, api_exception, setup_mocks):
         user = create_user()
         item: Item = ItemFactory.create(user=user)
-        setup_mocks["mock_transactions_sync"].side_effect = self.MockTransactionsSyncResponse()
-        added, modified, removed, cursor = PlaidService(item).fetch_transactions(retries_left=0)
-        added, modified, removed, cursor = PlaidService(item).fetch_transactions()
-        assert added == modified == removed == []
-        assert cursor == ""
+        setup_mocks["mock_transactions_sync"].side_effect = plaid.ApiException(
+            status=400,
+            reason="Bad Request",
+            http_resp=api_exception("TRANSACTIONS_SYNC_MUTATION_DURING_PAGINATION"),
+        )
+        with pytest.raises(plaid.ApiException):
+            PlaidService(item).fetch_transactions(retries_left=2)
+        assert setup_mocks["mock_transactions_sync"].call_count == 3
 
     @pytest.mark.parametrize(
         "exception",
         [
             Exception("Simulated Exception"),
             lambda api_exception: plaid.ApiException(
-                status=500,
-                reason="Internal Server Error",
+                status=400,
+                reason="Bad Request",
                 http_resp=api_exception("ERROR_CODE"),
             ),
+            lambda api_exception: plaid.ApiException(status=400, reason="Bad Request"),
         ],
     )
     def test_fetch_transactions_fail(self, create_user, api_exception, exception, setup_mocks):
@@ -107,9 +120,26 @@ class TestPlaidService:
             exception_instance = exception
 
         setup_mocks["mock_transactions_sync"].side_effect = exception_instance
-        added, modified, removed, cursor = PlaidService(item).fetch_transactions()
-        assert added == modified == removed == []
-        assert cursor == ""
+        with pytest.raises(type(exception_instance)):
+            PlaidService(item).fetch_transactions()
+
+    def test_iter_transaction_pages(self, create_user, setup_mocks):
+        user = create_user()
+        item: Item = ItemFactory.create(user=user)
+
+        class MockFirstPageResponse:
+            def to_dict(self):
+                return {**TRANSACTIONS_SYNC_RESPONSE, "next_cursor": "first_cursor", "has_more": True}
+
+        setup_mocks["mock_transactions_sync"].side_effect = [
+            MockFirstPageResponse(),
+            self.MockTransactionsSyncResponse(),
+        ]
+        pages = list(PlaidService(item).iter_transaction_pages())
+        assert len(pages) == 2
+        assert [page.cursor for page in pages] == ["", "first_cursor"]
+        assert pages[-1].next_cursor == TRANSACTIONS_CURSOR
+        assert pages[0].added == TRANSACTIONS_ADDED
 
     def test_fetch_accounts_success(self, create_user, setup_mocks):
         user = create_user()
@@ -121,22 +151,178 @@ class TestPlaidService:
         user = create_user()
         item: Item = ItemFactory.create(user=user)
         setup_mocks["mock_accounts_get"].side_effect = Exception("Simulated Exception")
-        assert PlaidService(item).fetch_accounts() == []
+        with pytest.raises(Exception, match="Simulated Exception"):
+            PlaidService(item).fetch_accounts()
+
+
+class TestAsyncPlaidService:
+    @pytest.fixture
+    def setup_mocks(self, mocker):
+        return {
+            "mock_transactions_sync": mocker.patch(
+                "django_finance.apps.plaid.ratelimit.plaid_config.client.transactions_sync",
+                return_value=TestPlaidService.MockTransactionsSyncResponse(),
+            ),
+            "mock_accounts_get": mocker.patch(
+                "django_finance.apps.plaid.ratelimit.plaid_config.client.accounts_get",
+                return_value=TestPlaidService.MockAccountsResponse(),
+            ),
+        }
+
+    def test_iter_transaction_pages(self, create_user, setup_mocks):
+        user = create_user()
+        item: Item = ItemFactory.create(user=user)
+        service = AsyncPlaidService(item)
+
+        async def collect():
+            return [page async for page in service.iter_transaction_pages()]
+
+        pages = asyncio.run(collect())
+        assert len(pages) == 1
+        assert pages[0].added == TRANSACTIONS_ADDED
+        assert service.cursor == TRANSACTIONS_CURSOR
+
+    def test_iter_transaction_pages_fail(self, create_user, setup_mocks):
+        user = create_user()
+        item: Item = ItemFactory.create(user=user)
+        setup_mocks["mock_transactions_sync"].side_effect = plaid.ApiException(status=400, reason="Bad Request")
+
+        async def collect():
+            return [page async for page in AsyncPlaidService(item).iter_transaction_pages()]
+
+        with pytest.raises(plaid.ApiException):
+            asyncio.run(collect())
+
+    def test_fetch_transactions(self, create_user, setup_mocks):
+        user = create_user()
+        item: Item = ItemFactory.create(user=user)
+        added, modified, removed, cursor = asyncio.run(AsyncPlaidService(item).fetch_transactions())
+        assert added == TRANSACTIONS_ADDED
+        assert modified == TRANSACTIONS_MODIFIED
+        assert removed == TRANSACTIONS_REMOVED
+        assert cursor == TRANSACTIONS_CURSOR
+
+    def test_fetch_accounts(self, create_user, setup_mocks):
+        user = create_user()
+        item: Item = ItemFactory.create(user=user)
+        assert asyncio.run(AsyncPlaidService(item).fetch_accounts()) == ACCOUNTS
 
 
 class TestPlaidDatabaseService:
     def test_create_or_update_accounts(self, create_user):
         user = create_user()
         item: Item = ItemFactory.create(user=user)
-        PlaidDatabaseService(item).create_or_update_accounts(ACCOUNTS)
+        accounts = PlaidDatabaseService(item).create_or_update_accounts(ACCOUNTS)
+        assert Account.objects.filter(user=user).count() == len(ACCOUNTS)
+        assert set(accounts) == {account["account_id"] for account in ACCOUNTS}
+
+    def test_create_or_update_accounts_updates_existing(self, create_user):
+        user = create_user()
+        item: Item = ItemFactory.create(user=user)
+        AccountFactory.create(item=item, account_id=ACCOUNTS[0]["account_id"], name="Old name")
+        accounts = PlaidDatabaseService(item).create_or_update_accounts(ACCOUNTS)
         assert Account.objects.count() == len(ACCOUNTS)
+        assert accounts[ACCOUNTS[0]["account_id"]].name == ACCOUNTS[0]["name"]
+        assert accounts[ACCOUNTS[0]["account_id"]].current_balance == ACCOUNTS[0]["balances"]["current"]
+
+    def test_create_or_update_accounts_skips_unchanged(self, create_user, django_assert_num_queries):
+        user = create_user()
+        item: Item = ItemFactory.create(user=user)
+        service = PlaidDatabaseService(item)
+        service.create_or_update_accounts(ACCOUNTS)
+        # Only the lookup of the stored accounts runs when nothing changed
+        with django_assert_num_queries(1):
+            accounts = service.create_or_update_accounts(ACCOUNTS)
+        assert len(accounts) == len(ACCOUNTS)
+
+    def test_create_or_update_transactions_with_accounts(self, create_user, django_assert_num_queries):
+        user = create_user()
+        item: Item = ItemFactory.create(user=user)
+        account: Account = AccountFactory.create(item=item, account_id=TRANSACTIONS_ADDED[0]["account_id"])
+        rebuild_user_finance_summary(user.id)
+        # The page's merchants and categories are each looked up, inserted and read back, then one query to
+        # count existing rows and one upsert, no account lookups, then the summary row is locked and updated in a
+        # savepoint, and the daily rollups are read and inserted in another
+        with django_assert_num_queries(16):
+            PlaidDatabaseService(item).create_or_update_transactions(
+                TRANSACTIONS_ADDED, accounts={account.account_id: account}
+            )
+        assert Transaction.objects.filter(account=account).count() == len(TRANSACTIONS_ADDED)
 
     def test_create_or_update_transactions(self, create_user):
         user = create_user()
         item: Item = ItemFactory.create(user=user)
         AccountFactory.create(item=item, account_id=TRANSACTIONS_ADDED[0]["account_id"])
-        PlaidDatabaseService(item).create_or_update_transactions(TRANSACTIONS_ADDED)
-        assert Transaction.objects.count() == len(TRANSACTIONS_ADDED)
+        result = PlaidDatabaseService(item).create_or_update_transactions(TRANSACTIONS_ADDED)
+        assert Transaction.objects.filter(user=user).count() == len(TRANSACTIONS_ADDED)
+        assert result.inserted == len(TRANSACTIONS_ADDED)
+        assert result.updated == 0
+
+    def test_create_or_update_transactions_updates_existing(self, create_user):
+        user = create_user()
+        item: Item = ItemFactory.create(user=user)
+        account: Account = AccountFactory.create(item=item, account_id=TRANSACTIONS_ADDED[0]["account_id"])
+        TransactionFactory.create(account=account, transaction_id=TRANSACTIONS_ADDED[0]["transaction_id"])
+        result = PlaidDatabaseService(item).create_or_update_transactions(
+            TRANSACTIONS_ADDED + TRANSACTIONS_MODIFIED, batch_size=1
+        )
+        assert result.inserted == len(TRANSACTIONS_MODIFIED)
+        assert result.updated == len(TRANSACTIONS_ADDED)
+        transaction = Transaction.objects.get(transaction_id=TRANSACTIONS_ADDED[0]["transaction_id"])
+        assert transaction.merchant_name == TRANSACTIONS_ADDED[0]["merchant_name"]
+        assert transaction.primary_personal_finance_category == "GENERAL_MERCHANDISE"
+
+    def test_create_or_update_transactions_compacts_location(self, create_user):
+        user = create_user()
+        item: Item = ItemFactory.create(user=user)
+        AccountFactory.create(item=item, account_id=TRANSACTIONS_ADDED[0]["account_id"])
+        PlaidDatabaseService(item).create_or_update_transactions(TRANSACTIONS_ADDED + TRANSACTIONS_MODIFIED)
+        locations = dict(Transaction.objects.values_list("transaction_id", "location"))
+        assert locations[TRANSACTIONS_ADDED[0]["transaction_id"]] == TRANSACTIONS_ADDED[0]["location"]
+        # All of its keys are null
+        assert locations[TRANSACTIONS_MODIFIED[0]["transaction_id"]] is None
+
+    def test_fingerprint_hashes_location_as_received(self, create_user):
+        user = create_user()
+        item: Item = ItemFactory.create(user=user)
+        AccountFactory.create(item=item, account_id=TRANSACTIONS_MODIFIED[0]["account_id"])
+        PlaidDatabaseService(item).create_or_update_transactions(TRANSACTIONS_MODIFIED[:1])
+
+        # Same fingerprint as before locations were compacted, so existing rows aren't all rewritten on their next sync
+        transaction = TRANSACTIONS_MODIFIED[0]
+        assert Transaction.objects.get().fingerprint == get_fingerprint(
+            {
+                "account_id": transaction["account_id"],
+                "merchant": PlaidDatabaseService._get_merchant(transaction),
+                "category": PlaidDatabaseService._get_category(transaction),
+                **PlaidDatabaseService._get_transaction_values(transaction),
+                "location": transaction["location"],
+            }
+        )
+
+    def test_create_or_update_transactions_skips_unchanged(self, create_user):
+        user = create_user()
+        item: Item = ItemFactory.create(user=user)
+        AccountFactory.create(item=item, account_id=TRANSACTIONS_ADDED[0]["account_id"])
+        service = PlaidDatabaseService(item)
+        service.create_or_update_transactions(TRANSACTIONS_ADDED)
+        updated_at = Transaction.objects.get().updated_at
+
+        result = service.create_or_update_transactions(TRANSACTIONS_ADDED)
+        assert result.unchanged == len(TRANSACTIONS_ADDED)
+        assert result.inserted == result.updated == 0
+        assert Transaction.objects.get().updated_at == updated_at
+
+        result = service.create_or_update_transactions([{**TRANSACTIONS_ADDED[0], "pending": True}])
+        assert result.updated == 1
+        assert Transaction.objects.get().pending is True
+
+    def test_create_or_update_transactions_unknown_account(self, create_user):
+        user = create_user()
+        item: Item = ItemFactory.create(user=user)
+        with pytest.raises(Account.DoesNotExist):
+            PlaidDatabaseService(item).create_or_update_transactions(TRANSACTIONS_ADDED)
+        assert not Transaction.objects.exists()
 
     def test_delete_transactions(self, create_user):
         user = create_user()
@@ -147,6 +333,62 @@ class TestPlaidDatabaseService:
         PlaidDatabaseService(item).delete_transactions(removed)
         assert not Transaction.objects.filter(transaction_id=transaction.transaction_id).exists()
 
+    def test_save_transactions_page(self, create_user):
+        user = create_user()
+        item: Item = ItemFactory.create(user=user)
+        AccountFactory.create(item=item, account_id=TRANSACTIONS_ADDED[0]["account_id"])
+        page = TransactionsSyncPage(
+            added=TRANSACTIONS_ADDED,
+            modified=TRANSACTIONS_MODIFIED,
+            removed=TRANSACTIONS_REMOVED,
+            cursor="",
+            next_cursor=TRANSACTIONS_CURSOR,
+            has_more=True,
+        )
+        result = PlaidDatabaseService(item).save_transactions_page(page)
+        item.refresh_from_db()
+        assert result.inserted == len(TRANSACTIONS_ADDED + TRANSACTIONS_MODIFIED)
+        assert item.transactions_cursor == TRANSACTIONS_CURSOR
+
+    def test_save_transactions_page_rolls_back_on_failure(self, create_user, mocker):
+        user = create_user()
+        item: Item = ItemFactory.create(user=user)
+        AccountFactory.create(item=item, account_id=TRANSACTIONS_ADDED[0]["account_id"])
+        mocker.patch.object(PlaidDatabaseService, "delete_transactions", side_effect=Exception("Simulated Exception"))
+        page = TransactionsSyncPage(
+            added=TRANSACTIONS_ADDED,
+            modified=[],
+            removed=TRANSACTIONS_REMOVED,
+            cursor="",
+            next_cursor=TRANSACTIONS_CURSOR,
+            has_more=False,
+        )
+        with pytest.raises(Exception, match="Simulated Exception"):
+            PlaidDatabaseService(item).save_transactions_page(page)
+        item.refresh_from_db()
+        assert not Transaction.objects.exists()
+        assert item.transactions_cursor == ""
+
+    def test_save_transactions_page_unknown_account(self, create_user):
+        user = create_user()
+        item: Item = ItemFactory.create(user=user)
+        AccountFactory.create(item=item, account_id=TRANSACTIONS_ADDED[0]["account_id"])
+        page = TransactionsSyncPage(
+            added=[*TRANSACTIONS_ADDED, {**TRANSACTIONS_ADDED[0], "transaction_id": "new", "account_id": "new"}],
+            modified=[],
+            removed=[],
+            cursor="",
+            next_cursor=TRANSACTIONS_CURSOR,
+            has_more=False,
+        )
+
+        # The page is fetched again by the next sync instead of being checkpointed without that transaction
+        with pytest.raises(Account.DoesNotExist):
+            PlaidDatabaseService(item).save_transactions_page(page)
+        item.refresh_from_db()
+        assert not Transaction.objects.exists()
+        assert item.transactions_cursor == ""
+
     def test_update_item_transaction_cursor(self, create_user):
         user = create_user()
         item: Item = ItemFactory.create(user=user)
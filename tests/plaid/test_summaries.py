@@ -0,0 +1,124 @@
+from decimal import Decimal
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from django_finance.apps.plaid.models import Account, Item, UserFinanceSummary
+from django_finance.apps.plaid.services import PlaidDatabaseService
+from django_finance.apps.plaid.summaries import (
+    FinanceDelta,
+    get_user_finance_summary,
+    rebuild_user_finance_summary,
+)
+from tests.plaid.dummy_data import TRANSACTIONS_ADDED
+from tests.plaid.factories import AccountFactory, ItemFactory, TransactionFactory
+
+pytestmark = pytest.mark.django_db
+
+
+def summary_values(summary: UserFinanceSummary) -> dict:
+    return {
+        "net_worth": summary.net_worth,
+        "total_income": Decimal(summary.total_income),
+        "total_expense": Decimal(summary.total_expense),
+        "category_totals": {
+            category: (Decimal(totals["total"]), totals["count"])
+            for category, totals in summary.category_totals.items()
+        },
+    }
+
+
+class TestFinanceDelta:
+    def test_add_and_remove(self):
+        delta = FinanceDelta()
+        delta.add(10.5, "FOOD_AND_DRINK")
+        delta.add(Decimal("-4"), "FOOD_AND_DRINK")
+        delta.remove(10.5, "FOOD_AND_DRINK")
+        assert delta.income == 0
+        assert delta.expense == Decimal("-4")
+        assert delta.categories == {"FOOD_AND_DRINK": (Decimal("-4"), 1)}
+
+
+class TestUserFinanceSummary:
+    def test_rebuild(self, create_user):
+        user = create_user()
+        item: Item = ItemFactory.create(user=user)
+        account: Account = AccountFactory.create(item=item, current_balance=Decimal("1000"))
+        TransactionFactory.create(account=account, amount=Decimal("50"), primary_personal_finance_category="INCOME")
+        TransactionFactory.create(account=account, amount=Decimal("-20"), primary_personal_finance_category="RENT")
+        TransactionFactory.create(account=account, amount=Decimal("-5"), primary_personal_finance_category="RENT")
+        TransactionFactory.create(amount=Decimal("1000"))
+
+        summary = rebuild_user_finance_summary(user.id)
+
+        assert summary_values(summary) == {
+            "net_worth": Decimal("1000"),
+            "total_income": Decimal("50"),
+            "total_expense": Decimal("-25"),
+            "category_totals": {"INCOME": (Decimal("50"), 1), "RENT": (Decimal("-25"), 2)},
+        }
+
+    def test_sums_each_currency_in_its_minor_units(self, create_user):
+        user = create_user()
+        account: Account = AccountFactory.create(item=ItemFactory.create(user=user), current_balance=Decimal("10.50"))
+        AccountFactory.create(
+            item=ItemFactory.create(user=user), current_balance=Decimal("1000"), iso_currency_code="JPY"
+        )
+        TransactionFactory.create(account=account, amount=Decimal("12.34"), iso_currency_code="USD")
+        TransactionFactory.create(account=account, amount=Decimal("500"), iso_currency_code="JPY")
+
+        summary = rebuild_user_finance_summary(user.id)
+
+        assert summary.net_worth == Decimal("1010.50")
+        assert summary.total_income == Decimal("512.34")
+
+    def test_get_builds_missing_summary(self, create_user):
+        user = create_user()
+        assert not UserFinanceSummary.objects.filter(user=user).exists()
+        summary = get_user_finance_summary(user.id)
+        assert summary.user_id == user.id
+        assert summary.total_income == 0
+
+    def test_rebuild_updates_summary_inserted_concurrently(self, create_user, mocker):
+        user = create_user()
+        AccountFactory.create(item=ItemFactory.create(user=user), current_balance=Decimal("10"))
+
+        # Another first read stores the summary while this one aggregates
+        def get_net_worth(user_id):
+            UserFinanceSummary.objects.create(user_id=user_id, net_worth=Decimal("5"))
+            return Decimal("10")
+
+        mocker.patch("django_finance.apps.plaid.summaries.get_net_worth", side_effect=get_net_worth)
+
+        summary = rebuild_user_finance_summary(user.id)
+
+        assert UserFinanceSummary.objects.filter(user=user).count() == 1
+        assert summary.net_worth == Decimal("10")
+
+    def test_sync_writes_keep_summary_up_to_date(self, create_user):
+        user = create_user()
+        item: Item = ItemFactory.create(user=user)
+        account: Account = AccountFactory.create(item=item, account_id=TRANSACTIONS_ADDED[0]["account_id"])
+        TransactionFactory.create(account=account, transaction_id="removed", amount=Decimal("-30"))
+        rebuild_user_finance_summary(user.id)
+        service = PlaidDatabaseService(item)
+
+        service.create_or_update_transactions(TRANSACTIONS_ADDED)
+        service.create_or_update_transactions([{**TRANSACTIONS_ADDED[0], "amount": -12.5}])
+        service.delete_transactions([{"transaction_id": "removed"}])
+
+        incremental = summary_values(UserFinanceSummary.objects.get(user=user))
+        assert incremental == summary_values(rebuild_user_finance_summary(user.id))
+        assert incremental["total_expense"] == Decimal("-12.5")
+
+    def test_rebuild_command(self, create_user):
+        user = create_user()
+        item: Item = ItemFactory.create(user=user)
+        TransactionFactory.create(account=AccountFactory.create(item=item), amount=Decimal("50"))
+        out = StringIO()
+
+        call_command("rebuild_finance_summaries", "--user", str(user.id), stdout=out)
+
+        assert "Rebuilt the finance summaries of 1 users." in out.getvalue()
+        assert UserFinanceSummary.objects.get(user=user).total_income == Decimal("50")
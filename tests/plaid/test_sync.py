@@ -0,0 +1,250 @@
+import asyncio
+
+import pytest
+from asgiref.sync import sync_to_async
+from django.core.management import call_command
+
+from django_finance.apps.plaid.locks import ItemLock
+from django_finance.apps.plaid.models import Account, Item, Transaction
+from django_finance.apps.plaid.services import TransactionsSyncPage
+from django_finance.apps.plaid.sync import (
+    ItemSyncResult,
+    async_sync_item,
+    async_sync_items,
+    summarize_sync_results,
+    sync_item,
+    sync_items,
+)
+from tests.plaid.dummy_data import (
+    ACCOUNTS,
+    TRANSACTIONS_ADDED,
+    TRANSACTIONS_CURSOR,
+    TRANSACTIONS_REMOVED,
+)
+from tests.plaid.factories import ItemFactory
+
+
+class TestSyncItem:
+    @pytest.fixture
+    def setup_mocks(self, mocker):
+        return {
+            "mock_iter_transaction_pages": mocker.patch(
+                "django_finance.apps.plaid.sync.PlaidService.iter_transaction_pages"
+            ),
+            "mock_fetch_accounts": mocker.patch("django_finance.apps.plaid.sync.PlaidService.fetch_accounts"),
+        }
+
+    def test_sync_item(self, create_user, setup_mocks):
+        user = create_user()
+        item: Item = ItemFactory.create(user=user)
+        accounts = [{**ACCOUNTS[0], "account_id": TRANSACTIONS_ADDED[0]["account_id"]}]
+        setup_mocks["mock_fetch_accounts"].return_value = accounts
+        setup_mocks["mock_iter_transaction_pages"].return_value = iter(
+            [
+                TransactionsSyncPage(
+                    added=TRANSACTIONS_ADDED,
+                    modified=[],
+                    removed=TRANSACTIONS_REMOVED,
+                    cursor="",
+                    next_cursor=TRANSACTIONS_CURSOR,
+                    has_more=False,
+                )
+            ]
+        )
+
+        result = sync_item(item)
+
+        item.refresh_from_db()
+        assert result.success
+        assert result.pages == 1
+        assert result.inserted == len(TRANSACTIONS_ADDED)
+        assert Account.objects.filter(item=item).count() == len(accounts)
+        assert Transaction.objects.count() == len(TRANSACTIONS_ADDED)
+        assert item.transactions_cursor == TRANSACTIONS_CURSOR
+
+    def test_sync_item_fail(self, create_user, setup_mocks):
+        user = create_user()
+        item: Item = ItemFactory.create(user=user)
+        setup_mocks["mock_fetch_accounts"].return_value = []
+        setup_mocks["mock_iter_transaction_pages"].side_effect = Exception("Simulated Exception")
+
+        result = sync_item(item)
+
+        assert not result.success
+        assert result.error == "Simulated Exception"
+
+    def test_sync_item_reloads_item_once_locked(self, create_user, mocker):
+        user = create_user()
+        item: Item = ItemFactory.create(user=user, transactions_cursor="old_cursor")
+        mock_plaid_service = mocker.patch("django_finance.apps.plaid.sync.PlaidService")
+        mock_plaid_service.return_value.fetch_accounts.return_value = []
+        mock_plaid_service.return_value.iter_transaction_pages.return_value = iter([])
+
+        # A concurrent sync saves its pages while this one waits for the lock
+        def acquire(lock, timeout=None):
+            Item.objects.filter(id=item.id).update(transactions_cursor="moved_cursor")
+            return lock.try_acquire()
+
+        mocker.patch.object(ItemLock, "acquire", acquire)
+
+        assert sync_item(item).success
+        assert mock_plaid_service.call_args.args[0].transactions_cursor == "moved_cursor"
+
+    def test_sync_item_renews_lock_per_page(self, create_user, setup_mocks, mocker):
+        user = create_user()
+        item: Item = ItemFactory.create(user=user)
+        setup_mocks["mock_fetch_accounts"].return_value = []
+        setup_mocks["mock_iter_transaction_pages"].return_value = iter(
+            [
+                TransactionsSyncPage(
+                    added=[], modified=[], removed=[], cursor=cursor, next_cursor=f"{cursor}_next", has_more=True
+                )
+                for cursor in ["", "second", "third"]
+            ]
+        )
+        mock_renew = mocker.patch.object(ItemLock, "renew", side_effect=[True, False])
+
+        result = sync_item(item)
+
+        item.refresh_from_db()
+        assert mock_renew.call_count == 2
+        assert not result.success
+        assert result.error == f"Sync lock of plaid item {item.id} expired"
+        # Syncing stops at the page after which the lease was found lost
+        assert result.pages == 2
+        assert item.transactions_cursor == "second_next"
+
+    def test_sync_item_aborts_when_accounts_fail(self, create_user, setup_mocks):
+        user = create_user()
+        item: Item = ItemFactory.create(user=user)
+        setup_mocks["mock_fetch_accounts"].side_effect = Exception("Simulated Exception")
+
+        result = sync_item(item)
+
+        item.refresh_from_db()
+        assert not result.success
+        setup_mocks["mock_iter_transaction_pages"].assert_not_called()
+        assert item.transactions_cursor == ""
+
+    def test_sync_item_releases_lock(self, create_user, setup_mocks):
+        user = create_user()
+        item: Item = ItemFactory.create(user=user)
+        setup_mocks["mock_fetch_accounts"].return_value = []
+        setup_mocks["mock_iter_transaction_pages"].side_effect = Exception("Simulated Exception")
+
+        result = sync_item(item)
+
+        assert result.locked
+        assert result.lock_hold >= 0
+        lock = ItemLock(item.id)
+        assert lock.try_acquire()
+        lock.release()
+
+    def test_sync_item_skipped_when_locked(self, create_user, setup_mocks, settings):
+        settings.PLAID_SYNC_LOCK_TIMEOUT = 0
+        user = create_user()
+        item: Item = ItemFactory.create(user=user)
+        lock = ItemLock(item.id)
+        assert lock.try_acquire()
+
+        try:
+            result = sync_item(item)
+        finally:
+            lock.release()
+
+        assert not result.success
+        assert not result.locked
+        assert result.error == "Sync already in progress"
+        setup_mocks["mock_fetch_accounts"].assert_not_called()
+
+
+@pytest.mark.django_db(transaction=True)
+class TestSyncItems:
+    def test_sync_items(self, mocker):
+        items = ItemFactory.create_batch(5)
+        mock_sync_item = mocker.patch(
+            "django_finance.apps.plaid.sync.sync_item",
+            side_effect=lambda item: ItemSyncResult(item_id=item.id, pages=1),
+        )
+
+        results = sync_items(iter([item.id for item in items] + [0]), max_workers=2)
+
+        assert mock_sync_item.call_count == len(items)
+        assert sorted(result.item_id for result in results) == sorted([0] + [item.id for item in items])
+        summary = summarize_sync_results(results)
+        assert summary["succeeded"] == len(items)
+        assert summary["failed"] == 1
+        assert summary["pages"] == len(items)
+
+    def test_sync_plaid_items_command(self, mocker, capsys):
+        item = ItemFactory.create()
+        ItemFactory.create()
+        mock_sync_item = mocker.patch(
+            "django_finance.apps.plaid.sync.sync_item",
+            side_effect=lambda item: ItemSyncResult(item_id=item.id),
+        )
+
+        call_command("sync_plaid_items", item=[item.id], workers=1)
+
+        mock_sync_item.assert_called_once_with(item)
+        assert "Synced 1 items (0 failed)" in capsys.readouterr().out
+
+
+@pytest.mark.django_db(transaction=True)
+class TestAsyncSyncItems:
+    def test_async_sync_items(self, mocker):
+        items = ItemFactory.create_batch(3)
+        # Each item gets its own account, transactions reference the account of the item being synced
+        mocker.patch(
+            "django_finance.apps.plaid.sync.PlaidService.fetch_accounts",
+            autospec=True,
+            side_effect=lambda service: [{**ACCOUNTS[0], "account_id": f"account-{service.item.id}"}],
+        )
+        mocker.patch(
+            "django_finance.apps.plaid.sync.PlaidService.iter_transaction_pages",
+            autospec=True,
+            side_effect=lambda service, retries_left=3: iter(
+                [
+                    TransactionsSyncPage(
+                        added=[
+                            {
+                                **transaction,
+                                "transaction_id": f"{transaction['transaction_id']}-{service.item.id}",
+                                "account_id": f"account-{service.item.id}",
+                            }
+                            for transaction in TRANSACTIONS_ADDED
+                        ],
+                        modified=[],
+                        removed=[],
+                        cursor="",
+                        next_cursor=TRANSACTIONS_CURSOR,
+                        has_more=False,
+                    )
+                ]
+            ),
+        )
+
+        results = asyncio.run(async_sync_items([item.id for item in items] + [0], concurrency=2))
+
+        assert len(results) == len(items) + 1
+        summary = summarize_sync_results(results)
+        assert summary["succeeded"] == len(items)
+        assert summary["failed"] == 1
+        assert summary["pages"] == len(items)
+        assert Transaction.objects.count() == len(TRANSACTIONS_ADDED) * len(items)
+        assert Item.objects.filter(transactions_cursor=TRANSACTIONS_CURSOR).count() == len(items)
+
+    def test_async_sync_item_reloads_item_once_locked(self, mocker):
+        item: Item = ItemFactory.create(transactions_cursor="old_cursor")
+        mock_plaid_service = mocker.patch("django_finance.apps.plaid.sync.AsyncPlaidService")
+        mock_plaid_service.return_value.fetch_accounts = mocker.AsyncMock(return_value=[])
+        mock_plaid_service.return_value.iter_transaction_pages.return_value.__aiter__.return_value = []
+
+        async def aacquire(lock, timeout=None):
+            await Item.objects.filter(id=item.id).aupdate(transactions_cursor="moved_cursor")
+            return await sync_to_async(lock.try_acquire)()
+
+        mocker.patch.object(ItemLock, "aacquire", aacquire)
+
+        assert asyncio.run(async_sync_item(item)).success
+        assert mock_plaid_service.call_args.args[0].transactions_cursor == "moved_cursor"
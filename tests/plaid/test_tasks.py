@@ -1,7 +1,17 @@
+from datetime import timedelta
+
 import pytest
+from django.utils import timezone
 
+from django_finance.apps.plaid.locks import ItemLock
 from django_finance.apps.plaid.models import Item
-from django_finance.apps.plaid.tasks import update_transactions
+from django_finance.apps.plaid.services import TransactionsSyncPage, UpsertResult
+from django_finance.apps.plaid.sync import ItemSyncResult, finish_item_sync, sync_item
+from django_finance.apps.plaid.tasks import (
+    schedule_item_sync,
+    sync_all_items,
+    update_transactions,
+)
 from django_finance.config.celery import app
 from tests.plaid.factories import ItemFactory
 
@@ -17,48 +27,159 @@ class TestUpdateTransactions:
     @pytest.fixture
     def setup_mocks(self, mocker):
         return {
-            "mock_fetch_transactions": mocker.patch("django_finance.apps.plaid.tasks.PlaidService.fetch_transactions"),
-            "mock_fetch_accounts": mocker.patch("django_finance.apps.plaid.tasks.PlaidService.fetch_accounts"),
+            "mock_iter_transaction_pages": mocker.patch(
+                "django_finance.apps.plaid.sync.PlaidService.iter_transaction_pages"
+            ),
+            "mock_fetch_accounts": mocker.patch("django_finance.apps.plaid.sync.PlaidService.fetch_accounts"),
             "mock_create_or_update_accounts": mocker.patch(
-                "django_finance.apps.plaid.tasks.PlaidDatabaseService.create_or_update_accounts"
+                "django_finance.apps.plaid.sync.PlaidDatabaseService.create_or_update_accounts",
+                return_value={},
             ),
             "mock_create_or_update_transactions": mocker.patch(
-                "django_finance.apps.plaid.tasks.PlaidDatabaseService.create_or_update_transactions"
+                "django_finance.apps.plaid.sync.PlaidDatabaseService.create_or_update_transactions",
+                return_value=UpsertResult(),
             ),
             "mock_delete_transactions": mocker.patch(
-                "django_finance.apps.plaid.tasks.PlaidDatabaseService.delete_transactions"
+                "django_finance.apps.plaid.sync.PlaidDatabaseService.delete_transactions",
+                return_value=0,
             ),
             "mock_update_item_transaction_cursor": mocker.patch(
-                "django_finance.apps.plaid.tasks.PlaidDatabaseService.update_item_transaction_cursor"
+                "django_finance.apps.plaid.sync.PlaidDatabaseService.update_item_transaction_cursor"
             ),
         }
 
+    @staticmethod
+    def page(next_cursor, added=None, modified=None, removed=None, has_more=False):
+        return TransactionsSyncPage(
+            added=added or [],
+            modified=modified or [],
+            removed=removed or [],
+            cursor="",
+            next_cursor=next_cursor,
+            has_more=has_more,
+        )
+
     def test_update_transactions_success(self, create_user, setup_mocks):
         user = create_user()
         item: Item = ItemFactory.create(user=user)
 
-        setup_mocks["mock_fetch_transactions"].return_value = ([], [], [], "new_cursor")
+        setup_mocks["mock_iter_transaction_pages"].return_value = iter([self.page("new_cursor")])
         setup_mocks["mock_fetch_accounts"].return_value = []
 
         update_transactions(item.id)
 
-        setup_mocks["mock_fetch_transactions"].assert_called_once()
+        setup_mocks["mock_iter_transaction_pages"].assert_called_once()
         setup_mocks["mock_fetch_accounts"].assert_called_once()
         setup_mocks["mock_create_or_update_accounts"].assert_called_once_with([])
-        setup_mocks["mock_create_or_update_transactions"].assert_called_once_with([])
+        setup_mocks["mock_create_or_update_transactions"].assert_called_once_with([], accounts={})
         setup_mocks["mock_delete_transactions"].assert_called_once_with([])
         setup_mocks["mock_update_item_transaction_cursor"].assert_called_once_with("new_cursor")
+        item.refresh_from_db()
+        assert item.sync_status == Item.SyncStatusChoices.IDLE
+
+    def test_update_transactions_status_changes_once_locked(self, create_user, setup_mocks, mocker):
+        user = create_user()
+        item: Item = ItemFactory.create(user=user)
+        Item.objects.filter(id=item.id).update(sync_status=Item.SyncStatusChoices.QUEUED, sync_requested=True)
+        setup_mocks["mock_iter_transaction_pages"].return_value = iter([])
+        setup_mocks["mock_fetch_accounts"].return_value = []
+        statuses = []
+
+        # Record the status while the task waits for the lock and while it syncs
+        def acquire(lock, timeout=None):
+            statuses.append(Item.objects.values_list("sync_status", "sync_requested").get(id=item.id))
+            return lock.try_acquire()
+
+        def create_or_update_accounts(accounts):
+            statuses.append(Item.objects.values_list("sync_status", "sync_requested").get(id=item.id))
+            return {}
+
+        mocker.patch.object(ItemLock, "acquire", acquire)
+        setup_mocks["mock_create_or_update_accounts"].side_effect = create_or_update_accounts
+
+        update_transactions(item.id)
+
+        assert statuses == [(Item.SyncStatusChoices.QUEUED, True), (Item.SyncStatusChoices.RUNNING, False)]
+        item.refresh_from_db()
+        assert item.sync_status == Item.SyncStatusChoices.IDLE
+
+    def test_update_transactions_locked_leaves_follow_up_to_holder(
+        self, create_user, setup_mocks, mocker, django_capture_on_commit_callbacks
+    ):
+        user = create_user()
+        item: Item = ItemFactory.create(user=user)
+        Item.objects.filter(id=item.id).update(sync_status=Item.SyncStatusChoices.RUNNING)
+        mocker.patch(
+            "django_finance.apps.plaid.tasks.sync_item",
+            return_value=ItemSyncResult(item_id=item.id, success=False, locked=False),
+        )
+        mock_delay = mocker.patch("django_finance.apps.plaid.tasks.update_transactions.delay")
+
+        update_transactions(item.id)
+
+        mock_delay.assert_not_called()
+        item.refresh_from_db()
+        assert item.sync_status == Item.SyncStatusChoices.RUNNING
+        assert item.sync_requested is True
+
+        # The lock holder enqueues the follow-up when it finishes
+        with django_capture_on_commit_callbacks(execute=True):
+            finish_item_sync(item.id)
+        mock_delay.assert_called_once_with(item.id)
+
+    def test_update_transactions_locked_after_holder_finished(
+        self, create_user, setup_mocks, mocker, django_capture_on_commit_callbacks
+    ):
+        user = create_user()
+        item: Item = ItemFactory.create(user=user)
+        mocker.patch(
+            "django_finance.apps.plaid.tasks.sync_item",
+            return_value=ItemSyncResult(item_id=item.id, success=False, locked=False),
+        )
+        mock_delay = mocker.patch("django_finance.apps.plaid.tasks.update_transactions.delay")
+
+        with django_capture_on_commit_callbacks(execute=True):
+            update_transactions(item.id)
+
+        mock_delay.assert_called_once_with(item.id)
+
+    def test_update_transactions_locked_by_orchestrated_sync(
+        self, create_user, setup_mocks, mocker, settings, django_capture_on_commit_callbacks
+    ):
+        settings.PLAID_SYNC_LOCK_TIMEOUT = 0
+        user = create_user()
+        item: Item = ItemFactory.create(user=user)
+        setup_mocks["mock_iter_transaction_pages"].return_value = iter([])
+        setup_mocks["mock_fetch_accounts"].return_value = []
+        mock_delay = mocker.patch("django_finance.apps.plaid.tasks.update_transactions.delay")
+
+        # A webhook queues a sync while sync_all_items holds the item's lock, the queued task then finds it locked
+        def create_or_update_accounts(accounts):
+            schedule_item_sync(item.id)
+            update_transactions(item.id)
+            return {}
+
+        setup_mocks["mock_create_or_update_accounts"].side_effect = create_or_update_accounts
+
+        with django_capture_on_commit_callbacks(execute=True):
+            assert sync_item(item).success
+
+        # The orchestrated sync enqueues the follow-up instead of leaving the item queued until it goes stale
+        mock_delay.assert_called_once_with(item.id)
+        item.refresh_from_db()
+        assert item.sync_status == Item.SyncStatusChoices.QUEUED
+        assert item.sync_requested is False
 
     def test_update_transactions_item_not_found(self, create_user, setup_mocks):
         user = create_user()
         item: Item = ItemFactory.create(user=user)
 
-        setup_mocks["mock_fetch_transactions"].return_value = ([], [], [], "new_cursor")
+        setup_mocks["mock_iter_transaction_pages"].return_value = iter([self.page("new_cursor")])
         setup_mocks["mock_fetch_accounts"].return_value = []
 
         update_transactions(item.id + 1)
 
-        assert setup_mocks["mock_fetch_transactions"].call_count == 0
+        assert setup_mocks["mock_iter_transaction_pages"].call_count == 0
         assert setup_mocks["mock_fetch_accounts"].call_count == 0
         assert setup_mocks["mock_create_or_update_accounts"].call_count == 0
         assert setup_mocks["mock_create_or_update_transactions"].call_count == 0
@@ -69,14 +190,116 @@ class TestUpdateTransactions:
         user = create_user()
         item: Item = ItemFactory.create(user=user)
 
-        setup_mocks["mock_fetch_transactions"].side_effect = Exception("Simulated Exception")
+        setup_mocks["mock_iter_transaction_pages"].side_effect = Exception("Simulated Exception")
         setup_mocks["mock_fetch_accounts"].return_value = []
 
         update_transactions(item.id)
 
-        setup_mocks["mock_fetch_transactions"].assert_called_once()
-        assert setup_mocks["mock_fetch_accounts"].call_count == 0
-        assert setup_mocks["mock_create_or_update_accounts"].call_count == 0
+        setup_mocks["mock_iter_transaction_pages"].assert_called_once()
+        setup_mocks["mock_fetch_accounts"].assert_called_once()
+        setup_mocks["mock_create_or_update_accounts"].assert_called_once_with([])
         assert setup_mocks["mock_create_or_update_transactions"].call_count == 0
         assert setup_mocks["mock_delete_transactions"].call_count == 0
         assert setup_mocks["mock_update_item_transaction_cursor"].call_count == 0
+
+    def test_update_transactions_persists_each_page(self, create_user, setup_mocks):
+        user = create_user()
+        item: Item = ItemFactory.create(user=user)
+
+        setup_mocks["mock_iter_transaction_pages"].return_value = iter(
+            [
+                self.page("cursor_1", added=[{"transaction_id": "1"}], has_more=True),
+                self.page("cursor_2", modified=[{"transaction_id": "2"}], removed=[{"transaction_id": "3"}]),
+            ]
+        )
+        setup_mocks["mock_fetch_accounts"].return_value = []
+
+        update_transactions(item.id)
+
+        assert setup_mocks["mock_create_or_update_transactions"].call_args_list == [
+            (([{"transaction_id": "1"}],), {"accounts": {}}),
+            (([{"transaction_id": "2"}],), {"accounts": {}}),
+        ]
+        assert setup_mocks["mock_delete_transactions"].call_args_list == [(([],),), (([{"transaction_id": "3"}],),)]
+        assert setup_mocks["mock_update_item_transaction_cursor"].call_args_list == [
+            (("cursor_1",),),
+            (("cursor_2",),),
+        ]
+
+
+@pytest.mark.usefixtures("celery_app")
+class TestSyncAllItems:
+    def test_sync_all_items(self, create_user, mocker):
+        user = create_user()
+        items = ItemFactory.create_batch(2, user=user)
+        ItemFactory.create()
+        mock_sync_items = mocker.patch(
+            "django_finance.apps.plaid.tasks.sync_items",
+            side_effect=lambda item_ids, max_workers: [ItemSyncResult(item_id=item_id) for item_id in item_ids],
+        )
+
+        summary = sync_all_items(user_id=user.id, max_workers=2)
+
+        mock_sync_items.assert_called_once()
+        assert summary["items"] == len(items)
+        assert summary["succeeded"] == len(items)
+        assert summary["failed"] == 0
+
+
+@pytest.mark.django_db
+class TestScheduleItemSync:
+    @pytest.fixture
+    def mock_delay(self, mocker):
+        return mocker.patch("django_finance.apps.plaid.tasks.update_transactions.delay")
+
+    def test_enqueues_idle_item(self, item: Item, mock_delay, django_capture_on_commit_callbacks):
+        with django_capture_on_commit_callbacks() as callbacks:
+            assert schedule_item_sync(item.id) is True
+
+        # Only enqueued once the queued status is committed
+        mock_delay.assert_not_called()
+        callbacks[0]()
+        mock_delay.assert_called_once_with(item.id)
+        item.refresh_from_db()
+        assert item.sync_status == Item.SyncStatusChoices.QUEUED
+
+    @pytest.mark.parametrize("sync_status", [Item.SyncStatusChoices.QUEUED, Item.SyncStatusChoices.RUNNING])
+    def test_coalesces_pending_sync(self, item: Item, mock_delay, sync_status):
+        Item.objects.filter(id=item.id).update(sync_status=sync_status, sync_status_updated_at=timezone.now())
+
+        assert schedule_item_sync(item.id) is False
+        assert schedule_item_sync(item.id) is False
+        mock_delay.assert_not_called()
+        item.refresh_from_db()
+        assert item.sync_requested is True
+
+    def test_reclaims_stale_sync(self, item: Item, mock_delay, settings, django_capture_on_commit_callbacks):
+        settings.PLAID_SYNC_STALE_AFTER = 60
+        Item.objects.filter(id=item.id).update(
+            sync_status=Item.SyncStatusChoices.RUNNING,
+            sync_status_updated_at=timezone.now() - timedelta(minutes=5),
+        )
+
+        with django_capture_on_commit_callbacks(execute=True):
+            assert schedule_item_sync(item.id) is True
+        mock_delay.assert_called_once_with(item.id)
+
+    def test_finish_without_requests(self, item: Item, mock_delay):
+        Item.objects.filter(id=item.id).update(sync_status=Item.SyncStatusChoices.RUNNING)
+
+        finish_item_sync(item.id)
+
+        mock_delay.assert_not_called()
+        item.refresh_from_db()
+        assert item.sync_status == Item.SyncStatusChoices.IDLE
+
+    def test_finish_enqueues_one_follow_up(self, item: Item, mock_delay, django_capture_on_commit_callbacks):
+        Item.objects.filter(id=item.id).update(sync_status=Item.SyncStatusChoices.RUNNING, sync_requested=True)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            finish_item_sync(item.id)
+
+        mock_delay.assert_called_once_with(item.id)
+        item.refresh_from_db()
+        assert item.sync_status == Item.SyncStatusChoices.QUEUED
+        assert item.sync_requested is False
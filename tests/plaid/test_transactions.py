@@ -0,0 +1,144 @@
+from datetime import date
+from decimal import Decimal
+
+import pytest
+
+from django_finance.apps.plaid.archive import archive_transactions
+from django_finance.apps.plaid.models import Item
+from django_finance.apps.plaid.transactions import (
+    decode_cursor,
+    encode_cursor,
+    filter_archived_transactions,
+    filter_transactions,
+    get_transaction_page,
+    serialize_archived_transaction,
+    serialize_transaction,
+)
+from tests.plaid.factories import AccountFactory, PersonalFinanceCategoryFactory, TransactionFactory
+
+pytestmark = pytest.mark.django_db
+
+
+class TestCursor:
+    def test_round_trip(self, item: Item):
+        transaction = TransactionFactory.create(account=AccountFactory.create(item=item), date=date(2024, 3, 1))
+        assert decode_cursor(encode_cursor(transaction)) == (date(2024, 3, 1), transaction.id)
+
+    @pytest.mark.parametrize("cursor", ["", "not-a-cursor", "MjAyNC0xMy0wMXwx"])
+    def test_invalid(self, cursor):
+        with pytest.raises(ValueError):
+            decode_cursor(cursor)
+
+
+class TestGetTransactionPage:
+    def test_pages_cover_all_transactions_once(self, item: Item):
+        account = AccountFactory.create(item=item)
+        # Several transactions share a date, so pages must also break ties on id
+        created = [
+            TransactionFactory.create(account=account, date=date(2024, 1, 1 + n // 3), amount=Decimal(n))
+            for n in range(7)
+        ]
+
+        seen, after = [], None
+        while True:
+            page = get_transaction_page(filter_transactions(item.user_id), after=after, page_size=2)
+            seen += page.transactions
+            if page.next_cursor is None:
+                break
+            after = decode_cursor(page.next_cursor)
+
+        assert [transaction.id for transaction in seen] == [
+            transaction.id for transaction in sorted(created, key=lambda t: (t.date, t.id), reverse=True)
+        ]
+
+    def test_last_page_has_no_cursor(self, item: Item):
+        TransactionFactory.create(account=AccountFactory.create(item=item))
+        page = get_transaction_page(filter_transactions(item.user_id), page_size=1)
+        assert len(page.transactions) == 1
+        assert page.next_cursor is None
+
+    def test_page_queries_do_not_depend_on_depth(self, item: Item, django_assert_num_queries):
+        account = AccountFactory.create(item=item)
+        transactions = [TransactionFactory.create(account=account, date=date(2024, 1, 1 + n)) for n in range(5)]
+        with django_assert_num_queries(1):
+            page = get_transaction_page(
+                filter_transactions(item.user_id), after=(date(2024, 1, 3), transactions[2].id)
+            )
+        assert [transaction.id for transaction in page.transactions] == [transactions[1].id, transactions[0].id]
+
+
+class TestFilterTransactions:
+    def test_filters(self, item: Item):
+        account, other_account = AccountFactory.create_batch(2, item=item)
+        category = PersonalFinanceCategoryFactory.create(primary="FOOD_AND_DRINK")
+        match = TransactionFactory.create(account=account, category=category, pending=True, date=date(2024, 2, 1))
+        TransactionFactory.create(account=other_account, category=category, pending=True, date=date(2024, 2, 1))
+        TransactionFactory.create(account=account, pending=True, date=date(2024, 2, 1))
+        TransactionFactory.create(account=account, category=category, pending=False, date=date(2024, 2, 1))
+        TransactionFactory.create(account=account, category=category, pending=True, date=date(2024, 3, 1))
+
+        transactions = filter_transactions(
+            item.user_id,
+            account=account,
+            category=category,
+            pending=True,
+            date_from=date(2024, 1, 1),
+            date_to=date(2024, 2, 28),
+        )
+        assert list(transactions) == [match]
+
+    def test_other_users_excluded(self, item: Item):
+        TransactionFactory.create()
+        assert not filter_transactions(item.user_id).exists()
+
+    def test_serialize(self, item: Item):
+        category = PersonalFinanceCategoryFactory.create(primary="FOOD_AND_DRINK", detailed="FOOD_AND_DRINK_COFFEE")
+        TransactionFactory.create(
+            account=AccountFactory.create(item=item),
+            category=category,
+            amount=Decimal("-4.5"),
+            iso_currency_code="USD",
+        )
+        data = serialize_transaction(filter_transactions(item.user_id).get())
+        assert data["amount"] == Decimal("-4.50")
+        assert data["primary_personal_finance_category"] == "FOOD_AND_DRINK"
+        assert data["detailed_personal_finance_category"] == "FOOD_AND_DRINK_COFFEE"
+
+
+class TestFilterArchivedTransactions:
+    def test_pages_and_filters(self, item: Item):
+        account, other = AccountFactory.create_batch(2, item=item)
+        for day in range(1, 6):
+            TransactionFactory.create(account=account, date=date(2020, 1, day))
+        TransactionFactory.create(account=other, date=date(2020, 1, 3))
+        recent = TransactionFactory.create(account=account, date=date(2024, 1, 1))
+        TransactionFactory.create(date=date(2020, 1, 1))
+        archive_transactions(before=date(2023, 1, 1))
+
+        transactions = filter_archived_transactions(item.user_id, account=account, date_from=date(2020, 1, 2))
+        first = get_transaction_page(transactions, page_size=3)
+        second = get_transaction_page(transactions, after=decode_cursor(first.next_cursor), page_size=3)
+
+        assert [t.date.day for t in first.transactions + second.transactions] == [5, 4, 3, 2]
+        assert second.next_cursor is None
+        assert recent.transaction_id not in filter_archived_transactions(item.user_id).values_list(
+            "transaction_id", flat=True
+        )
+
+    def test_serialize(self, item: Item):
+        category = PersonalFinanceCategoryFactory.create(primary="FOOD_AND_DRINK", detailed="FOOD_AND_DRINK_COFFEE")
+        transaction = TransactionFactory.create(
+            account=AccountFactory.create(item=item),
+            category=category,
+            date=date(2020, 1, 1),
+            amount=Decimal("-4.5"),
+            iso_currency_code="USD",
+        )
+        archive_transactions(before=date(2023, 1, 1))
+
+        data = serialize_archived_transaction(filter_archived_transactions(item.user_id).get())
+        assert data["transaction_id"] == transaction.transaction_id
+        assert data["amount"] == Decimal("-4.50")
+        assert data["primary_personal_finance_category"] == "FOOD_AND_DRINK"
+        assert data["detailed_personal_finance_category"] == "FOOD_AND_DRINK_COFFEE"
+        assert "pending" not in data
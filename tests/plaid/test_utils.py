@@ -0,0 +1,48 @@
+import threading
+
+import urllib3
+
+from django_finance.apps.plaid.utils import PlaidConfig, compact_location, get_fingerprint
+
+
+class TestPlaidConfig:
+    def test_client_is_shared_by_threads(self):
+        config = PlaidConfig()
+        clients = []
+        thread = threading.Thread(target=lambda: clients.append(config.client))
+        thread.start()
+        thread.join()
+        assert clients == [config.client]
+
+    def test_client_is_recreated_after_fork(self, mocker):
+        config = PlaidConfig()
+        client = config.client
+        mocker.patch("django_finance.apps.plaid.utils.os.getpid", return_value=-1)
+        assert config.client is not client
+
+    def test_create_client_pool_settings(self, settings):
+        settings.PLAID_POOL_MAXSIZE = 32
+        settings.PLAID_CONNECTION_RETRIES = 5
+        rest_client = PlaidConfig().create_client().api_client.rest_client
+        pool_kw = rest_client.pool_manager.connection_pool_kw
+        assert pool_kw["maxsize"] == 32
+        assert pool_kw["block"] is True
+        assert isinstance(pool_kw["retries"], urllib3.Retry)
+        assert pool_kw["retries"].connect == 5
+
+
+class TestGetFingerprint:
+    def test_fingerprint_is_stable(self):
+        assert get_fingerprint({"a": 1, "b": "2"}) == get_fingerprint({"b": "2", "a": 1})
+
+    def test_fingerprint_changes_with_values(self):
+        assert get_fingerprint({"a": 1}) != get_fingerprint({"a": 2})
+
+
+class TestCompactLocation:
+    def test_drops_null_keys(self):
+        assert compact_location({"city": "Poway", "lat": None, "lon": 0}) == {"city": "Poway", "lon": 0}
+
+    def test_empty_location_is_none(self):
+        assert compact_location({"city": None, "lat": None}) is None
+        assert compact_location(None) is None
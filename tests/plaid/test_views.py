@@ -1,11 +1,14 @@
 import json
+from datetime import date
 from decimal import Decimal
 
 import pytest
 from django.contrib.messages import get_messages
 from django.urls import reverse
 
+from django_finance.apps.plaid.archive import archive_transactions
 from django_finance.apps.plaid.models import Account, Item
+from django_finance.apps.plaid.rollups import rebuild_daily_rollups
 from tests.plaid.factories import AccountFactory, ItemFactory, TransactionFactory
 
 pytestmark = pytest.mark.django_db
@@ -42,9 +45,18 @@ class TestDashboardView:
         assert response.context["net_worth"] == Decimal(1000)
         assert response.context["total_income"] == Decimal(50)
         assert response.context["total_expense"] is None
-        assert response.context["transactions"].count() == 1
+        assert len(response.context["transactions"]) == 1
         assert response.context["category_spending"][0]["total_spending"] == Decimal(50)
-        assert json.loads(response.context["category_spending_json"])[0]["total_spending"] == "50"
+        assert json.loads(response.context["category_spending_json"])[0]["total_spending"] == "50.00"
+
+    def test_update_item_status_invalidates_dashboard(self, login):
+        client, user = login()
+        item: Item = ItemFactory.create(user=user, status="Bad")
+        assert client.get(reverse("dashboard")).context["items"][0].status == "Bad"
+
+        client.post(reverse("update_item_status"), json.dumps({"plaid_id": item.id}), content_type="application/json")
+
+        assert client.get(reverse("dashboard")).context["items"][0].status == Item.ItemStatusChoices.GOOD
 
 
 class AccountsInItemView:
@@ -63,6 +75,76 @@ class AccountsInItemView:
         assert account in response.context["accounts"]
 
 
+class TestTransactionListView:
+    @pytest.fixture
+    def account(self, login):
+        client, user = login()
+        account = AccountFactory.create(item=ItemFactory.create(user=user))
+        for day in range(1, 4):
+            TransactionFactory.create(account=account, date=date(2024, 1, day))
+        return client, account
+
+    def test_first_page(self, account, settings):
+        client, _ = account
+        settings.PLAID_TRANSACTIONS_PAGE_SIZE = 2
+        response = client.get(reverse("transaction_list"))
+        assert response.status_code == 200
+        assert "plaid/transactions.html" in (t.name for t in response.templates)
+        assert [t.date for t in response.context["transactions"]] == [date(2024, 1, 3), date(2024, 1, 2)]
+        assert 'hx-trigger="revealed"' in response.content.decode()
+
+    def test_htmx_next_page_renders_rows(self, account, settings):
+        client, _ = account
+        settings.PLAID_TRANSACTIONS_PAGE_SIZE = 2
+        next_url = client.get(reverse("transaction_list")).context["next_url"]
+        response = client.get(next_url, headers={"HX-Request": "true"})
+        assert [t.name for t in response.templates] == ["components/transaction_rows.html"]
+        assert [t.date for t in response.context["transactions"]] == [date(2024, 1, 1)]
+        assert response.context["next_url"] is None
+
+    def test_other_users_account_is_rejected(self, account):
+        client, _ = account
+        response = client.get(reverse("transaction_list"), {"account": AccountFactory.create().id})
+        assert response.context["form"].errors["account"]
+        assert response.context["transactions"] == []
+
+    def test_api(self, account, settings):
+        client, _ = account
+        settings.PLAID_TRANSACTIONS_PAGE_SIZE = 2
+        data = client.get(reverse("transaction_list_api")).json()
+        assert [row["date"] for row in data["results"]] == ["2024-01-03", "2024-01-02"]
+
+        data = client.get(data["next"]).json()
+        assert [row["date"] for row in data["results"]] == ["2024-01-01"]
+        assert data["next_cursor"] is None
+
+    def test_archived_api(self, account, settings):
+        client, transactions_account = account
+        settings.PLAID_TRANSACTIONS_PAGE_SIZE = 2
+        for day in range(1, 4):
+            TransactionFactory.create(account=transactions_account, date=date(2020, 1, day))
+        archive_transactions(before=date(2023, 1, 1))
+
+        # The pending filter doesn't apply to archived transactions
+        data = client.get(reverse("archived_transaction_list_api"), {"pending": "true"}).json()
+        assert [row["date"] for row in data["results"]] == ["2020-01-03", "2020-01-02"]
+
+        data = client.get(data["next"]).json()
+        assert [row["date"] for row in data["results"]] == ["2020-01-01"]
+        assert data["next_cursor"] is None
+
+        # Live transactions are listed without the archived ones
+        data = client.get(client.get(reverse("transaction_list_api")).json()["next"]).json()
+        assert [row["date"] for row in data["results"]] == ["2024-01-01"]
+        assert data["next_cursor"] is None
+
+    def test_api_invalid_cursor(self, account):
+        client, _ = account
+        response = client.get(reverse("transaction_list_api"), {"cursor": "not-a-cursor"})
+        assert response.status_code == 400
+        assert "cursor" in response.json()["errors"]
+
+
 class TestCreatePlaidLinkToken:
     LINK_TOKEN = "link_token"
 
@@ -78,7 +160,7 @@ class TestCreatePlaidLinkToken:
     def setup_mocks(self, mocker):
         return {
             "mock_link_token": mocker.patch(
-                "django_finance.apps.plaid.views.plaid_config.client.link_token_create",
+                "django_finance.apps.plaid.ratelimit.plaid_config.client.link_token_create",
                 return_value=self.MockLinkTokenResponse(),
             ),
             "mock_logger": mocker.patch("django_finance.apps.plaid.views.logger"),
@@ -122,7 +204,7 @@ class TestCreatePlaidLinkToken:
     def test_create_plaid_link_token_fail(self, login, mocker, create_link_token):
         _, user = login()
         mock_link_token = mocker.patch(
-            "django_finance.apps.plaid.views.plaid_config.client.link_token_create",
+            "django_finance.apps.plaid.ratelimit.plaid_config.client.link_token_create",
             side_effect=Exception("Simulated Exception"),
         )
         mock_logger = mocker.patch("django_finance.apps.plaid.views.logger")
@@ -135,21 +217,43 @@ class TestCreatePlaidLinkToken:
         )
 
 
+class TestRollupSeriesAPIView:
+    def test_monthly_series_of_account(self, login):
+        client, user = login()
+        account = AccountFactory.create(item=ItemFactory.create(user=user))
+        TransactionFactory.create(account=account, date=date(2024, 1, 5), amount=Decimal("-10"))
+        TransactionFactory.create(account=account, date=date(2024, 1, 20), amount=Decimal("-5"))
+        TransactionFactory.create(account=AccountFactory.create(item=account.item), date=date(2024, 1, 5))
+        rebuild_daily_rollups(user.id)
+
+        data = client.get(reverse("rollup_series_api"), {"period": "month", "account": account.id}).json()
+
+        assert [(row["period"], Decimal(row["total"]), row["count"]) for row in data["results"]] == [
+            ("2024-01-01", Decimal("-15"), 2)
+        ]
+
+    def test_invalid_filters(self, login):
+        client, _ = login()
+        response = client.get(reverse("rollup_series_api"), {"period": "year", "account": AccountFactory.create().id})
+        assert response.status_code == 400
+        assert set(response.json()["errors"]) == {"period", "account"}
+
+
 class TestExchangePlaidPublicAccessToken:
     @pytest.fixture
     def setup_mocks(self, mocker):
         return {
             "mock_plaid_exchange": mocker.patch(
-                "django_finance.apps.plaid.views.plaid_config.client.item_public_token_exchange",
+                "django_finance.apps.plaid.ratelimit.plaid_config.client.item_public_token_exchange",
                 return_value={
                     "access_token": "mock_access_token",
                     "item_id": "mock_item_id",
                 },
             ),
-            "mock_update_transactions": mocker.patch("django_finance.apps.plaid.views.update_transactions.delay"),
+            "mock_update_transactions": mocker.patch("django_finance.apps.plaid.tasks.update_transactions.delay"),
         }
 
-    def test_exchange_success(self, client, login, setup_mocks):
+    def test_exchange_success(self, client, login, setup_mocks, django_capture_on_commit_callbacks):
         client, user = login()
         institution_id = "mock_institution_id"
         request_data = {
@@ -158,17 +262,18 @@ class TestExchangePlaidPublicAccessToken:
             "institution_name": "Mock Institution",
         }
 
-        response = client.post(
-            reverse("exchange_public_token"),
-            data=json.dumps(request_data),
-            content_type="application/json",
-        )
+        with django_capture_on_commit_callbacks(execute=True):
+            response = client.post(
+                reverse("exchange_public_token"),
+                data=json.dumps(request_data),
+                content_type="application/json",
+            )
 
         assert response.status_code == 200
         setup_mocks["mock_plaid_exchange"].assert_called_once()
-        setup_mocks["mock_update_transactions"].assert_called_once_with(
-            Item.objects.filter(item_id="mock_item_id").first().id
-        )
+        item = Item.objects.get(item_id="mock_item_id")
+        setup_mocks["mock_update_transactions"].assert_called_once_with(item.id)
+        assert item.sync_status == Item.SyncStatusChoices.QUEUED
 
         assert Item.objects.filter(user=user, institution_id=institution_id).exists()
         assert "components/bank_cards.html" in (t.name for t in response.templates)
@@ -185,7 +290,7 @@ class TestExchangePlaidPublicAccessToken:
     def test_exchange_exception(self, client, login, mocker):
         client, _ = login()
         mocker.patch(
-            "django_finance.apps.plaid.views.plaid_config.client.item_public_token_exchange",
+            "django_finance.apps.plaid.ratelimit.plaid_config.client.item_public_token_exchange",
             side_effect=Exception("Simulated Exception"),
         )
         response = client.post(
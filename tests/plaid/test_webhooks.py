@@ -1,13 +1,25 @@
 import json
+from datetime import timedelta
+from io import StringIO
 
+import plaid
 import pytest
+from django.core.management import call_command
+from django.db import IntegrityError
 from django.test import RequestFactory
+from django.utils import timezone
 
-from django_finance.apps.plaid.models import Item
+from django_finance.apps.plaid.models import Item, WebhookEvent
+from django_finance.apps.plaid.tasks import prune_old_webhook_events
 from django_finance.apps.plaid.views import PlaidWebhook
 from django_finance.apps.plaid.webhooks import (
+    drain_webhook_inbox,
+    enqueue_webhook,
+    get_verification_key,
     handle_item_webhook,
     handle_transactions_webhook,
+    prune_webhook_inbox,
+    webhook_key_cache,
 )
 from tests.plaid.factories import ItemFactory
 
@@ -25,7 +37,7 @@ class TestPlaidWebhook:
             "mock_update_item_new_accounts_detected": mocker.patch(
                 "django_finance.apps.plaid.webhooks.PlaidDatabaseService.update_item_new_accounts_detected"
             ),
-            "mock_update_transactions": mocker.patch("django_finance.apps.plaid.webhooks.update_transactions.delay"),
+            "mock_update_transactions": mocker.patch("django_finance.apps.plaid.tasks.update_transactions.delay"),
             "mock_logger": mocker.patch("django_finance.apps.plaid.webhooks.logger"),
         }
 
@@ -93,10 +105,240 @@ class TestPlaidWebhook:
         handle_item_webhook(webhook_code, item.item_id, error=None)
         mock_new_accounts_detected.assert_called_once()
 
-    def test_handle_transactions_webhook(self, create_user, setup_mocks):
+    def test_handle_transactions_webhook(self, create_user, setup_mocks, django_capture_on_commit_callbacks):
         user = create_user()
         item: Item = ItemFactory.create(user=user)
         webhook_code = "SYNC_UPDATES_AVAILABLE"
         mock_update_transactions = setup_mocks["mock_update_transactions"]
-        handle_transactions_webhook(webhook_code, item.item_id)
+        with django_capture_on_commit_callbacks(execute=True):
+            handle_transactions_webhook(webhook_code, item.item_id)
         mock_update_transactions.assert_called_once_with(item.id)
+
+    def test_handle_transactions_webhook_coalesces_burst(
+        self, create_user, setup_mocks, django_capture_on_commit_callbacks
+    ):
+        user = create_user()
+        item: Item = ItemFactory.create(user=user)
+        with django_capture_on_commit_callbacks(execute=True):
+            for _ in range(5):
+                handle_transactions_webhook("SYNC_UPDATES_AVAILABLE", item.item_id)
+        setup_mocks["mock_update_transactions"].assert_called_once_with(item.id)
+        item.refresh_from_db()
+        assert item.sync_requested is True
+
+
+class TestVerificationKeyCache:
+    @pytest.fixture(autouse=True)
+    def clear_local_cache(self):
+        webhook_key_cache.local.clear()
+
+    @pytest.fixture
+    def mock_key_get(self, mocker):
+        return mocker.patch("django_finance.apps.plaid.ratelimit.plaid_config.client.webhook_verification_key_get")
+
+    def test_key_fetched_once(self, settings, mock_key_get):
+        key = {"kid": "kid", "expired_at": None}
+        mock_key_get.return_value.to_dict.return_value = {"key": key}
+        assert get_verification_key("kid") == key
+        assert get_verification_key("kid") == key
+        mock_key_get.assert_called_once()
+        assert mock_key_get.call_args.kwargs["_request_timeout"] == (
+            settings.PLAID_CONNECT_TIMEOUT,
+            settings.PLAID_READ_TIMEOUT,
+        )
+
+    def test_unknown_key_is_negatively_cached(self, mock_key_get):
+        mock_key_get.side_effect = plaid.ApiException(status=400, reason="Bad Request")
+        assert get_verification_key("unknown") is None
+        assert get_verification_key("unknown") is None
+        mock_key_get.assert_called_once()
+
+    def test_transient_error_is_not_cached(self, mock_key_get):
+        mock_key_get.side_effect = plaid.ApiException(status=500, reason="Internal Server Error")
+        with pytest.raises(plaid.ApiException):
+            get_verification_key("kid")
+        with pytest.raises(plaid.ApiException):
+            get_verification_key("kid")
+        assert mock_key_get.call_count == 2
+
+
+class TestWebhookInbox:
+    @pytest.fixture(autouse=True)
+    def setup(self, settings):
+        settings.PLAID_WEBHOOK_INBOX = True
+
+    @pytest.fixture
+    def setup_mocks(self, mocker):
+        return {
+            "mock_verify_webhook": mocker.patch("django_finance.apps.plaid.views.verify_webhook", return_value=True),
+            "mock_handle_webhook": mocker.patch("django_finance.apps.plaid.views.handle_webhook"),
+            "mock_process_webhook_inbox": mocker.patch(
+                "django_finance.apps.plaid.webhooks.process_webhook_inbox.delay"
+            ),
+            "mock_update_item": mocker.patch(
+                "django_finance.apps.plaid.webhooks.PlaidDatabaseService.update_item_to_bad_state"
+            ),
+        }
+
+    def post_webhook(self, payload):
+        request = RequestFactory().post("/finance/webhook/", json.dumps(payload), content_type="application/json")
+        return PlaidWebhook.as_view()(request)
+
+    def test_webhook_is_stored_and_acknowledged(self, setup_mocks, item: Item, django_capture_on_commit_callbacks):
+        payload = {"webhook_type": "ITEM", "webhook_code": "PENDING_EXPIRATION", "item_id": item.item_id}
+
+        with django_capture_on_commit_callbacks(execute=True):
+            response = self.post_webhook(payload)
+            self.post_webhook(payload)
+
+        assert response.status_code == 200
+        setup_mocks["mock_handle_webhook"].assert_not_called()
+        setup_mocks["mock_process_webhook_inbox"].assert_called_once_with()
+        event = WebhookEvent.objects.first()
+        assert event.payload == payload
+        assert event.plaid_item_id == item.item_id
+        assert WebhookEvent.objects.filter(status=WebhookEvent.StatusChoices.PENDING).count() == 2
+
+    def test_drain_webhook_inbox(self, setup_mocks, item: Item):
+        payload = {"webhook_type": "ITEM", "webhook_code": "PENDING_EXPIRATION", "item_id": item.item_id}
+        for _ in range(3):
+            enqueue_webhook(payload)
+
+        assert drain_webhook_inbox(batch_size=2) == 3
+
+        item.refresh_from_db()
+        assert item.status == "Bad"
+        assert not WebhookEvent.objects.filter(status=WebhookEvent.StatusChoices.PENDING).exists()
+
+    def test_drain_webhook_inbox_groups_events_per_item(
+        self, create_user, setup_mocks, mocker, django_assert_max_num_queries
+    ):
+        mock_schedule_item_sync = mocker.patch("django_finance.apps.plaid.webhooks.schedule_item_sync")
+        user = create_user()
+        items = ItemFactory.create_batch(3, user=user)
+        for item in items:
+            for _ in range(5):
+                enqueue_webhook(
+                    {"webhook_type": "TRANSACTIONS", "webhook_code": "SYNC_UPDATES_AVAILABLE", "item_id": item.item_id}
+                )
+        enqueue_webhook(
+            {"webhook_type": "ITEM", "webhook_code": "NEW_ACCOUNTS_AVAILABLE", "item_id": items[0].item_id}
+        )
+        enqueue_webhook(
+            {"webhook_type": "ITEM", "webhook_code": "NEW_ACCOUNTS_AVAILABLE", "item_id": items[0].item_id}
+        )
+        enqueue_webhook({"webhook_type": "ITEM", "webhook_code": "PENDING_EXPIRATION", "item_id": "unknown"})
+
+        # Constant in the number of events, plus a savepoint for each item to sync
+        with django_assert_max_num_queries(11 + 2 * len(items)):
+            assert drain_webhook_inbox() == 18
+
+        assert sorted(call.args[0] for call in mock_schedule_item_sync.call_args_list) == sorted(
+            item.id for item in items
+        )
+        assert list(Item.objects.filter(new_accounts_detected=True)) == [items[0]]
+
+    def test_drain_webhook_inbox_failure(self, setup_mocks, item: Item, settings, mocker):
+        settings.PLAID_WEBHOOK_MAX_ATTEMPTS = 2
+        mocker.patch(
+            "django_finance.apps.plaid.webhooks.schedule_item_sync", side_effect=Exception("Simulated Exception")
+        )
+        event = enqueue_webhook(
+            {"webhook_type": "TRANSACTIONS", "webhook_code": "SYNC_UPDATES_AVAILABLE", "item_id": item.item_id}
+        )
+        other = enqueue_webhook(
+            {"webhook_type": "ITEM", "webhook_code": "PENDING_EXPIRATION", "item_id": item.item_id}
+        )
+
+        assert drain_webhook_inbox() == 1
+        event.refresh_from_db()
+        other.refresh_from_db()
+        assert event.status == WebhookEvent.StatusChoices.PENDING
+        assert event.attempts == 1
+        assert event.error == "Simulated Exception"
+        assert other.status == WebhookEvent.StatusChoices.PROCESSED
+
+        drain_webhook_inbox()
+        event.refresh_from_db()
+        assert event.status == WebhookEvent.StatusChoices.FAILED
+
+    def test_drain_webhook_inbox_isolates_database_errors(self, create_user, setup_mocks, mocker):
+        user = create_user()
+        failing, item = ItemFactory.create_batch(2, user=user)
+        schedule_item_sync = mocker.patch("django_finance.apps.plaid.webhooks.schedule_item_sync")
+
+        # The failing item's queries are rolled back, the others still apply in the same drain
+        def schedule(item_id):
+            Item.objects.filter(id=item_id).update(sync_requested=True)
+            if item_id == failing.id:
+                raise IntegrityError("Simulated IntegrityError")
+            return True
+
+        schedule_item_sync.side_effect = schedule
+        for plaid_item in (failing, item):
+            enqueue_webhook(
+                {
+                    "webhook_type": "TRANSACTIONS",
+                    "webhook_code": "SYNC_UPDATES_AVAILABLE",
+                    "item_id": plaid_item.item_id,
+                }
+            )
+
+        assert drain_webhook_inbox() == 1
+
+        assert WebhookEvent.objects.get(plaid_item_id=failing.item_id).error == "Simulated IntegrityError"
+        assert list(Item.objects.filter(sync_requested=True)) == [item]
+
+    def test_drain_webhook_inbox_enqueues_syncs_on_commit(
+        self, setup_mocks, item: Item, mocker, django_capture_on_commit_callbacks
+    ):
+        mock_delay = mocker.patch("django_finance.apps.plaid.tasks.update_transactions.delay")
+        enqueue_webhook(
+            {"webhook_type": "TRANSACTIONS", "webhook_code": "SYNC_UPDATES_AVAILABLE", "item_id": item.item_id}
+        )
+
+        with django_capture_on_commit_callbacks() as callbacks:
+            assert drain_webhook_inbox() == 1
+
+        # Nothing is sent to the broker while the drain's transaction is open
+        mock_delay.assert_not_called()
+        for callback in callbacks:
+            callback()
+        mock_delay.assert_called_once_with(item.id)
+
+    def test_prune_webhook_inbox(self, item: Item, settings):
+        settings.PLAID_WEBHOOK_RETENTION_DAYS = 7
+        payload = {"webhook_type": "ITEM", "webhook_code": "PENDING_EXPIRATION", "item_id": item.item_id}
+        old, recent, failed, pending = (enqueue_webhook(payload) for _ in range(4))
+        long_ago = timezone.now() - timedelta(days=8)
+        WebhookEvent.objects.filter(id=old.id).update(
+            status=WebhookEvent.StatusChoices.PROCESSED, processed_at=long_ago
+        )
+        WebhookEvent.objects.filter(id=recent.id).update(
+            status=WebhookEvent.StatusChoices.PROCESSED, processed_at=timezone.now()
+        )
+        WebhookEvent.objects.filter(id=failed.id).update(status=WebhookEvent.StatusChoices.FAILED, updated_at=long_ago)
+
+        assert prune_webhook_inbox(batch_size=1) == 1
+
+        assert sorted(WebhookEvent.objects.values_list("id", flat=True)) == [recent.id, failed.id, pending.id]
+
+    def test_prune_task_disabled(self, item: Item, settings):
+        settings.PLAID_WEBHOOK_RETENTION_DAYS = 0
+        event = enqueue_webhook(
+            {"webhook_type": "ITEM", "webhook_code": "PENDING_EXPIRATION", "item_id": item.item_id}
+        )
+        WebhookEvent.objects.filter(id=event.id).update(
+            status=WebhookEvent.StatusChoices.PROCESSED, processed_at=timezone.now() - timedelta(days=365)
+        )
+
+        assert prune_old_webhook_events() == 0
+        assert WebhookEvent.objects.exists()
+
+    def test_process_webhook_inbox_command(self, setup_mocks, item: Item):
+        enqueue_webhook({"webhook_type": "ITEM", "webhook_code": "PENDING_EXPIRATION", "item_id": item.item_id})
+        out = StringIO()
+
+        call_command("process_webhook_inbox", "--batch-size", "10", stdout=out)
+
+        assert "Processed 1 webhook events, 0 still pending." in out.getvalue()